@@ -1,8 +1,6 @@
 import csv
-import urllib.request
-import urllib.error
-import json
-import time
+
+from lookup_engine import fetch_record
 
 def get_product_image_url(upc_code):
     """
@@ -10,49 +8,18 @@ def get_product_image_url(upc_code):
     Returns: (image_url: str, source: str)
     """
     
-    # Method 1: Try UPCitemdb
-    try:
-        url = f"https://api.upcitemdb.com/prod/trial/lookup?upc={upc_code}"
-        headers = {
-            'Accept': 'application/json',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+    # Method 1: Try UPCitemdb, Method 2: Try OpenFoodFacts
+    for provider_name in ('upcitemdb', 'openfoodfacts'):
+        record = fetch_record(provider_name, upc_code)
+        if not record.found:
+            continue
+        if record.images:
+            return record.images[0], record.source
         
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            
-            if data.get('code') == 'OK' and data.get('items'):
-                item = data['items'][0]
-                images = item.get('images', [])
-                if images:
-                    return images[0], 'UPCitemdb'
-    except Exception as e:
-        pass
-    
-    # Method 2: Try OpenFoodFacts
-    try:
-        url = f"https://world.openfoodfacts.org/api/v0/product/{upc_code}.json"
-        headers = {
-            'User-Agent': 'PalmersUPCScanner/1.0'
-        }
-        
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            
-            if data.get('status') == 1 and data.get('product'):
-                product = data['product']
-                image_url = product.get('image_url', '')
-                if image_url:
-                    return image_url, 'OpenFoodFacts'
-                
-                # Try alternative image fields
-                image_front = product.get('image_front_url', '')
-                if image_front:
-                    return image_front, 'OpenFoodFacts'
-    except Exception as e:
-        pass
+        # Try alternative image fields
+        image_front = record.raw.get('product', {}).get('image_front_url', '')
+        if image_front:
+            return image_front, record.source
     
     return '', ''
 
@@ -100,8 +67,6 @@ def main():
         else:
             print(f"No image available")
             image_data[upc] = ''
-        
-        time.sleep(0.8)  # Rate limiting
     
     print()
     print("=" * 80)
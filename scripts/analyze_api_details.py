@@ -3,12 +3,12 @@ Analyze API request/response details for comprehensive comparison
 Captures: request payloads, response payloads, timing, data completeness
 """
 
-import urllib.request
-import urllib.error
 import json
 import time
 from datetime import datetime
 
+from lookup_engine import fetch_record
+
 # API Keys
 BARCODE_LOOKUP_KEY = "YOUR_BARCODE_LOOKUP_API_KEY_HERE"
 APIFY_KEY = "YOUR_APIFY_API_TOKEN_HERE"
@@ -21,6 +21,29 @@ test_products = [
     {"upc": "819046000420", "name": "Inka Giant Corn Chile Picante"}
 ]
 
+def analyze(provider_name, upc, request_info, key=None):
+    """Live (uncached) lookup through the shared provider client, with timing"""
+    record = fetch_record(provider_name, upc, key=key, use_cache=False)
+    if record.status == 200:
+        return {
+            "success": True,
+            "request": request_info,
+            "response": {
+                "status_code": record.status,
+                "response_time_ms": record.elapsed_ms,
+                "content_length": len(json.dumps(record.raw)),
+                "payload": record.raw
+            }
+        }
+    return {
+        "success": False,
+        "request": request_info,
+        "response": {
+            "error": record.error,
+            "response_time_ms": record.elapsed_ms
+        }
+    }
+
 def test_barcode_lookup(upc):
     """Test Barcode Lookup API with detailed logging"""
     url = f"https://api.barcodelookup.com/v3/products?barcode={upc}&key={BARCODE_LOOKUP_KEY}"
@@ -36,34 +59,7 @@ def test_barcode_lookup(upc):
         "request_body": None
     }
     
-    start_time = time.time()
-    
-    try:
-        req = urllib.request.Request(url)
-        with urllib.request.urlopen(req) as response:
-            response_time = time.time() - start_time
-            response_data = json.loads(response.read().decode())
-            
-            return {
-                "success": True,
-                "request": request_info,
-                "response": {
-                    "status_code": response.status,
-                    "response_time_ms": round(response_time * 1000, 2),
-                    "content_length": len(json.dumps(response_data)),
-                    "payload": response_data
-                }
-            }
-    except Exception as e:
-        response_time = time.time() - start_time
-        return {
-            "success": False,
-            "request": request_info,
-            "response": {
-                "error": str(e),
-                "response_time_ms": round(response_time * 1000, 2)
-            }
-        }
+    return analyze('barcode_lookup', upc, request_info, key=BARCODE_LOOKUP_KEY)
 
 def test_upcitemdb(upc):
     """Test UPCitemdb API with detailed logging"""
@@ -80,36 +76,7 @@ def test_upcitemdb(upc):
         "request_body": None
     }
     
-    start_time = time.time()
-    
-    try:
-        req = urllib.request.Request(url)
-        req.add_header('Content-Type', 'application/json')
-        
-        with urllib.request.urlopen(req) as response:
-            response_time = time.time() - start_time
-            response_data = json.loads(response.read().decode())
-            
-            return {
-                "success": True,
-                "request": request_info,
-                "response": {
-                    "status_code": response.status,
-                    "response_time_ms": round(response_time * 1000, 2),
-                    "content_length": len(json.dumps(response_data)),
-                    "payload": response_data
-                }
-            }
-    except Exception as e:
-        response_time = time.time() - start_time
-        return {
-            "success": False,
-            "request": request_info,
-            "response": {
-                "error": str(e),
-                "response_time_ms": round(response_time * 1000, 2)
-            }
-        }
+    return analyze('upcitemdb', upc, request_info)
 
 def test_go_upc(upc):
     """Test Go-UPC API with detailed logging"""
@@ -127,36 +94,7 @@ def test_go_upc(upc):
         "request_body": None
     }
     
-    start_time = time.time()
-    
-    try:
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {GO_UPC_KEY}')
-        
-        with urllib.request.urlopen(req) as response:
-            response_time = time.time() - start_time
-            response_data = json.loads(response.read().decode())
-            
-            return {
-                "success": True,
-                "request": request_info,
-                "response": {
-                    "status_code": response.status,
-                    "response_time_ms": round(response_time * 1000, 2),
-                    "content_length": len(json.dumps(response_data)),
-                    "payload": response_data
-                }
-            }
-    except Exception as e:
-        response_time = time.time() - start_time
-        return {
-            "success": False,
-            "request": request_info,
-            "response": {
-                "error": str(e),
-                "response_time_ms": round(response_time * 1000, 2)
-            }
-        }
+    return analyze('go_upc', upc, request_info, key=GO_UPC_KEY)
 
 def main():
     """Run detailed API analysis"""
@@ -1,6 +1,8 @@
 import csv
 from collections import defaultdict
 
+from provider_router import ProviderRouter
+
 def analyze_upc_patterns():
     """Analyze patterns in verified vs not found UPCs"""
     
@@ -201,6 +203,16 @@ def analyze_upc_patterns():
     top_verified = sorted(verified_prefixes.items(), key=lambda x: -len(x[1]))[:5]
     for prefix, items in top_verified:
         print(f"   - {prefix}xxx ({len(items)} verified)")
+    
+    # What the lookup engine's router has learned across all runs so far
+    router = ProviderRouter()
+    if router.stats:
+        print()
+        print("4. LEARNED PROVIDER ROUTING (all runs):")
+        for provider_name, rows in router.summary('prefix').items():
+            print(f"   {provider_name}:")
+            for prefix, lookups, hit_rate in rows:
+                print(f"   - {prefix}xxx: {lookups} lookups, {hit_rate:.0%} found")
 
 if __name__ == '__main__':
     analyze_upc_patterns()
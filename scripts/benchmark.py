@@ -0,0 +1,404 @@
+"""
+Benchmark suite for the verification pipeline
+Times each stage - master list build/load, GTIN validation, lookups against
+the local mock provider server, validation scoring, verification CSV output
+and HTML report generation - and reports ops/sec, p50/p95/p99 latency per
+operation and peak RSS. Every benchmark runs in a fresh process so its peak
+RSS is its own. Results are saved as JSON; compare flags regressions.
+
+Usage:
+    python benchmark.py run [--only gtin_validation,lookups] [--lookups 10000] [--output FILE]
+    python benchmark.py compare BASELINE.json CURRENT.json [--threshold 0.10]
+        Exits with status 1 if any benchmark regressed by more than the threshold
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import multiprocessing
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows - peak RSS is reported as null there
+    resource = None
+
+from master_list import MASTER_LIST_CSV, REPO_ROOT
+
+RESULTS_DIR = os.path.join(REPO_ROOT, '.cache', 'benchmarks')
+VERIFIED_WITH_IMAGES_CSV = os.path.join(REPO_ROOT, 'csv-data', 'palmers-barcodes-verified-with-images.csv')
+
+DEFAULT_LOOKUPS = 10000
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+MOCK_LATENCY = 'lognormal:20,0.5'
+LOOKUP_CONCURRENCY = 32
+
+# Metric -> True if bigger is better; compare flags moves in the wrong direction
+COMPARED_METRICS = {
+    'ops_per_sec': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'peak_rss_mb': False,
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def time_each(items, operation):
+    """Run operation(item) for every item; returns per-call latencies in seconds"""
+    latencies = []
+    clock = time.perf_counter
+    for item in items:
+        started = clock()
+        operation(item)
+        latencies.append(clock() - started)
+    return latencies
+
+
+def _valid_upcs(count):
+    """count distinct valid UPCs - the master list's, topped up with synthetic ones"""
+    from gtin import check_digit
+    from master_list import load_master_list
+
+    master = load_master_list()
+    upcs = master.column('upc')
+    codes = list(dict.fromkeys(upcs[i] for i in master.valid_index))
+    rng = random.Random(0)
+    seen = set(codes)
+    while len(codes) < count:
+        body = f"{rng.randrange(10 ** 11):011d}"
+        code = body + str(check_digit(body))
+        if code not in seen:
+            seen.add(code)
+            codes.append(code)
+    return codes[:count]
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks - each returns (per-operation latencies, operation label)
+# ---------------------------------------------------------------------------
+
+def bench_master_list_build(args):
+    from master_list import build_master_list
+    return time_each(range(args.repeat), lambda _: build_master_list(MASTER_LIST_CSV)), 'CSV parse + index'
+
+
+def bench_master_list_load(args):
+    import master_list
+    master_list.load_master_list()
+
+    def load(_):
+        # Skip the per-process memo so every call reads the on-disk store
+        master_list._loaded.clear()
+        master_list.load_master_list()
+    return time_each(range(args.repeat * 20), load), 'store load'
+
+
+def bench_gtin_validation(args):
+    import csv
+    from gtin import normalize
+
+    with open(MASTER_LIST_CSV, 'r', encoding='utf-8-sig') as f:
+        codes = [row[1] for row in csv.reader(f) if len(row) > 1][1:]
+    return time_each(codes * args.repeat, normalize), 'code'
+
+
+def bench_lookups(args):
+    from mock_provider_server import start_mock_server
+    import http_transport
+    from lookup_engine import LookupEngine
+    from rate_limiter import RateLimiter, UNLIMITED_PLAN
+    from upc_providers import FREE_PROVIDERS
+
+    server = start_mock_server(settings={'latency': args.mock_latency}, seed=0)
+    http_transport.set_mock_server(server.base_url)
+    engine = LookupEngine(FREE_PROVIDERS, strategy='race', use_cache=False,
+                          concurrency={name: LOOKUP_CONCURRENCY for name in FREE_PROVIDERS},
+                          rate_limiter=RateLimiter(plans={name: UNLIMITED_PLAN for name in FREE_PROVIDERS}))
+    latencies = []
+    lookup = engine.lookup
+
+    async def timed_lookup(upc_code):
+        started = time.perf_counter()
+        result = await lookup(upc_code)
+        latencies.append(time.perf_counter() - started)
+        return result
+
+    engine.lookup = timed_lookup
+    upcs = _valid_upcs(args.lookups)
+    started = time.perf_counter()
+    try:
+        asyncio.run(engine.lookup_all(upcs))
+    finally:
+        engine.close()
+        http_transport.set_mock_server(None)
+        server.shutdown()
+    # Lookups overlap, so throughput comes from wall time rather than the latency sum
+    return latencies, 'UPC', time.perf_counter() - started
+
+
+def bench_validation_scoring(args):
+    from master_list import load_master_list
+    from name_matcher import get_name_matcher
+    from department_classifier import get_department_classifier
+    from validate_api_results import validate_api_response
+
+    # Load the name index and classifier up front so the first scored result doesn't pay for them
+    get_name_matcher()
+    get_department_classifier()
+    master = load_master_list()
+    names = master.column('name')
+    upcs = master.column('upc')
+    rng = random.Random(0)
+    rows = list(master.valid_index)[:2000]
+    # Half the API titles are the right product with noise, half another product's name
+    pairs = []
+    for i in rows:
+        if rng.random() < 0.5:
+            api_name = f"{names[i]} {rng.choice(['12 oz', 'Family Size', '2 Pack', ''])}"
+        else:
+            api_name = names[rng.choice(rows)]
+        pairs.append((upcs[i], api_name, names[i]))
+    operation = lambda pair: validate_api_response(pair[0], pair[1], pair[2], 'Benchmark')
+    return time_each(pairs * args.repeat, operation), 'API result'
+
+
+def bench_batch_validation(args):
+    from master_list import load_master_list
+    from name_matcher import get_name_matcher
+    from department_classifier import get_department_classifier
+    from validate_api_results import validate_batch
+
+    get_name_matcher()
+    get_department_classifier()
+    master = load_master_list()
+    names = master.column('name')
+    upcs = master.column('upc')
+    rng = random.Random(0)
+    rows = [i for i in master.valid_index if names[i]]
+    batches = []
+    for _ in range(args.repeat * 4):
+        batch = []
+        for _ in range(1000):
+            i = rng.choice(rows)
+            api_name = names[i] + ' 12 oz' if rng.random() < 0.6 else names[rng.choice(rows)]
+            batch.append((upcs[i], api_name, 'Benchmark'))
+        batches.append(batch)
+    return time_each(batches, lambda batch: validate_batch(batch, master=master)), '1000-row batch'
+
+
+def bench_csv_output(args):
+    from verification_output import write_verification_csv
+
+    results = {upc_code: (True, f"Product {upc_code}", 'UPCitemdb')
+               for upc_code in _valid_upcs(5000)}
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'verification.csv')
+        operation = lambda _: write_verification_csv(MASTER_LIST_CSV, output_file, results)
+        return time_each(range(args.repeat), operation), 'full verification CSV'
+
+
+def bench_html_report(args):
+    import csv
+    import contextlib
+    from create_html_report import create_html_report
+
+    with open(VERIFIED_WITH_IMAGES_CSV, 'r', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    header, body = rows[0], [row for row in rows[1:] if row and row[0] == 'YES']
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # create_html_report reads and writes relative to the working directory
+        with open(os.path.join(tmp, 'palmers-barcodes-verified-with-images.csv'), 'w',
+                  encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for _ in range(max(1, 5000 // max(len(body), 1))):
+                writer.writerows(body)
+        os.chdir(tmp)
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                return time_each(range(args.repeat), lambda _: create_html_report()), '5000-card report'
+        finally:
+            os.chdir(cwd)
+
+
+BENCHMARKS = {
+    'master_list_build': bench_master_list_build,
+    'master_list_load': bench_master_list_load,
+    'gtin_validation': bench_gtin_validation,
+    'lookups': bench_lookups,
+    'validation_scoring': bench_validation_scoring,
+    'batch_validation': bench_batch_validation,
+    'csv_output': bench_csv_output,
+    'html_report': bench_html_report,
+}
+
+
+def summarize(latencies, unit, wall_time=None):
+    ordered = sorted(latencies)
+    total = wall_time if wall_time is not None else sum(latencies)
+    return {
+        'unit': unit,
+        'ops': len(latencies),
+        'seconds': round(total, 4),
+        'ops_per_sec': round(len(latencies) / total, 2) if total else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 4),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 4),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 4),
+    }
+
+
+def _run_in_child(name, args, results):
+    try:
+        outcome = BENCHMARKS[name](args)
+        summary = summarize(*outcome)
+        summary['peak_rss_mb'] = peak_rss_mb()
+        results.put((name, summary))
+    except Exception as e:
+        results.put((name, {'error': f"{type(e).__name__}: {e}"}))
+
+
+def run_benchmarks(names, args):
+    """Run each benchmark in its own spawned process; returns {name: summary}"""
+    context = multiprocessing.get_context('spawn')
+    summaries = {}
+    for name in names:
+        results = context.Queue()
+        worker = context.Process(target=_run_in_child, args=(name, args, results))
+        worker.start()
+        worker.join()
+        summaries[name] = (results.get() if not results.empty()
+                           else (name, {'error': f"exit code {worker.exitcode}"}))[1]
+        print_summary(name, summaries[name])
+    return summaries
+
+
+def print_summary(name, summary):
+    if 'error' in summary:
+        print(f"  {name:<20} FAILED - {summary['error']}")
+        return
+    rss = summary['peak_rss_mb']
+    rss_text = f"{rss:8.1f} MB" if rss is not None else '       n/a'
+    print(f"  {name:<20} {summary['ops_per_sec']:>12,.1f} ops/s   "
+          f"p50 {summary['p50_ms']:>9.3f} ms   p95 {summary['p95_ms']:>9.3f} ms   "
+          f"p99 {summary['p99_ms']:>9.3f} ms   RSS {rss_text}")
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Relative change of every metric between two result files
+
+    Returns: list of (benchmark, metric, old, new, change, regressed)
+    """
+    rows = []
+    for name, new in current['benchmarks'].items():
+        old = baseline['benchmarks'].get(name)
+        if not old or 'error' in old or 'error' in new:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if old.get(metric) in (None, 0) or new.get(metric) is None:
+                continue
+            change = (new[metric] - old[metric]) / old[metric]
+            regressed = -change > threshold if higher_is_better else change > threshold
+            rows.append((name, metric, old[metric], new[metric], change, regressed))
+    return rows
+
+
+def cmd_run(args):
+    names = [n.strip() for n in args.only.split(',')] if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        sys.exit(f"Unknown benchmarks: {', '.join(unknown)} (have: {', '.join(BENCHMARKS)})")
+
+    print("=" * 80)
+    print("VERIFICATION PIPELINE BENCHMARKS")
+    print("=" * 80)
+    print()
+    summaries = run_benchmarks(names, args)
+
+    output_file = args.output or os.path.join(
+        RESULTS_DIR, f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'settings': {'lookups': args.lookups, 'repeat': args.repeat,
+                         'mock_latency': args.mock_latency},
+            'benchmarks': summaries,
+        }, f, indent=2)
+    print()
+    print(f"Results saved to: {output_file}")
+
+
+def cmd_compare(args):
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"{'Benchmark':<20} {'Metric':<12} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    print("-" * 70)
+    for name, metric, old, new, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:<20} {metric:<12} {old:>12,.3f} {new:>12,.3f} {change:>+8.1%}{flag}")
+
+    regressions = [row for row in rows if row[5]]
+    print()
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verification pipeline benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Run benchmarks and save the results as JSON")
+    run.add_argument('--only', help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    run.add_argument('--lookups', type=int, default=DEFAULT_LOOKUPS,
+                     help="UPCs to look up against the mock server")
+    run.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    run.add_argument('--mock-latency', default=MOCK_LATENCY)
+    run.add_argument('--output', help="Result file (default .cache/benchmarks/benchmark-<time>.json)")
+    run.set_defaults(handler=cmd_run)
+
+    comp = commands.add_parser('compare', help="Flag regressions between two result files")
+    comp.add_argument('baseline')
+    comp.add_argument('current')
+    comp.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                      help="Relative change that counts as a regression (0.10 = 10%%)")
+    comp.set_defaults(handler=cmd_compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
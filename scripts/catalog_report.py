@@ -0,0 +1,104 @@
+"""
+Catalog-scale report mode
+The inline HTML reports put every product, image tag and style block into one
+document, which is fine for 15 products and freezes the browser at 9,400.
+A catalog report is instead a compact JSON data file plus a small static
+HTML shell (templates/catalog_report.html). The page keeps only the rows in
+view in the DOM (virtualized scrolling within pages of up to 5,000
+products), loads images lazily as they scroll in, and searches and filters
+by department and provider on the client.
+
+The data file holds the JSON wrapped in one catalogLoaded(...) call, so the
+shell can load it with a plain <script src> - that also works when the
+report is opened straight from disk, where fetch() of a local file is blocked.
+
+Products are stored as arrays, with departments and providers replaced by
+indexes into shared lists:
+    [upc, name, department, size, price, [[provider, title, image], ...]]
+
+Usage (from a report script):
+    catalog = CatalogReport("Palmer's Verified Products")
+    catalog.add(upc, name, department, size, price, [('UPCitemdb', title, image_url)])
+    catalog.write('Palmers_Verified_Products_catalog.html')
+"""
+
+import os
+import json
+import html
+from string import Template
+
+SHELL_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'templates', 'catalog_report.html')
+
+
+def data_file_for(output_file):
+    """Data file written next to a catalog report's HTML shell"""
+    return os.path.splitext(output_file)[0] + '.data.js'
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class CatalogReport:
+    """Collects products and their per-provider results for one catalog report"""
+
+    def __init__(self, title, subtitle=''):
+        self.title = title
+        self.subtitle = subtitle
+        self.departments = []
+        self.providers = []
+        self.products = []
+        self._department_index = {}
+        self._provider_index = {}
+
+    def _index(self, lookup, values, value):
+        i = lookup.get(value)
+        if i is None:
+            i = lookup[value] = len(values)
+            values.append(value)
+        return i
+
+    def add(self, upc, name, department='', size='', price='', results=()):
+        """
+        Add one product
+
+        results: iterable of (provider, title, image url or '') for the
+        providers that returned it
+        """
+        self.products.append([
+            upc, name, self._index(self._department_index, self.departments, department),
+            size, price,
+            [[self._index(self._provider_index, self.providers, provider), title or '', image or '']
+             for provider, title, image in results],
+        ])
+
+    def to_dict(self):
+        return {
+            'title': self.title,
+            'departments': self.departments,
+            'providers': self.providers,
+            'products': self.products,
+        }
+
+    def write(self, output_file):
+        """
+        Write the data file and the HTML shell
+
+        Returns: path of the data file
+        """
+        data_file = data_file_for(output_file)
+        payload = json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+        _write_atomic(data_file, 'catalogLoaded(' + payload + ');\n')
+
+        with open(SHELL_TEMPLATE, 'r', encoding='utf-8') as f:
+            shell = Template(f.read())
+        _write_atomic(output_file, shell.substitute(
+            title=html.escape(self.title),
+            subtitle=html.escape(self.subtitle),
+            data_file=html.escape(os.path.basename(data_file)),
+        ))
+        return data_file
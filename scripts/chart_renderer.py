@@ -0,0 +1,503 @@
+"""
+API Compare Chart renderer
+Builds API_Compare_Chart.html from structured product data
+(json-data/api_compare_chart.json) through compiled templates instead of
+regex-patching the finished HTML. Each product card is rendered once and
+cached with a digest of its data; a re-render only rebuilds the cards whose
+data (or the templates) changed, and the page is written in one pass - so the
+markup is always balanced and no "fix nesting" step is ever needed.
+
+To change the chart, edit the product data (or write a script that does) and
+re-render. The page shell - styles, header, pricing summary and gallery
+script - lives in templates/api_compare_chart.html.
+
+Usage:
+    python chart_renderer.py                 # render the chart from the data file
+    python chart_renderer.py --import-chart  # rebuild the data file and shell from the current chart
+"""
+
+import os
+import sys
+import json
+import html
+import hashlib
+from string import Template
+from html.parser import HTMLParser
+
+from master_list import REPO_ROOT
+
+CHART_HTML = os.path.join(REPO_ROOT, 'API_Compare_Chart.html')
+CHART_DATA = os.path.join(REPO_ROOT, 'json-data', 'api_compare_chart.json')
+SHELL_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'templates', 'api_compare_chart.html')
+FRAGMENT_CACHE = os.path.join(REPO_ROOT, '.cache', 'chart-fragments.json')
+
+# Columns in display order: provider key -> header label (a winner gets a 🏆 prefix)
+PROVIDERS = {
+    'barcode-lookup': 'Barcode Lookup API',
+    'apify': 'Apify EAN/GTIN',
+    'upcitemdb': 'UPCitemdb',
+    'go-upc': 'Go-UPC API',
+}
+
+PRODUCT_META = Template('''                    <span>Size: $size</span>''')
+
+PRODUCT_CARD = Template('''        <!-- Product $row: $comment -->
+        <div class="product-card">
+            <div class="row-number">$row</div>
+            <div class="product-card-content">
+            <div class="product-header">
+                <div class="product-title">$row. $title</div>
+                <div class="product-meta">
+$meta
+                </div>
+            </div>
+
+            <div class="upc-info-box">
+                <h4>📊 UPC/EAN:</h4> <span class="upc-display">UPC-A: <strong>$upc</strong> | EAN-13: <strong>$ean13</strong> | API Used: <strong style="color: #1976d2;">$api_upc</strong></span>
+            </div>
+
+            <div class="image-comparison">
+$columns
+            </div>
+            </div>
+        </div>
+''')
+
+API_NAME = {
+    'barcode-lookup': Template('''                    <div class="api-name barcode-lookup-color">$label</div>'''),
+    'apify': Template('''                    <div class="api-name apify-color">$label</div>'''),
+    'upcitemdb': Template('''                    <div class="api-name upcitemdb-color">$label</div>'''),
+    'go-upc': Template('''                    <div class="api-name" style="background: linear-gradient(135deg, #757575 0%, #9e9e9e 100%); color: white; padding: 8px; border-radius: 5px; font-weight: bold; margin-bottom: 10px;">$label</div>'''),
+}
+
+COLUMN = Template('''                <div class="api-column $provider">
+$name
+$body
+                </div>''')
+
+NOT_FOUND = Template('''                    <div class="not-found">
+                        ✗ Not Found<br>
+                        <small>$message</small>
+                    </div>''')
+
+NO_IMAGES = Template('''                    <div class="not-found" style="padding: 40px;">
+                        ✓ Found<br>
+                        <div style="margin-top: 10px;">📸 0 images available</div>
+                        <small style="display: block; margin-top: 10px;">No images for this product</small>
+                    </div>''')
+
+TITLE = Template('''                    <div class="api-title">$title</div>''')
+
+WRONG_TITLE = Template('''                    <div class="api-title" style="background: #ffebee; padding: 10px; border-left: 4px solid #f44336; margin-bottom: 10px;">
+                        ⚠️ INCORRECT DATA: $title
+                        <div style="font-size: 0.85em; color: #d32f2f; margin-top: 5px;">$warning</div>
+                    </div>''')
+
+IMAGE = Template('''                    <img src="$src" alt="Product" class="product-image"$extra>''')
+
+GALLERY_IMAGE = Template('''                    <img id="img-$gallery" src="$src" alt="Product" class="product-image"$extra>''')
+
+IMAGE_INFO = Template('''                    <div class="image-info">
+$lines
+                    </div>''')
+
+GALLERY_NAV = Template('''                    <div class="image-nav-buttons">
+                        <button id="prev-$gallery" class="image-nav-btn" onclick="navigateImage($row, '$provider', -1)">◀ Previous</button>
+                        <span id="counter-$gallery" class="image-counter">1 / $count</span>
+                        <button id="next-$gallery" class="image-nav-btn" onclick="navigateImage($row, '$provider', 1)">Next ▶</button>
+                    </div>''')
+
+DETAILS = Template('''                    <div class="product-details">
+                        <h4>$heading</h4>
+$rows
+                    </div>''')
+
+DETAIL_ROW = Template('''                        <div class="detail-row"$extra><span class="detail-label">$label:</span> <span class="detail-value">$value</span></div>''')
+
+DESCRIPTION = Template('''                        <div class="description-text"$extra>$text</div>''')
+
+GALLERY_SCRIPT = Template('''        imageGalleries['$gallery'] = {'currentIndex': 0, 'images': $images};''')
+
+WRONG_STYLE = ' style="color: #d32f2f;"'
+WRONG_IMAGE_STYLE = ' style="opacity: 0.5; border: 3px solid #f44336;"'
+
+_TEMPLATES = (PRODUCT_META, PRODUCT_CARD, COLUMN, NOT_FOUND, NO_IMAGES, TITLE, WRONG_TITLE, IMAGE,
+              GALLERY_IMAGE, IMAGE_INFO, GALLERY_NAV, DETAILS, DETAIL_ROW, DESCRIPTION,
+              GALLERY_SCRIPT, *API_NAME.values())
+# Cached fragments are only reused while the templates are unchanged
+TEMPLATE_DIGEST = hashlib.sha1(
+    ''.join(t.template for t in _TEMPLATES).encode('utf-8')).hexdigest()
+
+
+def _text(value):
+    return html.escape(str(value), quote=False)
+
+
+def _attr(value):
+    return html.escape(str(value), quote=True)
+
+
+def _image_info_line(text, wrong):
+    if text.startswith('📸'):
+        return f'                        <div class="image-count" style="margin-top: 8px;">{_text(text)}</div>'
+    style = 'margin-top: 5px; color: #f44336;' if wrong else 'margin-top: 5px;'
+    return f'                        <div style="{style}">{_text(text)}</div>'
+
+
+def render_column(row, column):
+    """HTML for one provider's column of a product card"""
+    provider = column['provider']
+    label = ('🏆 ' if column.get('winner') else '') + PROVIDERS.get(provider, provider)
+    name = API_NAME.get(provider, API_NAME['upcitemdb']).substitute(label=_text(label))
+    if not column.get('found', True):
+        body = NOT_FOUND.substitute(message=_text(column.get('message', '')))
+        return COLUMN.substitute(provider=_attr(provider), name=name, body=body)
+
+    wrong = column.get('wrong_product')
+    parts = []
+    if wrong:
+        parts.append(WRONG_TITLE.substitute(title=_text(column['title']), warning=_text(wrong)))
+    elif column.get('title'):
+        parts.append(TITLE.substitute(title=_text(column['title'])))
+
+    images = column.get('images', [])
+    gallery = f"{row}-{provider}"
+    extra = WRONG_IMAGE_STYLE if wrong else ''
+    if not images:
+        parts.append(NO_IMAGES.substitute())
+    else:
+        image = GALLERY_IMAGE if len(images) > 1 else IMAGE
+        parts.append(image.substitute(src=_attr(images[0]), gallery=gallery, extra=extra))
+        info = column.get('image_info', [])
+        lines = [f'                        <div class="resolution">{_text(info[0])}</div>'] if info else []
+        lines.extend(_image_info_line(text, wrong) for text in info[1:])
+        if len(images) > 1:
+            # Gallery buttons sit between the resolution line and the image count
+            nav = GALLERY_NAV.substitute(gallery=gallery, row=row, provider=provider,
+                                         count=len(images))
+            lines.insert(1 if lines else 0, nav)
+        parts.append(IMAGE_INFO.substitute(lines='\n'.join(lines)))
+
+    rows = [DETAIL_ROW.substitute(label=_text(label), value=_text(value),
+                                  extra=WRONG_STYLE if warn else '')
+            for label, value, warn in ((*d, False) if len(d) == 2 else d
+                                       for d in column.get('details', []))]
+    if column.get('description'):
+        rows.append(DESCRIPTION.substitute(text=_text(column['description']),
+                                           extra=WRONG_STYLE if wrong else ''))
+    if rows:
+        heading = 'Product Details (INCORRECT)' if wrong else 'Product Details'
+        parts.append(DETAILS.substitute(heading=heading, rows='\n'.join(rows)))
+    return COLUMN.substitute(provider=_attr(provider), name=name, body='\n'.join(parts))
+
+
+def render_product(product):
+    """HTML for one product card"""
+    row = product['row']
+    columns = '\n'.join(render_column(row, column) for column in product['columns'])
+    return PRODUCT_CARD.substitute(
+        row=row, comment=_text(product['title']).replace('--', '-'),
+        title=_text(product['title']),
+        meta=PRODUCT_META.substitute(size=_text(product['size'])) if product.get('size') else '',
+        upc=_text(product['upc']), ean13=_text(product.get('ean13', '')),
+        api_upc=_text(product.get('api_upc', product['upc'])), columns=columns)
+
+
+def gallery_lines(product):
+    """imageGalleries entries for the product's multi-image columns"""
+    for column in product['columns']:
+        images = column.get('images', [])
+        if column.get('found', True) and len(images) > 1:
+            yield GALLERY_SCRIPT.substitute(gallery=f"{product['row']}-{column['provider']}",
+                                            images=json.dumps(images))
+
+
+def product_digest(product):
+    canonical = json.dumps(product, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1((TEMPLATE_DIGEST + canonical).encode('utf-8')).hexdigest()
+
+
+class FragmentCache:
+    """Rendered product cards by product key, each with the digest of the data it came from"""
+
+    def __init__(self, path=FRAGMENT_CACHE):
+        self.path = path
+        self.fragments = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.fragments = json.load(f)
+        self.rendered = 0
+        self.reused = 0
+
+    def card(self, product):
+        key = product.get('key') or product['upc']
+        digest = product_digest(product)
+        cached = self.fragments.get(key)
+        if cached and cached[0] == digest:
+            self.reused += 1
+            return cached[1]
+        fragment = render_product(product)
+        self.fragments[key] = [digest, fragment]
+        self.rendered += 1
+        return fragment
+
+    def save(self, keys=None):
+        """Persist the cache, dropping products no longer in the chart"""
+        if not self.path:
+            return
+        if keys is not None:
+            self.fragments = {k: v for k, v in self.fragments.items() if k in keys}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.fragments, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def load_chart_data(path=CHART_DATA):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_chart_data(data, path=CHART_DATA):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def find_column(product, provider):
+    """The product's column for a provider, or None"""
+    for column in product['columns']:
+        if column['provider'] == provider:
+            return column
+    return None
+
+
+def render_chart(data=None, output_file=CHART_HTML, cache=None):
+    """
+    Render the chart, rebuilding only product cards whose data changed
+
+    Returns: (cards rendered, cards reused from the cache)
+    """
+    data = data if data is not None else load_chart_data()
+    cache = cache if cache is not None else FragmentCache()
+    products = data['products']
+    with open(SHELL_TEMPLATE, 'r', encoding='utf-8') as f:
+        shell = Template(f.read())
+
+    cards = '\n'.join(cache.card(product) for product in products)
+    galleries = '\n'.join(line for product in products for line in gallery_lines(product))
+    page = shell.substitute(product_cards=cards, image_galleries=galleries)
+
+    tmp_path = f"{output_file}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    os.replace(tmp_path, output_file)
+    cache.save({product.get('key') or product['upc'] for product in products})
+    return cache.rendered, cache.reused
+
+
+class _ChartImporter(HTMLParser):
+    """
+    One-pass reader of a hand-patched chart into product data
+
+    Content is attached to the most recently opened product card and API
+    column rather than by matching close tags, so stray or missing </div>s
+    in the old file don't matter.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.products = []
+        self.product = None
+        self.column = None
+        self.depth = 0
+        # (field, depth) of the element whose text is being collected
+        self.capture = None
+        self.text = []
+        self.image_info_depth = None
+        self.row_warning = False
+        self.detail_label = ''
+
+    def _capture(self, field):
+        self.capture = (field, self.depth)
+        self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = attrs.get('class', '').split()
+        if tag == 'img':
+            if self.column is not None and 'product-image' in classes:
+                self.column['images'] = [attrs['src']]
+            return
+        if tag == 'br':
+            return
+        self.depth += 1
+
+        if 'product-card' in classes:
+            self.product = {'key': '', 'row': 0, 'title': '', 'size': '', 'upc': '',
+                            'ean13': '', 'api_upc': '', 'columns': []}
+            self.products.append(self.product)
+            self.column = None
+        elif self.product is None:
+            return
+        elif 'api-column' in classes:
+            self.column = {'provider': classes[1] if len(classes) > 1 else ''}
+            self.product['columns'].append(self.column)
+        elif 'product-title' in classes:
+            self._capture('product_title')
+        elif 'product-meta' in classes:
+            self._capture('size')
+        elif 'upc-display' in classes:
+            self._capture('upc_display')
+        elif self.column is None:
+            return
+        elif self.capture and self.capture[0] == 'title':
+            # The warning line inside a wrong-product title
+            self.column['title'] = ''.join(self.text)
+            self._capture('wrong_product')
+        elif 'api-name' in classes:
+            self._capture('api_name')
+        elif 'api-title' in classes:
+            self._capture('title')
+        elif 'not-found' in classes:
+            self._capture('not_found')
+        elif 'image-info' in classes:
+            self.image_info_depth = self.depth
+            self.column['image_info'] = []
+        elif 'image-nav-buttons' in classes:
+            # Rebuilt from the image list on render
+            self._capture('skip')
+        elif self.image_info_depth is not None:
+            if self.capture is None:
+                self._capture('image_info')
+        elif 'detail-row' in classes:
+            self.row_warning = 'color' in attrs.get('style', '')
+        elif 'detail-label' in classes:
+            self._capture('detail_label')
+        elif 'detail-value' in classes:
+            self._capture('detail_value')
+        elif 'description-text' in classes:
+            self._capture('description')
+
+    def handle_endtag(self, tag):
+        if tag in ('img', 'br'):
+            return
+        if self.capture and self.capture[1] == self.depth:
+            self._finish_capture()
+        if self.image_info_depth == self.depth:
+            self.image_info_depth = None
+        self.depth -= 1
+
+    def handle_data(self, data):
+        if self.capture:
+            self.text.append(data)
+
+    def _finish_capture(self):
+        field, depth = self.capture
+        text = ' '.join(''.join(self.text).split())
+        self.capture = None
+        product, column = self.product, self.column
+        if field == 'product_title':
+            number, _, title = text.partition('. ')
+            product['row'] = int(number)
+            product['title'] = title
+        elif field == 'size':
+            product['size'] = text.replace('Size:', '', 1).strip()
+        elif field == 'upc_display':
+            fields = dict(part.split(':', 1) for part in text.split(' | '))
+            product['upc'] = product['key'] = fields.get('UPC-A', '').strip()
+            product['ean13'] = fields.get('EAN-13', '').strip()
+            product['api_upc'] = fields.get('API Used', '').strip()
+        elif field == 'api_name':
+            column['winner'] = text.startswith('🏆')
+        elif field == 'title':
+            column['title'] = text
+        elif field == 'wrong_product':
+            title = ' '.join(column['title'].split())
+            column['title'] = title.replace('⚠️ INCORRECT DATA:', '', 1).strip()
+            column['wrong_product'] = text
+            # Swallow the rest of the title element
+            self.capture = ('title_tail', depth - 1)
+        elif field == 'not_found':
+            if text.startswith('✗'):
+                column['found'] = False
+                column['message'] = text.replace('✗ Not Found', '', 1).strip()
+            else:
+                column['images'] = []
+        elif field == 'image_info':
+            if text:
+                column['image_info'].append(text)
+        elif field == 'detail_label':
+            self.detail_label = text.rstrip(':')
+        elif field == 'detail_value':
+            detail = [self.detail_label, text] + ([True] if self.row_warning else [])
+            column.setdefault('details', []).append(detail)
+        elif field == 'description':
+            column['description'] = text
+
+
+def import_chart(chart_file=CHART_HTML):
+    """
+    Read a chart into product data and a page shell template
+
+    Returns: (data dict, shell template text)
+    """
+    with open(chart_file, 'r', encoding='utf-8') as f:
+        page = f.read()
+    importer = _ChartImporter()
+    importer.feed(page)
+    importer.close()
+
+    products = importer.products
+
+    # Multi-image columns keep every image from the page's gallery script
+    for line in page.splitlines():
+        line = line.strip()
+        if not line.startswith("imageGalleries['"):
+            continue
+        gallery, _, rest = line[len("imageGalleries['"):].partition("']")
+        row, _, provider = gallery.partition('-')
+        images = json.loads(rest[rest.index('['):rest.rindex(']') + 1])
+        for product in products:
+            column = find_column(product, provider) if product['row'] == int(row) else None
+            if column is not None:
+                # The image on display goes first, so the counter's "1 / N" is right
+                shown = column.get('images', [])[:1]
+                column['images'] = shown + [src for src in images if src not in shown]
+
+    # Everything around the product cards becomes the shell
+    first = page.index('<div class="product-card">')
+    first = page.rfind('\n', 0, page.rfind('<!--', 0, first)) + 1
+    # The footer (image quality summary) follows the last card
+    last_end = page.rfind('\n', 0, page.index('<footer>')) + 1
+    head = page[:first]
+    tail = page[last_end:]
+    script_start = tail.index('const imageGalleries = {};') + len('const imageGalleries = {};')
+    script_end = tail.index('// Function to navigate between images')
+    escape = lambda text: text.replace('$', '$$')
+    shell = (escape(head) + '${product_cards}\n' + escape(tail[:script_start])
+             + '\n        \n${image_galleries}\n        \n        '
+             + escape(tail[script_end:]))
+    return {'products': products}, shell
+
+
+def main():
+    if '--import-chart' in sys.argv[1:]:
+        data, shell = import_chart()
+        save_chart_data(data)
+        os.makedirs(os.path.dirname(SHELL_TEMPLATE), exist_ok=True)
+        with open(SHELL_TEMPLATE, 'w', encoding='utf-8') as f:
+            f.write(shell)
+        print(f"Imported {len(data['products'])} products into {CHART_DATA}")
+        print(f"Page shell saved to {SHELL_TEMPLATE}")
+        return
+
+    rendered, reused = render_chart()
+    print(f"Rendered {rendered} product cards, reused {reused} from cache")
+    print(f"Chart saved to {CHART_HTML}")
+
+
+if __name__ == '__main__':
+    main()
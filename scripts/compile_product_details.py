@@ -1,39 +1,9 @@
 import json
 
-# Load all data sources
-with open('ean_test_results.json', 'r') as f:
-    barcode_lookup = json.load(f)
+from product_results import ProductResults
 
-with open('apify_dataset_results.json', 'r') as f:
-    apify_first = json.load(f)
-
-with open('apify_retest_results.json', 'r') as f:
-    apify_second = json.load(f)
-
-with open('upcitemdb_all_images.json', 'r') as f:
-    upcitemdb_data = json.load(f)
-
-with open('upcitemdb_retest_results.json', 'r') as f:
-    upcitemdb_retest = json.load(f)
-
-# Create lookup dictionaries
-barcode_lookup_dict = {}
-for item in barcode_lookup:
-    barcode_lookup_dict[item['ean']] = item
-
-apify_dict = {}
-for item in apify_first + apify_second:
-    apify_dict[item['ean']] = item
-
-# Add retest UPCitemdb data
-for item in upcitemdb_retest:
-    ean = "0" + item['upc']
-    upcitemdb_data[ean] = {
-        'title': item['title'],
-        'brand': item.get('brand', 'N/A'),
-        'images': item['images'],
-        'image_count': item['image_count']
-    }
+# Every provider's latest result comes from the product-results store
+store = ProductResults()
 
 # Products list
 products = [
@@ -49,6 +19,10 @@ products = [
     {"ean": "0824150401162", "name": "POM Wonderful Juice"},
 ]
 
+details = store.products([product['ean'] for product in products],
+                         ('barcode_lookup', 'apify', 'upcitemdb'))
+store.close()
+
 compiled_data = []
 
 for product in products:
@@ -57,9 +31,9 @@ for product in products:
     item = {
         'ean': ean,
         'name': product['name'],
-        'barcode_lookup': barcode_lookup_dict.get(ean),
-        'apify': apify_dict.get(ean),
-        'upcitemdb': upcitemdb_data.get(ean)
+        'barcode_lookup': details[ean].get('barcode_lookup'),
+        'apify': details[ean].get('apify'),
+        'upcitemdb': details[ean].get('upcitemdb')
     }
     
     compiled_data.append(item)
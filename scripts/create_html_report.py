@@ -1,14 +1,17 @@
+import sys
 import csv
 
-def create_html_report():
-    """Create an HTML report with product images"""
-    
-    input_file = 'palmers-barcodes-verified-with-images.csv'
-    output_file = 'Palmers_Verified_Products_with_Images.html'
-    
-    # Read verified products with images
-    products = []
-    
+from catalog_report import CatalogReport
+from report_writer import ReportWriter
+from verification_output import PARTIAL_OUTPUT_INTERVAL
+
+INPUT_FILE = 'palmers-barcodes-verified-with-images.csv'
+OUTPUT_FILE = 'Palmers_Verified_Products_with_Images.html'
+CATALOG_FILE = 'Palmers_Verified_Products_catalog.html'
+
+
+def iter_verified_products(input_file=INPUT_FILE):
+    """Verified (YES) products from the verification CSV, one at a time"""
     with open(input_file, 'r', encoding='utf-8') as f:
         reader = csv.reader(f)
         header = next(reader)
@@ -25,7 +28,7 @@ def create_html_report():
                 size = row[7] if len(row) > 7 else ''
                 price = row[9] if len(row) > 9 else ''
                 
-                products.append({
+                yield {
                     'upc': upc,
                     'dept': dept,
                     'item_name': item_name,
@@ -34,10 +37,34 @@ def create_html_report():
                     'price': price,
                     'image_url': image_url,
                     'source': source
-                })
+                }
+
+
+def read_verified_products(input_file=INPUT_FILE):
+    """Verified (YES) products from the verification CSV"""
+    return list(iter_verified_products(input_file))
+
+
+def create_catalog_report(input_file=INPUT_FILE, output_file=CATALOG_FILE):
+    """
+    Catalog-scale version of the report: a JSON data file plus a small HTML
+    shell with virtualized scrolling, lazy images and search/filters
+    """
+    products = read_verified_products(input_file)
+    catalog = CatalogReport("Palmer's Verified Products",
+                            'UPC Database Verification Report with Product Images')
+    for product in products:
+        catalog.add(product['upc'], product['item_name'], product['dept'], product['size'],
+                    product['price'], [(product['source'], product['db_product'], product['image_url'])])
+    data_file = catalog.write(output_file)
     
-    # Create HTML
-    html = f"""<!DOCTYPE html>
+    print(f"Catalog report created: {output_file}")
+    print(f"Data file: {data_file} ({len(products)} products)")
+
+
+def report_header(total='…', with_images='…'):
+    """Page head, styles and header; the stats are filled in again by the footer"""
+    return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -235,11 +262,11 @@ def create_html_report():
             <div class="stats">
                 <div class="stat-box">
                     <div>Total Verified</div>
-                    <span>{len(products)}</span>
+                    <span id="total-verified">{total}</span>
                 </div>
                 <div class="stat-box">
                     <div>Products with Images</div>
-                    <span>{len([p for p in products if p['image_url']])}</span>
+                    <span id="total-with-images">{with_images}</span>
                 </div>
                 <div class="stat-box">
                     <div>Data Sources</div>
@@ -250,18 +277,19 @@ def create_html_report():
         
         <div class="products-grid">
 """
+
+
+def product_card(product):
+    """One product's card"""
+    image_html = ''
+    if product['image_url']:
+        image_html = f'<img src="{product["image_url"]}" alt="{product["item_name"]}" class="product-image">'
+    else:
+        image_html = '<div class="no-image">No Image Available</div>'
     
-    # Add product cards
-    for product in products:
-        image_html = ''
-        if product['image_url']:
-            image_html = f'<img src="{product["image_url"]}" alt="{product["item_name"]}" class="product-image">'
-        else:
-            image_html = '<div class="no-image">No Image Available</div>'
-        
-        source_class = 'source-' + product['source'].lower().replace(' ', '')
-        
-        html += f"""
+    source_class = 'source-' + product['source'].lower().replace(' ', '')
+    
+    return f"""
             <div class="product-card">
                 {image_html}
                 <div class="product-info">
@@ -289,8 +317,12 @@ def create_html_report():
                 </div>
             </div>
 """
-    
-    html += """
+
+
+
+def report_footer(total, with_images):
+    """Closing markup; also sets the header stats, which a streamed report only knows at the end"""
+    return f"""
         </div>
         
         <footer>
@@ -299,19 +331,52 @@ def create_html_report():
             <p>Palmer's Barcode Master List - 500 Sample Verification</p>
         </footer>
     </div>
+    <script>
+        document.getElementById('total-verified').textContent = '{total}';
+        document.getElementById('total-with-images').textContent = '{with_images}';
+    </script>
 </body>
 </html>
 """
+
+
+def create_html_report(products=None, output_file=OUTPUT_FILE, partial_interval=PARTIAL_OUTPUT_INTERVAL):
+    """
+    Create an HTML report with product images
+
+    products: product dicts (as from read_verified_products), or any iterable
+    yielding them while a verification run is still going - the cards are
+    streamed to disk, and a complete partial report is published every
+    partial_interval seconds
+    """
+    if products is None:
+        products = read_verified_products(INPUT_FILE)
+    counts = {'total': 0, 'with_images': 0}
+    if isinstance(products, list):
+        header = report_header(len(products), len([p for p in products if p['image_url']]))
+    else:
+        header = report_header()
+    
+    def footer():
+        return report_footer(counts['total'], counts['with_images'])
     
-    # Write HTML file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html)
+    with ReportWriter(output_file, footer, partial_interval) as report:
+        report.write(header)
+        for product in products:
+            report.write(product_card(product))
+            counts['total'] += 1
+            counts['with_images'] += bool(product['image_url'])
+            report.checkpoint()
     
     print(f"HTML report created: {output_file}")
-    print(f"Total products: {len(products)}")
-    print(f"Products with images: {len([p for p in products if p['image_url']])}")
+    print(f"Total products: {counts['total']}")
+    print(f"Products with images: {counts['with_images']}")
     print(f"\nOpen the file in your web browser to view!")
 
 if __name__ == '__main__':
-    create_html_report()
+    # --catalog: data file + virtualized shell instead of one inline document
+    if '--catalog' in sys.argv[1:]:
+        create_catalog_report()
+    else:
+        create_html_report()
 
@@ -1,61 +1,14 @@
+import sys
 import json
 
-# Load all the test results
-print("Loading test results...")
-
-# Barcode Lookup results (from our original test)
-barcode_lookup_data = {
-    "0711381332580": {"title": "Stonewall Kitchen Maple Brown Butter Waffle Cookie", "image": "https://images.barcodelookup.com/25514/255140441-1.jpg"},
-    "0849455000032": {"title": "Tumaro's 8\" Carb Wise Multi Grain Wraps", "image": "https://images.barcodelookup.com/3801/38010513-1.jpg"},
-    "0858183005059": {"title": "Lillies's Q Ivory BBQ Sauce", "image": "https://images.barcodelookup.com/3799/37998412-1.jpg"},
-    "0820581153908": {"title": "Bella Maria Spanish Cocktail Mix 3.5oz", "image": "https://images.barcodelookup.com/9061/90616775-1.jpg"},
-    "0819046000420": {"title": "InkaCrops Giant Corn Chile Picante 4 Oz", "image": "https://images.barcodelookup.com/1840/18403558-1.jpg"},
-    "0818617022571": {"title": "KHCH00353688 2 Fl Oz Immunity Rebound Shot Juice", "image": "https://images.barcodelookup.com/19808/198086595-1.jpg"},
-    "0186011000182": {"title": "Stella & Chewy's Freeze Dried Raw Dinner Patties", "image": "https://images.barcodelookup.com/1032/10320818-1.jpg"},
-    "0312547171670": {"title": "Benadryl Itch Relief Cream, Topical Analgesic, 1 Oz", "image": "https://images.barcodelookup.com/1502/15022259-1.jpg"},
-    "0852466006016": {"title": "Simply Gum Mint Natural Chewing Gum", "image": "https://images.barcodelookup.com/1033/10330920-1.jpg"},
-    "0824150401162": {"title": "POM Wonderful 100% Pomegranate Juice 16 Ounce", "image": "https://images.barcodelookup.com/2974/29742076-1.jpg"},
-}
-
-# Load Apify results
-with open('apify_dataset_results.json', 'r') as f:
-    apify_first = json.load(f)
-
-with open('apify_retest_results.json', 'r') as f:
-    apify_second = json.load(f)
-
-apify_data = {}
-for item in apify_first + apify_second:
-    ean = item['ean']
-    apify_data[ean] = {
-        'title': item['title'],
-        'image': item['image_url'],
-        'width': item['width'],
-        'height': item['height']
-    }
-
-# UPCitemdb data - we need to compile this
-# First 5 from original test
-upcitemdb_data = {
-    "0849455000032": {"title": "MULTI-GRAIN 8 LOW-IN-CARB WRAPS", "images": 4},
-    "0858183005059": {"title": "IVORY TRADITIONAL ALABAMA STYLE BARBECUE SAUCE", "images": 2},
-    "0820581153908": {"title": "SPANISH COCKTAIL MIX", "images": 0},
-    "0819046000420": {"title": "ROASTED GIANT CORN, CHILE PICANTE", "images": 8},
-    "0818617022571": {"title": "Suja Immunity Rebound Juice Shot", "images": 3},
-}
+from catalog_report import CatalogReport
+from product_results import ProductResults
+from master_list import load_master_list
 
-# Load retest results
-with open('upcitemdb_retest_results.json', 'r') as f:
-    upcitemdb_retest = json.load(f)
+print("Loading test results...")
 
-for item in upcitemdb_retest:
-    upc = item['upc']
-    ean = "0" + upc
-    if item['found']:
-        upcitemdb_data[ean] = {
-            'title': item['title'],
-            'images': item['image_count']
-        }
+# Latest results per provider come from the product-results store
+store = ProductResults()
 
 # Product list
 products = [
@@ -73,18 +26,44 @@ products = [
 
 print("Creating comparison data...")
 
+details = store.products([product['ean'] for product in products],
+                         ('barcode_lookup', 'apify', 'upcitemdb'))
+store.close()
+
+def barcode_lookup_summary(result):
+    if not result or not result.get('found'):
+        return None
+    images = result.get('images') or []
+    return {'title': result['title'], 'image': images[0] if images else ''}
+
+def apify_summary(result):
+    if not result:
+        return None
+    return {
+        'title': result['title'],
+        'image': result['image_url'],
+        'width': result['width'],
+        'height': result['height']
+    }
+
+def upcitemdb_summary(result):
+    if not result or not result.get('found', True):
+        return None
+    return {'title': result['title'], 'images': result['image_count']}
+
 comparison_data = []
 for i, product in enumerate(products, 1):
     ean = product['ean']
+    results = details[ean]
     
     item = {
         'number': i,
         'ean': ean,
         'name': product['name'],
         'size': product['size'],
-        'barcode_lookup': barcode_lookup_data.get(ean),
-        'apify': apify_data.get(ean),
-        'upcitemdb': upcitemdb_data.get(ean)
+        'barcode_lookup': barcode_lookup_summary(results.get('barcode_lookup')),
+        'apify': apify_summary(results.get('apify')),
+        'upcitemdb': upcitemdb_summary(results.get('upcitemdb'))
     }
     
     comparison_data.append(item)
@@ -101,3 +80,22 @@ print(f"  Barcode Lookup: {sum(1 for item in comparison_data if item['barcode_lo
 print(f"  Apify: {sum(1 for item in comparison_data if item['apify'])}/10 with images")
 print(f"  UPCitemdb: {sum(1 for item in comparison_data if item['upcitemdb'])}/10 with data")
 
+# --catalog: also write the comparison as a catalog report (data file + virtualized shell)
+if '--catalog' in sys.argv[1:]:
+    master = load_master_list()
+    catalog = CatalogReport('API Image Comparison', 'Barcode Lookup vs Apify vs UPCitemdb')
+    for item in comparison_data:
+        i = master.find(item['ean'])
+        department = master.value('department', i) if i is not None else ''
+        results = []
+        if item['barcode_lookup']:
+            results.append(('Barcode Lookup', item['barcode_lookup']['title'], item['barcode_lookup']['image']))
+        if item['apify']:
+            results.append(('Apify', item['apify']['title'], item['apify']['image']))
+        if item['upcitemdb']:
+            results.append(('UPCitemdb', item['upcitemdb']['title'], ''))
+        catalog.add(item['ean'], item['name'], department, item['size'], '', results)
+    data_file = catalog.write('API_Image_Comparison_catalog.html')
+    print()
+    print("Catalog report created: API_Image_Comparison_catalog.html")
+    print(f"Data file: {data_file}")
@@ -0,0 +1,431 @@
+"""
+Department classifier for product names
+Multinomial naive Bayes over hashed word + character-trigram features,
+trained on the master list's Item Name -> Department Name. Used by the API
+validator to flag wrong-category responses (a cable returned for a yogurt)
+across every department instead of two hand-written keyword lists.
+
+Which departments count as "the same kind of product" is learned too: a
+held-out split of the master list shows which departments the model confuses
+(GROCERY vs SPECIALTY FOODS, say), and only a prediction outside the
+master item's department and its confusable neighbours is a mismatch.
+
+The master list has no department for cables, TVs or motor oil, so such a
+title cannot be confidently predicted anywhere - its words were simply never
+seen and the posterior falls back towards the prior. The model therefore also
+keeps which departments use each word, and a title made up mostly of words the
+expected department and its neighbours have never used is a mismatch too.
+
+The model ships next to the master list as a small zlib-compressed sparse
+count table (the n-gram counts per department) plus the word -> departments
+table, and loads in milliseconds;
+it is retrained automatically when the master list changes.
+
+Usage: python department_classifier.py ["API product title" ...]
+    Retrains and saves the model, prints held-out accuracy, runs the
+    mismatch regression checks, and classifies any titles given
+"""
+
+import os
+import sys
+import json
+import math
+import zlib
+import random
+import threading
+from array import array
+from itertools import accumulate
+
+from master_list import MASTER_LIST_CSV, load_master_list
+from name_matcher import features, tokenize
+
+MODEL_PATH = os.path.splitext(MASTER_LIST_CSV)[0] + '.departments.model'
+MODEL_MAGIC = b'PALMERS-DEPARTMENT-CLASSIFIER'
+MODEL_VERSION = 2
+
+HASH_BITS = 17
+ALPHA = 0.1
+# Departments with fewer named items than this are not learned
+MIN_DEPARTMENT_ITEMS = 20
+# A department predicted for this share of another's held-out items is its neighbour
+CONFUSABLE_RATE = 0.05
+HOLDOUT_SHARE = 0.2
+# Candidate softmax temperatures; hashed trigrams overlap, so raw naive Bayes
+# posteriors are far too sure of themselves and are tempered on held-out rows
+TEMPERATURES = (1, 1.5, 2, 3, 4, 5, 6, 7, 8, 10, 12, 16)
+# Flag a mismatch only when the title's probability of being in the expected
+# department (or a neighbour) falls below this ...
+MISMATCH_PROBABILITY = 0.02
+# ... and enough of its n-grams were seen in training to judge it at all
+MIN_KNOWN_FEATURES = 4
+# A title of at least MIN_CHECKED_WORDS words of which no more than this share
+# were ever used by the expected department or its neighbours is a mismatch,
+# unless the model still gives that department most of the probability
+UNFAMILIAR_WORD_SHARE = 0.5
+UNFAMILIAR_PROBABILITY = 0.5
+MIN_CHECKED_WORDS = 2
+# Words that say nothing about the department
+STOPWORDS = frozenset(['a', 'an', 'and', 'by', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with'])
+
+# (API title, expected department, is a mismatch) - titles from reviewed
+# validation runs; main() fails if the model gets any of them wrong
+REGRESSION_CASES = [
+    ('USB charging cable 6ft', '017 SPECIALTY FOODS', True),
+    ('HDMI Cable Adapter for Computer', '017 SPECIALTY FOODS', True),
+    ('Ethernet network adapter', '017 SPECIALTY FOODS', True),
+    ('USB charging cable 6ft', '001 GROCERY', True),
+    ('HDMI Cable Adapter for Computer', '001 GROCERY', True),
+    ('Ethernet network adapter', '012 SODA', True),
+    ('USB charging cable 6ft', '020 CANDY/GUM', True),
+    ('Samsung TV', '011 BEER', True),
+    ('Samsung TV', '011 Beer', True),
+    ('Motor oil', '006 DAIRY', True),
+    ('Rain Cover For Camera', '020 CANDY/GUM', True),
+    ('100 X RJ45 Coupler CAT5 CAT6 5E 8P8C Network Ethernet Connector Adapter Joiner', '006 DAIRY', True),
+    ('Stonewall Kitchen Maple Brown Butter Waffle Cookie', '017 SPECIALTY FOODS', False),
+    ('Chobani Greek Yogurt Coffee', '006 DAIRY', False),
+    ('Hammonds Cherry Lollipop', '020 CANDY/GUM', False),
+    ('Back To Nature Cracker Mit Käsegeschmack, Gentechnikfrei, Hergestellt Aus Weizenmehl, '
+     'Vegan, Leckere Snacks, Cheezy Square, 142 Ml', '001 GROCERY', False),
+    ('Micro To USB Data Cable', '002 TAXABLE GROCERY', False),
+    ('Samsung TV', 'Department Name', False),
+]
+
+
+def _bucket(feature, mask=(1 << HASH_BITS) - 1):
+    return zlib.crc32(feature.encode('utf-8')) & mask
+
+
+def normalize_department(department):
+    """
+    Canonical department label: '011 Beer' and '011 BEER' are the same department
+
+    Department codes start with a number; anything else ('', 'Department Name',
+    'New item Insert') is a stray header or note and normalizes to ''
+    """
+    department = department.strip().upper()
+    return department if department[:3].isdigit() else ''
+
+
+def _words(text):
+    """The words of a title that can say which department it belongs to"""
+    return [token for token in tokenize(text)
+            if token.isalpha() and len(token) > 1 and token not in STOPWORDS]
+
+
+def _training_rows(master):
+    names = master.column('name')
+    departments = master.column('department')
+    counts = {}
+    rows = []
+    for name, department in zip(names, departments):
+        department = normalize_department(department)
+        if name.strip() and department:
+            rows.append((name, department))
+            counts[department] = counts.get(department, 0) + 1
+    return [(name, department) for name, department in rows
+            if counts[department] >= MIN_DEPARTMENT_ITEMS]
+
+
+def _softmax(scores, temperature):
+    top = max(scores)
+    weights = [math.exp((s - top) / temperature) for s in scores]
+    total = sum(weights)
+    return [w / total for w in weights]
+
+
+class DepartmentClassifier:
+    """Naive Bayes over hashed n-grams; counts are stored sparse per hash bucket"""
+
+    def __init__(self, classes, class_counts, feature_totals, bucket_sizes, entry_classes,
+                 entry_counts, word_classes, neighbours=None, temperature=1.0, source_sha1=''):
+        self.classes = list(classes)
+        self.class_counts = list(class_counts)
+        self.feature_totals = list(feature_totals)
+        self.bucket_sizes = bucket_sizes
+        self.entry_classes = entry_classes
+        self.entry_counts = entry_counts
+        # word -> bitmask of the classes whose items use it
+        self.word_classes = word_classes
+        self.bucket_offsets = array('I', accumulate(bucket_sizes, initial=0))
+        self.neighbours = neighbours or {c: [c] for c in self.classes}
+        self.temperature = temperature
+        self.source_sha1 = source_sha1
+
+        documents = sum(self.class_counts)
+        buckets = len(bucket_sizes)
+        self._log_prior = [math.log(n / documents) for n in self.class_counts]
+        # log P(unseen feature | class); seen features add log1p(count / ALPHA)
+        self._log_unseen = [math.log(ALPHA / (total + ALPHA * buckets))
+                            for total in self.feature_totals]
+        self._class_index = {c: i for i, c in enumerate(self.classes)}
+
+    @classmethod
+    def train(cls, rows, source_sha1=''):
+        """rows: iterable of (item name, department)"""
+        classes = sorted({department for _, department in rows})
+        class_index = {c: i for i, c in enumerate(classes)}
+        class_counts = [0] * len(classes)
+        feature_totals = [0] * len(classes)
+        counts = {}
+        word_classes = {}
+        for name, department in rows:
+            c = class_index[department]
+            class_counts[c] += 1
+            for word in _words(name):
+                word_classes[word] = word_classes.get(word, 0) | 1 << c
+            for feature, n in features(name).items():
+                bucket_counts = counts.setdefault(_bucket(feature), {})
+                bucket_counts[c] = bucket_counts.get(c, 0) + n
+                feature_totals[c] += n
+
+        bucket_sizes = bytearray(1 << HASH_BITS)
+        entry_classes = bytearray()
+        entry_counts = array('H')
+        for bucket in sorted(counts):
+            bucket_sizes[bucket] = len(counts[bucket])
+            for c, n in sorted(counts[bucket].items()):
+                entry_classes.append(c)
+                entry_counts.append(min(n, 0xFFFF))
+        return cls(classes, class_counts, feature_totals, bucket_sizes, entry_classes,
+                   entry_counts, word_classes, source_sha1=source_sha1)
+
+    def log_scores(self, text):
+        """(per-class log joint scores, number of the text's features seen in training)"""
+        scores = list(self._log_prior)
+        offsets, entry_classes, entry_counts = self.bucket_offsets, self.entry_classes, self.entry_counts
+        log_unseen = self._log_unseen
+        known = 0
+        total = 0
+        for feature, n in features(text).items():
+            total += n
+            bucket = _bucket(feature)
+            start, end = offsets[bucket], offsets[bucket + 1]
+            if start == end:
+                continue
+            known += 1
+            for k in range(start, end):
+                scores[entry_classes[k]] += n * math.log1p(entry_counts[k] / ALPHA)
+        for c in range(len(scores)):
+            scores[c] += total * log_unseen[c]
+        return scores, known
+
+    def posterior(self, text):
+        """(per-class probabilities in classes order, features known to the model)"""
+        scores, known = self.log_scores(text)
+        return _softmax(scores, self.temperature), known
+
+    def probabilities(self, text):
+        """{department: posterior probability} for a product name"""
+        return dict(zip(self.classes, self.posterior(text)[0]))
+
+    def predict(self, text):
+        """(most likely department, its probability)"""
+        probabilities, _ = self.posterior(text)
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        return self.classes[best], probabilities[best]
+
+    def expected_probability(self, posterior, department):
+        """
+        Probability mass a posterior() puts on department and its neighbours
+
+        Returns None when the department was not learned
+        """
+        department = normalize_department(department)
+        if department not in self._class_index:
+            return None
+        probabilities, _ = posterior
+        return sum(probabilities[self._class_index[c]] for c in self.neighbours[department])
+
+    def known_word_share(self, text, department):
+        """
+        (share of the text's words used by department or its neighbours, words checked)
+
+        Returns (None, 0) when the text has no words to check or the department
+        was not learned
+        """
+        department = normalize_department(department)
+        words = _words(text)
+        if not words or department not in self._class_index:
+            return None, 0
+        mask = 0
+        for c in self.neighbours[department]:
+            mask |= 1 << self._class_index[c]
+        get = self.word_classes.get
+        known = sum(1 for word in words if get(word, 0) & mask)
+        return known / len(words), len(words)
+
+    def is_mismatch(self, text, department, posterior=None):
+        """
+        True when text belongs outside department and its neighbours: either the
+        model confidently places it elsewhere, or it is mostly words the
+        department has never used and the model does not place it there either
+
+        Pass posterior (from posterior(text)) to reuse one computed earlier
+        """
+        posterior = posterior or self.posterior(text)
+        probability = self.expected_probability(posterior, department)
+        if probability is None:
+            return False
+        if posterior[1] >= MIN_KNOWN_FEATURES and probability < MISMATCH_PROBABILITY:
+            return True
+        share, words = self.known_word_share(text, department)
+        return (words >= MIN_CHECKED_WORDS and share <= UNFAMILIAR_WORD_SHARE
+                and probability < UNFAMILIAR_PROBABILITY)
+
+    def learn_from_holdout(self, holdout):
+        """
+        Fit the posterior temperature and the department neighbours on rows
+        the model was not trained on
+
+        Departments confused for each other become neighbours.
+        Returns: confusion counts {department: {predicted: n}}
+        """
+        scored = [(self.log_scores(name)[0], self._class_index[department])
+                  for name, department in holdout]
+
+        def log_loss(temperature):
+            return -sum(math.log(max(_softmax(scores, temperature)[truth], 1e-300))
+                        for scores, truth in scored)
+        self.temperature = min(TEMPERATURES, key=log_loss)
+
+        confusion = {c: {} for c in self.classes}
+        for (scores, _), (_, department) in zip(scored, holdout):
+            predicted = self.classes[max(range(len(scores)), key=scores.__getitem__)]
+            confusion[department][predicted] = confusion[department].get(predicted, 0) + 1
+        neighbours = {c: {c} for c in self.classes}
+        for department, row in confusion.items():
+            total = sum(row.values())
+            for predicted, n in row.items():
+                if total and n / total >= CONFUSABLE_RATE:
+                    neighbours[department].add(predicted)
+                    neighbours[predicted].add(department)
+        self.neighbours = {c: sorted(n) for c, n in neighbours.items()}
+        return confusion
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, path=MODEL_PATH):
+        vocabulary = '\n'.join(f"{word}\t{mask}" for word, mask
+                               in sorted(self.word_classes.items())).encode('utf-8')
+        body = (bytes(self.bucket_sizes) + bytes(self.entry_classes)
+                + self.entry_counts.tobytes() + vocabulary)
+        header = {
+            'version': MODEL_VERSION,
+            'sha1': self.source_sha1,
+            'hash_bits': HASH_BITS,
+            'alpha': ALPHA,
+            'classes': self.classes,
+            'class_counts': self.class_counts,
+            'feature_totals': self.feature_totals,
+            'entries': len(self.entry_classes),
+            'vocabulary_bytes': len(vocabulary),
+            'neighbours': self.neighbours,
+            'temperature': self.temperature,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MODEL_MAGIC + b'\n' + json.dumps(header).encode() + b'\n')
+            f.write(zlib.compress(body, 9))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        """Saved model, or None if missing or from an incompatible version"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if not data.startswith(MODEL_MAGIC + b'\n'):
+            return None
+        header_end = data.index(b'\n', len(MODEL_MAGIC) + 1)
+        header = json.loads(data[len(MODEL_MAGIC) + 1:header_end])
+        if (header.get('version') != MODEL_VERSION or header['hash_bits'] != HASH_BITS
+                or header['alpha'] != ALPHA):
+            return None
+        body = zlib.decompress(data[header_end + 1:])
+        buckets, entries = 1 << HASH_BITS, header['entries']
+        vocabulary_start = len(body) - header['vocabulary_bytes']
+        entry_counts = array('H')
+        entry_counts.frombytes(body[buckets + entries:vocabulary_start])
+        word_classes = {}
+        for line in body[vocabulary_start:].decode('utf-8').splitlines():
+            word, mask = line.split('\t')
+            word_classes[word] = int(mask)
+        return cls(header['classes'], header['class_counts'], header['feature_totals'],
+                   body[:buckets], body[buckets:buckets + entries], entry_counts, word_classes,
+                   header['neighbours'], header['temperature'], header['sha1'])
+
+
+def train_from_master_list(master=None, seed=0):
+    """
+    Train on the master list, learning department neighbours from a held-out split
+
+    Returns: (classifier, held-out accuracy)
+    """
+    master = master or load_master_list()
+    rows = _training_rows(master)
+    shuffled = list(rows)
+    random.Random(seed).shuffle(shuffled)
+    split = int(len(shuffled) * (1 - HOLDOUT_SHARE))
+    trial = DepartmentClassifier.train(shuffled[:split])
+    confusion = trial.learn_from_holdout(shuffled[split:])
+    correct = sum(row.get(department, 0) for department, row in confusion.items())
+    accuracy = correct / max(len(shuffled) - split, 1)
+
+    classifier = DepartmentClassifier.train(rows, source_sha1=master.sha1)
+    classifier.neighbours = trial.neighbours
+    classifier.temperature = trial.temperature
+    return classifier, accuracy
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_department_classifier():
+    """The shipped model, retrained and saved if the master list has changed"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            master = load_master_list()
+            classifier = DepartmentClassifier.load(MODEL_PATH)
+            if classifier is None or (master.sha1 and classifier.source_sha1 != master.sha1):
+                classifier, _ = train_from_master_list(master)
+                if master.sha1:
+                    classifier.save(MODEL_PATH)
+            _shared = classifier
+        return _shared
+
+
+def regression_failures(classifier):
+    """REGRESSION_CASES the classifier gets wrong, as (title, department, expected)"""
+    return [(title, department, expected) for title, department, expected in REGRESSION_CASES
+            if classifier.is_mismatch(title, department) != expected]
+
+
+def main():
+    classifier, accuracy = train_from_master_list()
+    classifier.save(MODEL_PATH)
+    print(f"Departments: {len(classifier.classes)}")
+    print(f"Held-out accuracy: {accuracy:.1%} (posterior temperature {classifier.temperature:g})")
+    print(f"Model size: {os.path.getsize(MODEL_PATH):,} bytes")
+    print(f"Saved to: {MODEL_PATH}")
+    print()
+    for department in classifier.classes:
+        others = [c for c in classifier.neighbours[department] if c != department]
+        print(f"  {department:<22} neighbours: {', '.join(others) or '-'}")
+    failures = regression_failures(classifier)
+    print(f"\nMismatch regression checks: {len(REGRESSION_CASES) - len(failures)}/{len(REGRESSION_CASES)} passed")
+    for title, department, expected in failures:
+        print(f"  FAILED: {title!r} vs {department} should {'' if expected else 'not '}be a mismatch")
+    for title in sys.argv[1:]:
+        department, probability = classifier.predict(title)
+        print(f"\n{title}\n  -> {department} ({probability:.1%})")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
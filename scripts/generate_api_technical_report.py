@@ -5,11 +5,20 @@ Generate HTML technical report showing API request/response details
 import json
 from datetime import datetime
 
+from report_writer import ReportWriter
+from telemetry import PHASES, TELEMETRY_PATH, Telemetry
+
 # Load the analysis data
 with open('../json-data/api_request_response_analysis.json', 'r', encoding='utf-8') as f:
     analysis_data = json.load(f)
 
-html = f'''<!DOCTYPE html>
+# Latency/payload histograms recorded by the provider layer on real runs
+telemetry = Telemetry.load(TELEMETRY_PATH)
+
+
+def report_header():
+    """Page head, styles and report header"""
+    return f'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -177,6 +186,38 @@ html = f'''<!DOCTYPE html>
             border-left: 4px solid #c62828;
         }}
         
+        .telemetry-table {{
+            width: 100%;
+            border-collapse: collapse;
+            margin-bottom: 15px;
+            font-family: 'Courier New', monospace;
+        }}
+        
+        .telemetry-table th, .telemetry-table td {{
+            padding: 6px 10px;
+            border-bottom: 1px solid #ddd;
+            text-align: right;
+        }}
+        
+        .telemetry-table th:first-child, .telemetry-table td:first-child {{
+            text-align: left;
+        }}
+        
+        .histogram-row {{
+            display: grid;
+            grid-template-columns: 110px 1fr 70px;
+            gap: 10px;
+            align-items: center;
+            font-size: 0.85em;
+            margin-bottom: 3px;
+        }}
+        
+        .histogram-bar {{
+            background: #667eea;
+            height: 14px;
+            border-radius: 3px;
+        }}
+        
         .success {{
             background: #e8f5e9;
             color: #2e7d32;
@@ -196,11 +237,62 @@ html = f'''<!DOCTYPE html>
         </header>
 '''
 
-for product_result in analysis_data:
-    product = product_result['product']
-    apis = product_result['apis']
+
+def telemetry_sections(telemetry):
+    """Measured latency histograms per provider, one piece at a time"""
+    # Measured distributions over every recorded call, ahead of the per-product samples
+    if telemetry.providers:
+        yield '''
+        <div class="product-section">
+            <div class="product-header">
+                <div class="product-title">📈 Measured Latency Distributions</div>
+                <div class="upc-code">Source: ''' + TELEMETRY_PATH + '''</div>
+            </div>
+'''
+        for api_name, row in telemetry.summary().items():
+            total = telemetry.providers[api_name]['total']
+            statuses = ', '.join(f"{code}: {count:,}" for code, count in sorted(row['status'].items()))
+            yield f'''
+            <div class="api-card {api_name.replace('_', '-')}">
+                <div class="api-header">{api_name}</div>
+                <div>
+                    <span class="metric">📨 {row['requests']:,} requests</span>
+                    <span class="metric">🔁 {row['retries']:,} retries</span>
+                    <span class="metric">♻️ {row['reused']:,} reused connections</span>
+                    <span class="metric">📦 ~{row['bytes_p50']:,.0f} bytes median</span>
+                    <span class="metric">📊 {statuses}</span>
+                </div>
+                <div class="section-title">⏱️ PHASE LATENCY (ms)</div>
+                <table class="telemetry-table">
+                    <tr><th>Phase</th><th>p50</th><th>p95</th><th>p99</th></tr>
+'''
+            for phase in PHASES:
+                p50, p95, p99 = row[phase]
+                yield f'''                    <tr><td>{phase.upper()}</td><td>{p50:,.1f}</td><td>{p95:,.1f}</td><td>{p99:,.1f}</td></tr>
+'''
+            yield '''                </table>
+                <div class="section-title">📊 TOTAL TIME HISTOGRAM</div>
+'''
+            largest = max(total.counts) or 1
+            for i, count in enumerate(total.counts):
+                label = f"≤ {total.buckets[i]:g} ms" if i < len(total.buckets) else f"> {total.buckets[-1]:g} ms"
+                yield f'''                <div class="histogram-row"><span>{label}</span><div class="histogram-bar" style="width: {count / largest * 100:.1f}%"></div><span>{count:,}</span></div>
+'''
+            yield '''
+            </div>
+'''
+        yield '''
+        </div>
+'''
+
+
+def product_sections(analysis_data):
+    """Request/response details for each tested product, one piece at a time"""
+    for product_result in analysis_data:
+        product = product_result['product']
+        apis = product_result['apis']
     
-    html += f'''
+        yield f'''
         <div class="product-section">
             <div class="product-header">
                 <div class="product-title">{product['name']}</div>
@@ -208,24 +300,24 @@ for product_result in analysis_data:
             </div>
 '''
     
-    for api_name, api_data in apis.items():
-        api_display_name = {
-            'go_upc': 'Go-UPC API',
-            'upcitemdb': 'UPCitemdb',
-            'barcode_lookup': 'Barcode Lookup API',
-            'apify': 'Apify'
-        }.get(api_name, api_name)
+        for api_name, api_data in apis.items():
+            api_display_name = {
+                'go_upc': 'Go-UPC API',
+                'upcitemdb': 'UPCitemdb',
+                'barcode_lookup': 'Barcode Lookup API',
+                'apify': 'Apify'
+            }.get(api_name, api_name)
         
-        html += f'''
+            yield f'''
             <div class="api-card {api_name.replace('_', '-')}">
                 <div class="api-header">{api_display_name}</div>
 '''
         
-        if api_data['success']:
-            response_time = api_data['response']['response_time_ms']
-            payload_size = api_data['response']['content_length']
+            if api_data['success']:
+                response_time = api_data['response']['response_time_ms']
+                payload_size = api_data['response']['content_length']
             
-            html += f'''
+                yield f'''
                 <div class="success">✅ Successful Response</div>
                 <div>
                     <span class="metric">⏱️ {response_time}ms</span>
@@ -234,9 +326,9 @@ for product_result in analysis_data:
                 </div>
 '''
             
-            # Request Details
-            request = api_data['request']
-            html += '''
+                # Request Details
+                request = api_data['request']
+                yield '''
                 <div class="section-title">📤 REQUEST DETAILS</div>
                 <div class="detail-grid">
                     <div class="detail-label">Method:</div>
@@ -248,23 +340,23 @@ for product_result in analysis_data:
                 </div>
 '''
             
-            # Headers
-            html += '''
+                # Headers
+                yield '''
                 <div class="section-title">📋 REQUEST HEADERS</div>
                 <div class="json-payload">'''
-            html += json.dumps(request['headers'], indent=2)
-            html += '''</div>'''
+                yield json.dumps(request['headers'], indent=2)
+                yield '''</div>'''
             
-            # Response Payload
-            html += '''
+                # Response Payload
+                yield '''
                 <div class="section-title">📥 RESPONSE PAYLOAD</div>
                 <div class="json-payload">'''
-            html += json.dumps(api_data['response']['payload'], indent=2)
-            html += '''</div>'''
+                yield json.dumps(api_data['response']['payload'], indent=2)
+                yield '''</div>'''
             
-        else:
-            # Error case
-            html += f'''
+            else:
+                # Error case
+                yield f'''
                 <div class="error">
                     <strong>❌ Request Failed</strong><br>
                     <div style="margin-top: 10px;">
@@ -274,9 +366,9 @@ for product_result in analysis_data:
                 </div>
 '''
             
-            # Still show request details
-            request = api_data['request']
-            html += '''
+                # Still show request details
+                request = api_data['request']
+                yield '''
                 <div class="section-title">📤 REQUEST DETAILS (Attempted)</div>
                 <div class="detail-grid">
                     <div class="detail-label">Method:</div>
@@ -288,24 +380,28 @@ for product_result in analysis_data:
                 </div>
 '''
         
-        html += '''
+            yield '''
             </div>
 '''
     
-    html += '''
+        yield '''
         </div>
 '''
 
-html += '''
+
+FOOTER = '''
     </div>
 </body>
 </html>
 '''
 
+
 # Write the HTML file
 output_file = '../api-reports/API_Technical_Report.html'
-with open(output_file, 'w', encoding='utf-8') as f:
-    f.write(html)
+with ReportWriter(output_file, footer=FOOTER) as report:
+    report.write(report_header())
+    report.write_all(telemetry_sections(telemetry))
+    report.write_all(product_sections(analysis_data))
 
 print("=" * 80)
 print("HTML TECHNICAL REPORT GENERATED")
@@ -318,5 +414,7 @@ print("  - Request headers")
 print("  - Full response payloads (JSON)")
 print("  - Response times (ms)")
 print("  - Payload sizes (bytes)")
+if telemetry.providers:
+    print("  - Measured DNS/connect/TLS/TTFB/total latency distributions per provider")
 print("\nOpen the file in a browser to view the formatted report!")
 
@@ -1,8 +1,5 @@
-import json
-
-# Load the results
-with open('additional_5_items_results.json', 'r', encoding='utf-8') as f:
-    results = json.load(f)
+from product_results import ProductResults
+from report_writer import write_report
 
 def format_description(desc, max_length=200):
     """Truncate description if too long"""
@@ -61,11 +58,23 @@ product_names = {
     15: "Drumroll Mini Donuts"
 }
 
-html_sections = []
+product_eans = {
+    11: "0753656710990",
+    12: "0742676400592",
+    13: "0810089955197",
+    14: "0818290019592",
+    15: "0850017604032"
+}
+
+# Latest results per provider from the product-results store
+with ProductResults() as store:
+    details = store.products(product_eans.values(), ('barcode_lookup', 'apify', 'upcitemdb'))
 
-for item in results:
+results = [dict(details[ean], number=num, upc=ean[1:], ean=ean) for num, ean in product_eans.items()]
+
+def product_section(item):
+    """HTML for one product card"""
     num = item['number']
-    upc = item['upc']
     ean = item['ean']
     name = product_names.get(num, f"Product {num}")
     
@@ -228,13 +237,19 @@ for item in results:
         </div>
 '''
     
-    html_sections.append(html)
+    return html
+
+
+def product_sections(results):
+    """Product cards one at a time, blank-line separated"""
+    for i, item in enumerate(results):
+        yield ('\n' if i else '') + product_section(item)
 
-# Write all sections
-with open('new_items_html.txt', 'w', encoding='utf-8') as f:
-    f.write('\n'.join(html_sections))
 
-print("Generated HTML for 5 new items")
-print(f"Total sections: {len(html_sections)}")
-print("Saved to new_items_html.txt")
+# Stream the sections to disk as they are generated
+output_file = 'new_items_html.txt'
+section_count = write_report(output_file, product_sections(results))
 
+print(f"Generated HTML for {section_count} new items")
+print(f"Total sections: {section_count}")
+print(f"Saved to {output_file}")
@@ -1,6 +1,9 @@
 import urllib.request
 import json
 
+import http_transport
+from product_results import ingest_file
+
 # Your existing dataset ID
 APIFY_TOKEN = "YOUR_APIFY_API_TOKEN_HERE"  # Replace with your actual token
 DATASET_ID = "iyo0vudLRPaddfFCG"
@@ -17,7 +20,7 @@ try:
     url = f"https://api.apify.com/v2/datasets/{DATASET_ID}/items?token={APIFY_TOKEN}"
     
     req = urllib.request.Request(url, headers={'Accept': 'application/json'})
-    with urllib.request.urlopen(req, timeout=30) as response:
+    with http_transport.urlopen(req, timeout=30) as response:
         results = json.loads(response.read().decode())
         
     print(f"[OK] Retrieved {len(results)} items from dataset")
@@ -26,6 +29,8 @@ try:
     # Save results
     with open('apify_dataset_results.json', 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2)
+    # Record the run in the product-results store
+    ingest_file('apify_dataset_results.json')
     
     print("Results saved to apify_dataset_results.json")
     print()
@@ -1,6 +1,8 @@
 import urllib.request
 import json
 
+import http_transport
+
 # The 5 EAN-13 codes we just generated
 ean_codes = [
     "0711381332580",
@@ -17,7 +19,7 @@ print("Fetching data from Apify dataset...")
 
 try:
     req = urllib.request.Request(api_url, headers={'Accept': 'application/json'})
-    with urllib.request.urlopen(req, timeout=30) as response:
+    with http_transport.urlopen(req, timeout=30) as response:
         data = json.loads(response.read().decode())
         
     print(f"Retrieved {len(data)} items from Apify dataset")
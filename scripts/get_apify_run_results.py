@@ -3,6 +3,9 @@ import json
 import time
 import sys
 
+import http_transport
+from product_results import ingest_file
+
 APIFY_TOKEN = "YOUR_APIFY_API_TOKEN_HERE"  # Replace with your actual token
 
 # Get run ID from command line or from saved file
@@ -38,7 +41,7 @@ elapsed = 0
 while elapsed < max_wait:
     try:
         req = urllib.request.Request(status_url)
-        with urllib.request.urlopen(req, timeout=15) as response:
+        with http_transport.urlopen(req, timeout=15) as response:
             status_data = json.loads(response.read().decode())
             status = status_data['data']['status']
             
@@ -53,12 +56,14 @@ while elapsed < max_wait:
                 dataset_url = f"https://api.apify.com/v2/actor-runs/{run_id}/dataset/items?token={APIFY_TOKEN}"
                 
                 dataset_req = urllib.request.Request(dataset_url)
-                with urllib.request.urlopen(dataset_req, timeout=15) as dataset_response:
+                with http_transport.urlopen(dataset_req, timeout=15) as dataset_response:
                     results = json.loads(dataset_response.read().decode())
                     
                     # Save results
                     with open('apify_retest_results.json', 'w', encoding='utf-8') as f:
                         json.dump(results, f, indent=2)
+                    # Record the run in the product-results store
+                    ingest_file('apify_retest_results.json')
                     
                     print(f"Retrieved {len(results)} results")
                     print("Results saved to apify_retest_results.json")
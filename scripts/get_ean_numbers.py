@@ -1,6 +1,4 @@
-import urllib.request
-import json
-import time
+from lookup_engine import fetch_record
 
 API_KEY = "YOUR_BARCODE_LOOKUP_API_KEY_HERE"  # Replace with your actual key
 
@@ -24,40 +22,30 @@ print("=" * 80)
 print()
 
 for i, upc in enumerate(test_upcs, 1):
-    try:
-        url = f"https://api.barcodelookup.com/v3/products?barcode={upc}&key={API_KEY}"
-        req = urllib.request.Request(url, headers={'Accept': 'application/json'})
+    record = fetch_record('barcode_lookup', upc, key=API_KEY)
+    if record.found:
+        product = record.raw['products'][0]
+        title = product.get('title', 'Unknown Product')
+        barcode_formats = product.get('barcode_formats', 'N/A')
         
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
-            
-            if data.get('products') and len(data['products']) > 0:
-                product = data['products'][0]
-                title = product.get('title', 'Unknown Product')
-                barcode_formats = product.get('barcode_formats', 'N/A')
-                
-                # Extract EAN-13 from barcode_formats
-                ean13 = "Not found"
-                if 'EAN-13' in barcode_formats:
-                    ean13 = barcode_formats.split('EAN-13 ')[1].strip()
-                
-                print(f"{i:2}. UPC: {upc}")
-                print(f"    Product: {title}")
-                print(f"    EAN-13: {ean13}")
-                print(f"    All Formats: {barcode_formats}")
-                print()
-            else:
-                print(f"{i:2}. UPC: {upc}")
-                print(f"    Status: NOT FOUND in database")
-                print(f"    EAN-13: N/A")
-                print()
+        # Extract EAN-13 from barcode_formats
+        ean13 = "Not found"
+        if 'EAN-13' in barcode_formats:
+            ean13 = barcode_formats.split('EAN-13 ')[1].strip()
         
-        if i < len(test_upcs):
-            time.sleep(1)
-            
-    except Exception as e:
         print(f"{i:2}. UPC: {upc}")
-        print(f"    Error: {e}")
+        print(f"    Product: {title}")
+        print(f"    EAN-13: {ean13}")
+        print(f"    All Formats: {barcode_formats}")
+        print()
+    elif record.error == 'Not found':
+        print(f"{i:2}. UPC: {upc}")
+        print(f"    Status: NOT FOUND in database")
+        print(f"    EAN-13: N/A")
+        print()
+    else:
+        print(f"{i:2}. UPC: {upc}")
+        print(f"    Error: {record.error}")
         print()
 
 print("=" * 80)
@@ -1,6 +1,7 @@
-import urllib.request
 import json
-import time
+
+from lookup_engine import fetch_record
+from product_results import ingest_file
 
 # Get UPCitemdb images for products 2-6 (we already have 7-10)
 products_to_fetch = [
@@ -22,33 +23,23 @@ for product in products_to_fetch:
     
     print(f"Fetching {product['name']} (UPC: {upc})...")
     
-    try:
-        url = f"https://api.upcitemdb.com/prod/trial/lookup?upc={upc}"
-        req = urllib.request.Request(url, headers={'Accept': 'application/json'})
-        
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
-            
-            if data.get('items') and len(data['items']) > 0:
-                item = data['items'][0]
-                images = item.get('images', [])
-                upcitemdb_images[ean] = {
-                    'title': item.get('title', 'N/A'),
-                    'images': images,
-                    'image_count': len(images)
-                }
-                print(f"  Found {len(images)} images")
-                if images:
-                    print(f"  First image: {images[0][:60]}...")
-            else:
-                upcitemdb_images[ean] = {'images': [], 'image_count': 0}
-                print(f"  No images found")
-                
-    except Exception as e:
-        print(f"  Error: {e}")
+    record = fetch_record('upcitemdb', upc)
+    if record.found:
+        images = list(record.images)
+        upcitemdb_images[ean] = {
+            'title': record.title or 'N/A',
+            'images': images,
+            'image_count': len(images)
+        }
+        print(f"  Found {len(images)} images")
+        if images:
+            print(f"  First image: {images[0][:60]}...")
+    else:
+        if record.error != 'Not found':
+            print(f"  Error: {record.error}")
+        else:
+            print(f"  No images found")
         upcitemdb_images[ean] = {'images': [], 'image_count': 0}
-    
-    time.sleep(2)  # Rate limiting
 
 # Load retest results (items 7-10)
 with open('upcitemdb_retest_results.json', 'r') as f:
@@ -65,6 +56,8 @@ for item in retest_results:
 # Save all images
 with open('upcitemdb_all_images.json', 'w', encoding='utf-8') as f:
     json.dump(upcitemdb_images, f, indent=2)
+# Record the run in the product-results store
+ingest_file('upcitemdb_all_images.json')
 
 print()
 print("=" * 80)
@@ -0,0 +1,239 @@
+"""
+GTIN check-digit validation and normalization
+Handles UPC-A, UPC-E, EAN-8, EAN-13 and GTIN-14, and regenerates the
+"Valid UPC Format" column of the master list from real check digits instead
+of a length test, so codes that cannot exist are dropped before they cost a
+paid API call.
+
+Usage: python gtin.py [output_csv]
+    Without an output path only the summary is printed.
+"""
+
+import os
+import csv
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MASTER_LIST_CSV = os.path.join(REPO_ROOT, 'palmers-barcodes-master-list-with-upc-check.csv')
+
+# Lengths a stored code can legitimately have, and what we call them
+KINDS = {
+    8: 'EAN-8',
+    12: 'UPC-A',
+    13: 'EAN-13',
+    14: 'GTIN-14',
+}
+
+# Digit char -> value, and digit char -> 3 * value, for the weighted checksum
+_ONE = {str(d): d for d in range(10)}
+_THREE = {str(d): 3 * d for d in range(10)}
+
+
+def to_gtin14(code):
+    """Digits only, left-padded to 14 - a lookup key, not a validity check"""
+    digits = ''.join(ch for ch in str(code) if ch.isdigit())
+    return digits.zfill(14) if digits else ''
+
+
+def check_digit(body):
+    """GS1 mod-10 check digit for the digits before the check digit"""
+    # Weights alternate 3,1,3,... starting from the rightmost body digit
+    total = sum(_THREE[ch] for ch in body[-1::-2]) + sum(_ONE[ch] for ch in body[-2::-2])
+    return (10 - total % 10) % 10
+
+
+def _check_ok(code):
+    return check_digit(code[:-1]) == _ONE[code[-1]]
+
+
+def expand_upce(code):
+    """
+    Expand an 8-digit UPC-E (number system + 6 digits + check) to UPC-A
+
+    Returns: 12-digit UPC-A string, or None if the code is not UPC-E shaped
+    """
+    if len(code) != 8 or not code.isdigit() or code[0] not in '01':
+        return None
+    ns, d, check = code[0], code[1:7], code[7]
+    last = d[5]
+    if last in '012':
+        body = d[0:2] + last + '0000' + d[2:5]
+    elif last == '3':
+        body = d[0:3] + '00000' + d[3:5]
+    elif last == '4':
+        body = d[0:4] + '00000' + d[4]
+    else:
+        body = d[0:5] + '0000' + last
+    return ns + body + check
+
+
+def classify(code):
+    """
+    Identify a code by its check digit
+
+    Returns: 'UPC-A', 'UPC-E', 'EAN-8', 'EAN-13', 'GTIN-14' or None if invalid
+    """
+    code = str(code).strip()
+    if not code.isdigit() or len(code) not in KINDS:
+        return None
+    if _check_ok(code):
+        return KINDS[len(code)]
+    if len(code) == 8:
+        upca = expand_upce(code)
+        if upca and _check_ok(upca):
+            return 'UPC-E'
+    return None
+
+
+def is_valid(code):
+    return classify(code) is not None
+
+
+def normalize(code, recover_stripped=False):
+    """
+    Canonical GTIN-14 for a code, or None if the check digit is wrong
+
+    Args:
+        code: UPC-A / UPC-E / EAN-8 / EAN-13 / GTIN-14 string
+        recover_stripped: also accept 9-11 digit codes that are UPC-A/EAN-13
+            with leading zeros dropped (common when the POS stored them as numbers)
+    """
+    code = str(code).strip()
+    kind = classify(code)
+    if kind == 'UPC-E':
+        return expand_upce(code).zfill(14)
+    if kind:
+        return code.zfill(14)
+    if recover_stripped and code.isdigit() and 9 <= len(code) <= 11 and _check_ok(code):
+        return code.zfill(14)
+    return None
+
+
+def to_upc_a(code):
+    """12-digit UPC-A for codes that have one (leading GTIN-14 zeros), else None"""
+    gtin = normalize(code)
+    if gtin and gtin.startswith('00'):
+        return gtin[2:]
+    return None
+
+
+def to_ean13(code):
+    """13-digit EAN-13 for codes that have one, else None"""
+    gtin = normalize(code)
+    if gtin and gtin.startswith('0'):
+        return gtin[1:]
+    return None
+
+
+def validate_many(codes, recover_stripped=False):
+    """
+    Validate and normalize a whole column of codes in one pass
+
+    Returns: list of GTIN-14 strings, None where the code is invalid
+    """
+    # Inlined version of normalize() for the common lengths - this runs over
+    # every row of the master list, so avoid the per-call overhead
+    one, three = _ONE, _THREE
+    results = []
+    append = results.append
+    for code in codes:
+        code = code.strip()
+        n = len(code)
+        if not code.isdigit() or n < 8 or n > 14:
+            append(None)
+            continue
+        total = sum([three[ch] for ch in code[-2::-2]]) + sum([one[ch] for ch in code[-3::-2]])
+        ok = (10 - total % 10) % 10 == one[code[-1]]
+        if n in KINDS and ok:
+            append(code.zfill(14))
+        elif n == 8:
+            append(normalize(code))
+        elif recover_stripped and 9 <= n <= 11 and ok:
+            append(code.zfill(14))
+        else:
+            append(None)
+    return results
+
+
+def regenerate_valid_column(input_file=MASTER_LIST_CSV, output_file=None):
+    """
+    Recompute the Valid UPC Format column from check digits
+
+    Args:
+        input_file: master list CSV (Valid UPC Format in column 0, Item ID in column 1)
+        output_file: where to write the regenerated CSV, or None to only count
+
+    Returns:
+        dict of summary counts
+    """
+    with open(input_file, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    header, body = rows[0], rows[1:]
+
+    codes = [row[1] if len(row) > 1 else '' for row in body]
+    gtins = validate_many(codes)
+    recovered = validate_many(codes, recover_stripped=True)
+
+    summary = {
+        'rows': len(body),
+        'previously_valid': sum(1 for row in body if row and row[0] == 'YES'),
+        'valid': 0,
+        'newly_valid': 0,
+        'newly_invalid': 0,
+        'recoverable_stripped': 0,
+    }
+    by_kind = {}
+    for row, code, gtin, gtin_recovered in zip(body, codes, gtins, recovered):
+        if not row:
+            continue
+        was_valid = row[0] == 'YES'
+        valid = gtin is not None
+        row[0] = 'YES' if valid else 'NO'
+        if valid:
+            summary['valid'] += 1
+            kind = classify(code)
+            by_kind[kind] = by_kind.get(kind, 0) + 1
+        elif gtin_recovered is not None:
+            summary['recoverable_stripped'] += 1
+        if valid and not was_valid:
+            summary['newly_valid'] += 1
+        if was_valid and not valid:
+            summary['newly_invalid'] += 1
+    summary['by_kind'] = by_kind
+
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(body)
+
+    return summary
+
+
+def main():
+    output_file = sys.argv[1] if len(sys.argv) > 1 else None
+
+    print("=" * 70)
+    print("GTIN Check-Digit Validation - Master List")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    summary = regenerate_valid_column(MASTER_LIST_CSV, output_file)
+    elapsed = time.perf_counter() - start
+
+    print(f"Rows: {summary['rows']}")
+    print(f"Valid (old length test): {summary['previously_valid']}")
+    print(f"Valid (check digit): {summary['valid']}")
+    for kind, count in sorted(summary['by_kind'].items()):
+        print(f"  {kind}: {count}")
+    print(f"Newly valid: {summary['newly_valid']}")
+    print(f"Newly invalid (bad check digit): {summary['newly_invalid']}")
+    print(f"Leading-zero-stripped codes that would validate: {summary['recoverable_stripped']}")
+    print(f"Time: {elapsed * 1000:.0f} ms")
+    if output_file:
+        print(f"\nRegenerated CSV saved to: {output_file}")
+
+
+if __name__ == '__main__':
+    main()
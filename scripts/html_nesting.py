@@ -0,0 +1,195 @@
+"""
+Div nesting scanner and repair for the HTML reports
+One compiled-regex pass over the file turns its <div> tags into a tree
+(script/style bodies and comments are skipped, stray closers are counted
+rather than trusted), and every misnested Go-UPC column is repaired from that
+tree in a single traversal. The edits are spliced into the original text in
+one pass, so a repair is linear in the file size and everything outside the
+moved blocks - whitespace, attributes, comments - is left untouched.
+
+A Go-UPC column belongs directly inside its product's image-comparison div,
+next to the other api-columns. When a hand edit leaves it inside another
+column it is repaired one of two ways:
+  * the file is short of closing tags (divs still open at the end): the
+    enclosing column is missing its </div>, so one is inserted before the
+    Go-UPC column
+  * otherwise the Go-UPC block is moved to just after the column that
+    encloses it
+
+Usage: python html_nesting.py [report.html ...]
+    Repairs the given files (default: API_Compare_Chart.html)
+"""
+
+import os
+import re
+import sys
+
+from master_list import REPO_ROOT
+
+CHART_HTML = os.path.join(REPO_ROOT, 'API_Compare_Chart.html')
+
+_TAGS = re.compile(
+    r'<!--.*?-->|<(script|style)\b.*?</\1\s*>|<(/?)div\b([^>]*)>',
+    re.DOTALL | re.IGNORECASE)
+_CLASS = re.compile(r'''\bclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+_LINE_START = re.compile(r'[ \t]*$')
+
+
+class DivNode:
+    """A <div> element: offsets of its opening tag and (if closed) of the end of its </div>"""
+
+    __slots__ = ('start', 'end', 'classes', 'parent', 'children')
+
+    def __init__(self, start, classes, parent):
+        self.start = start
+        self.end = None
+        self.classes = classes
+        self.parent = parent
+        self.children = []
+
+    def has_class(self, *names):
+        return all(name in self.classes for name in names)
+
+
+class DivTree:
+    """
+    The div structure of an HTML document
+
+    root: synthetic node holding the top-level divs
+    stray_closers: </div> tags with no open div to close
+    unclosed: divs still open at the end of the document
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.root = DivNode(0, frozenset(), None)
+        self.stray_closers = 0
+        self.nodes = []
+        root = node = self.root
+        # Reports repeat the same few attribute strings thousands of times
+        class_sets = {}
+        for match in _TAGS.finditer(text):
+            closing = match.group(2)
+            if closing is None:
+                continue
+            if closing:
+                if node is root:
+                    self.stray_closers += 1
+                else:
+                    node.end = match.end()
+                    node = node.parent
+                continue
+            attrs = match.group(3)
+            classes = class_sets.get(attrs)
+            if classes is None:
+                found = _CLASS.search(attrs)
+                classes = class_sets[attrs] = frozenset(
+                    (found.group(1) or found.group(2) or found.group(3) or '').split()
+                    if found else ())
+            child = DivNode(match.start(), classes, node)
+            node.children.append(child)
+            self.nodes.append(child)
+            node = child
+        self.unclosed = [n for n in self.nodes if n.end is None]
+        for n in self.unclosed:
+            n.end = len(text)
+
+    def find_all(self, *classes):
+        """Nodes carrying all the given classes, in document order"""
+        return [n for n in self.nodes if n.has_class(*classes)]
+
+
+def _ancestor_below(node, container):
+    """The ancestor of node whose parent carries the container class, or None"""
+    while node.parent is not None:
+        if container in node.parent.classes:
+            return node
+        node = node.parent
+    return None
+
+
+def _inside(node, nodes):
+    node = node.parent
+    while node is not None:
+        if node in nodes:
+            return True
+        node = node.parent
+    return False
+
+
+def _indent_before(text, position):
+    line_start = text.rfind('\n', 0, position) + 1
+    prefix = text[line_start:position]
+    return prefix if _LINE_START.match(prefix) else ''
+
+
+def repair_go_upc_nesting(text, tree=None):
+    """
+    Put every misnested Go-UPC column back directly inside its image-comparison
+
+    Returns: (repaired text, number of columns repaired)
+    """
+    tree = tree or DivTree(text)
+    missing_closers = len(tree.unclosed)
+    edits = []
+    moved = set()
+    for column in tree.find_all('api-column', 'go-upc'):
+        parent = column.parent
+        if parent is None or 'image-comparison' in parent.classes:
+            continue
+        enclosing = _ancestor_below(column, 'image-comparison')
+        if enclosing is None or enclosing is column or _inside(column, moved):
+            continue
+        moved.add(column)
+        indent = _indent_before(text, enclosing.start)
+        if missing_closers:
+            missing_closers -= 1
+            edits.append((column.start, column.start, f"</div>\n{indent}"))
+            continue
+        # Take the block's whole line(s) and re-indent it to its new depth
+        column_indent = _indent_before(text, column.start)
+        block_start = column.start - len(column_indent)
+        if text[block_start - 1:block_start] == '\n':
+            block_start -= 1
+        block = text[column.start:column.end]
+        if len(column_indent) > len(indent):
+            block = block.replace('\n' + column_indent[len(indent):], '\n')
+        edits.append((block_start, column.end, ''))
+        edits.append((enclosing.end, enclosing.end, f"\n{indent}{block}"))
+
+    if not edits:
+        return text, 0
+    # Stable sort keeps blocks moved to the same place in document order
+    edits.sort(key=lambda edit: edit[0])
+    parts = []
+    position = 0
+    for start, end, insert in edits:
+        parts.append(text[position:start])
+        parts.append(insert)
+        position = max(position, end)
+    parts.append(text[position:])
+    return ''.join(parts), sum(1 for _, _, insert in edits if insert)
+
+
+def repair_file(path=CHART_HTML):
+    """Repair a report in place (written once, atomically); returns the number of repairs"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    repaired, count = repair_go_upc_nesting(text)
+    if count:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(repaired)
+        os.replace(tmp_path, path)
+    return count
+
+
+def main(paths=None):
+    paths = paths or sys.argv[1:] or [CHART_HTML]
+    for path in paths:
+        count = repair_file(path)
+        print(f"{path}: fixed {count} Go-UPC nesting issue{'s' if count != 1 else ''}")
+
+
+if __name__ == '__main__':
+    main()
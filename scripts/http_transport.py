@@ -0,0 +1,330 @@
+"""
+Shared keep-alive HTTP transport for all API clients
+Connections are pooled per scheme/host/port and reused across lookups, so a
+run pays the TCP + TLS handshake once per host instead of once per UPC.
+Responses are requested compressed and decoded here (gzip/deflate, plus
+brotli when the brotli package is installed).
+
+HTTP/2 needs a third-party client (the standard library only speaks
+HTTP/1.1); with keep-alive the handshake cost is already gone, which is the
+part that dominated per-lookup latency.
+
+urlopen() is a drop-in for urllib.request.urlopen: it takes a Request and
+returns a response with status/headers/read(), raising urllib.error.HTTPError
+for 4xx/5xx just like urllib does. Every response (and HTTPError) carries a
+timings dict - DNS, connect, TLS, time to first byte and total in ms, wire
+bytes, whether the connection was reused - for the telemetry module.
+
+Requests go through the proxy in HTTP_PROXY / HTTPS_PROXY (NO_PROXY honoured)
+the same way urllib picks one; HTTPS is tunnelled with CONNECT.
+
+Setting UPC_MOCK_SERVER (e.g. http://127.0.0.1:8765) sends every request for a
+provider API host to that server instead - see mock_provider_server.py.
+"""
+
+import io
+import os
+import base64
+import gzip
+import time
+import zlib
+import socket
+import threading
+import functools
+import http.client
+import urllib.error
+import urllib.parse
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_TIMEOUT = 15
+
+# Idle connections kept per host - enough for the engine's busiest provider
+MAX_IDLE_PER_HOST = 8
+MAX_REDIRECTS = 5
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli else 'gzip, deflate'
+USER_AGENT = f"Python-urllib/{urllib.request.__version__}"
+
+# API hosts that UPC_MOCK_SERVER / set_mock_server() redirect to the mock
+MOCKED_HOSTS = ('api.upcitemdb.com', 'world.openfoodfacts.org', 'api.barcodelookup.com',
+                'go-upc.com', 'api.apify.com')
+
+# Errors that mean a pooled connection was closed by the server while idle
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 ConnectionResetError, BrokenPipeError)
+
+# Safe to send again after a stale connection - the server may already have acted
+# on the first attempt, and a repeated POST would e.g. start a second Apify run.
+# Other methods always get a fresh connection instead.
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'))
+
+
+def decode_body(body, encoding):
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.decompress(body)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    if encoding == 'br' and brotli is not None:
+        return brotli.decompress(body)
+    return body
+
+
+def _timed_create_connection(timings, address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
+                             source_address=None):
+    """socket.create_connection with the DNS and TCP connect time split out"""
+    host, port = address
+    started = time.perf_counter()
+    addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    resolved = time.perf_counter()
+    timings['dns_ms'] = (resolved - started) * 1000
+    error = None
+    for _, _, _, _, sockaddr in addresses:
+        try:
+            sock = socket.create_connection(sockaddr[:2], timeout, source_address)
+        except OSError as e:
+            error = e
+            continue
+        timings['connect_ms'] = (time.perf_counter() - resolved) * 1000
+        return sock
+    raise error or OSError(f"getaddrinfo returned no addresses for {host}")
+
+
+class _TimedHTTPSConnection(http.client.HTTPSConnection):
+    """Attributes the part of connect() after the TCP handshake to TLS"""
+
+    timings = None
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        if self.timings is not None:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.timings['tls_ms'] = max(
+                0.0, elapsed - self.timings['dns_ms'] - self.timings['connect_ms'])
+
+
+def _new_timings():
+    return {'dns_ms': 0.0, 'connect_ms': 0.0, 'tls_ms': 0.0, 'ttfb_ms': 0.0,
+            'total_ms': 0.0, 'bytes': 0, 'reused': False, 'retries': 0}
+
+
+class Response:
+    """Fully read, decoded response - usable as a context manager like urllib's"""
+
+    def __init__(self, url, status, reason, headers, body, timings=None):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._body = body
+        self.timings = timings or _new_timings()
+
+    def read(self):
+        return self._body
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class HTTPTransport:
+    """Per-host keep-alive connection pools shared by every thread"""
+
+    def __init__(self, max_idle_per_host=MAX_IDLE_PER_HOST, mock_server=None, proxies=None):
+        self.max_idle_per_host = max_idle_per_host
+        self.mock_server = mock_server
+        # {scheme: proxy URL}, read from the environment like urllib does
+        self.proxies = urllib.request.getproxies() if proxies is None else proxies
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key, timeout, reuse=True):
+        conn = None
+        if reuse:
+            with self._lock:
+                idle = self._pools.get(key)
+                conn = idle.pop() if idle else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        scheme, host, port, proxy = key
+        if proxy is None:
+            if scheme == 'https':
+                return _TimedHTTPSConnection(host, port, timeout=timeout), False
+            return http.client.HTTPConnection(host, port, timeout=timeout), False
+        proxy_host, proxy_port, proxy_auth = proxy
+        if scheme == 'https':
+            conn = _TimedHTTPSConnection(proxy_host, proxy_port, timeout=timeout)
+            conn.set_tunnel(host, port, headers=proxy_auth and {'Proxy-Authorization': proxy_auth})
+            return conn, False
+        return http.client.HTTPConnection(proxy_host, proxy_port, timeout=timeout), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._pools.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method, url, body=None, headers=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Send one request over a pooled connection
+
+        Returns: Response (redirects followed, body decoded); never raises for HTTP status
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._send(method, url, body, headers, timeout)
+            location = response.headers.get('Location')
+            if response.status not in (301, 302, 303, 307, 308) or not location:
+                return response
+            url = urllib.parse.urljoin(url, location)
+            if response.status == 303 or (response.status in (301, 302) and method == 'POST'):
+                method, body = 'GET', None
+        return response
+
+    def _route(self, url):
+        """The URL actually requested - provider API hosts go to the mock server if one is set"""
+        if not self.mock_server:
+            return url
+        parts = urllib.parse.urlsplit(url)
+        if parts.hostname not in MOCKED_HOSTS:
+            return url
+        mock = urllib.parse.urlsplit(self.mock_server)
+        return urllib.parse.urlunsplit((mock.scheme, mock.netloc, parts.path, parts.query, ''))
+
+    def _proxy(self, scheme, host):
+        """(host, port, Proxy-Authorization value or None) of the proxy for host, or None"""
+        proxy = self.proxies.get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        if '://' not in proxy:
+            proxy = 'http://' + proxy
+        parts = urllib.parse.urlsplit(proxy)
+        auth = None
+        if parts.username:
+            credentials = (f"{urllib.parse.unquote(parts.username)}:"
+                           f"{urllib.parse.unquote(parts.password or '')}")
+            auth = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+        default_port = 443 if parts.scheme.lower() == 'https' else 80
+        return parts.hostname, parts.port or default_port, auth
+
+    def _send(self, method, url, body, headers, timeout):
+        parts = urllib.parse.urlsplit(self._route(url))
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == 'https' else 80)
+        proxy = self._proxy(scheme, parts.hostname)
+        key = (scheme, parts.hostname, port, proxy)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        send_headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING}
+        if proxy is not None and scheme == 'http':
+            # Plain HTTP goes to the proxy as an absolute-URI request
+            path = urllib.parse.urlunsplit((scheme, parts.netloc, path, '', ''))
+            if proxy[2]:
+                send_headers['Proxy-Authorization'] = proxy[2]
+        for name, value in (headers or {}).items():
+            send_headers[name.title()] = value
+
+        retryable = method.upper() in IDEMPOTENT_METHODS
+        timings = _new_timings()
+        started = time.perf_counter()
+        while True:
+            conn, reused = self._acquire(key, timeout, reuse=retryable)
+            timings['reused'] = reused
+            if not reused:
+                # Connections open lazily inside request(), so hook the timing in first
+                conn.timings = timings
+                conn._create_connection = functools.partial(_timed_create_connection, timings)
+            try:
+                conn.request(method, path, body=body, headers=send_headers)
+                raw = conn.getresponse()
+                first_byte = time.perf_counter()
+                data = raw.read()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused:
+                    # The server dropped an idle connection - retry once on a fresh one
+                    timings['retries'] += 1
+                    started = time.perf_counter()
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            break
+
+        finished = time.perf_counter()
+        setup_ms = timings['dns_ms'] + timings['connect_ms'] + timings['tls_ms']
+        timings['ttfb_ms'] = max(0.0, (first_byte - started) * 1000 - setup_ms)
+        timings['total_ms'] = (finished - started) * 1000
+        timings['bytes'] = len(data)
+
+        if raw.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        data = decode_body(data, raw.headers.get('Content-Encoding'))
+        return Response(url, raw.status, raw.reason, raw.headers, data, timings)
+
+    def open(self, req, timeout=DEFAULT_TIMEOUT):
+        """urllib.request.urlopen equivalent for a urllib.request.Request"""
+        response = self.request(req.get_method(), req.full_url, req.data,
+                                dict(req.header_items()), timeout)
+        if response.status >= 400:
+            error = urllib.error.HTTPError(response.url, response.status, response.reason,
+                                           response.headers, io.BytesIO(response.read()))
+            error.timings = response.timings
+            raise error
+        return response
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for idle in pools.values():
+            for conn in idle:
+                conn.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_transport():
+    """Process-wide transport shared by the provider clients and scripts"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HTTPTransport(mock_server=os.environ.get('UPC_MOCK_SERVER') or None)
+        return _shared
+
+
+def set_mock_server(base_url):
+    """Send provider API requests to a mock server (None to go back to the real APIs)"""
+    get_transport().mock_server = base_url
+
+
+def urlopen(req, timeout=DEFAULT_TIMEOUT):
+    return get_transport().open(req, timeout)
@@ -0,0 +1,163 @@
+"""
+Bloom filter of GTINs that no provider has a product for
+Built from the negative response cache (and optionally verification result
+CSVs) and written next to the master list, so a re-verification run - on this
+machine or another one - can skip known misses with a few hash probes instead
+of two HTTP round trips. A false positive only means a UPC is reported "Not
+found" without asking; the rate is set when the filter is built.
+
+A filter records the providers whose misses it was built from and expires
+after the shortest of their negative-cache TTLs (see response_cache), like
+the misses it summarizes. It only answers for an engine whose providers all
+took part, so a miss on the free APIs never skips a paid lookup.
+
+Usage: python known_misses.py [verification_csv ...]
+    Builds the filter from the response cache's misses for the free providers
+    plus any UPC,Found,... CSVs given (rows with Found == False).
+"""
+
+import os
+import csv
+import sys
+import json
+import math
+import time
+import hashlib
+
+from gtin import to_gtin14, normalize
+from master_list import MASTER_LIST_CSV
+
+KNOWN_MISSES_PATH = os.path.splitext(MASTER_LIST_CSV)[0] + '.known-missing.bloom'
+
+BLOOM_MAGIC = b'PALMERS-KNOWN-MISSES'
+DEFAULT_FALSE_POSITIVE_RATE = 0.001
+
+_MASK64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    """Fixed-size bit array with k double-hashed probes per GTIN-14"""
+
+    def __init__(self, bits, hashes, data=None, count=0, providers=(), expires_at=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.count = count
+        self.data = bytearray(data) if data is not None else bytearray((bits + 7) // 8)
+        # Providers that all missed every GTIN added, and when that stops being trusted
+        self.providers = tuple(sorted(providers))
+        self.expires_at = expires_at
+
+    @classmethod
+    def for_capacity(cls, capacity, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        bits = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, hashes)
+
+    def _positions(self, gtin):
+        digest = hashlib.blake2b(to_gtin14(gtin).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [((h1 + i * h2) & _MASK64) % self.bits for i in range(self.hashes)]
+
+    def add(self, gtin):
+        for pos in self._positions(gtin):
+            self.data[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, gtin):
+        data = self.data
+        return all(data[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(gtin))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and time.time() > self.expires_at
+
+    def covers(self, provider_names):
+        """True if the filter is current and built from misses of all of provider_names"""
+        return not self.expired and set(provider_names) <= set(self.providers)
+
+    def save(self, path=KNOWN_MISSES_PATH):
+        header = {'bits': self.bits, 'hashes': self.hashes, 'count': self.count,
+                  'providers': list(self.providers), 'expires_at': self.expires_at}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(BLOOM_MAGIC + b'\n' + json.dumps(header).encode() + b'\n')
+            f.write(self.data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=KNOWN_MISSES_PATH):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(BLOOM_MAGIC + b'\n'):
+            raise ValueError(f"Not a known-misses filter: {path}")
+        header_end = data.index(b'\n', len(BLOOM_MAGIC) + 1)
+        header = json.loads(data[len(BLOOM_MAGIC) + 1:header_end])
+        return cls(header['bits'], header['hashes'], data[header_end + 1:], header['count'],
+                   header.get('providers', ()), header.get('expires_at'))
+
+
+def load_known_misses(provider_names, path=KNOWN_MISSES_PATH):
+    """
+    The shipped filter if it applies to a lookup over provider_names, else None
+    (not built, expired, or built from other providers' misses)
+    """
+    if not os.path.exists(path):
+        return None
+    bloom = BloomFilter.load(path)
+    return bloom if bloom.covers(provider_names) else None
+
+
+def _csv_misses(csv_path):
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            if row.get('Found') == 'False' and row.get('Source') == 'Not found':
+                gtin = normalize(row.get('UPC', ''))
+                if gtin:
+                    yield gtin
+
+
+def build_known_misses(providers, csv_paths=(), cache=None,
+                       false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+    """
+    Build a filter of GTINs every provider in providers reports missing
+
+    Args:
+        providers: provider names that must all have missed a GTIN
+        csv_paths: verification result CSVs whose Not found rows are added too
+        cache: ResponseCache to read misses from (the shared one by default)
+    """
+    from response_cache import DEFAULT_NEGATIVE_TTL, get_response_cache
+    if cache is None:
+        cache = get_response_cache()
+    gtins = set(cache.missing_gtins(providers))
+    for csv_path in csv_paths:
+        gtins.update(_csv_misses(csv_path))
+
+    bloom = BloomFilter.for_capacity(len(gtins), false_positive_rate)
+    bloom.providers = tuple(sorted(providers))
+    bloom.expires_at = time.time() + min(
+        cache.negative_ttls.get(provider, DEFAULT_NEGATIVE_TTL) for provider in providers)
+    for gtin in gtins:
+        bloom.add(gtin)
+    return bloom
+
+
+def main():
+    from upc_providers import FREE_PROVIDERS
+
+    bloom = build_known_misses(FREE_PROVIDERS, sys.argv[1:])
+    bloom.save(KNOWN_MISSES_PATH)
+    print(f"Known-missing GTINs: {len(bloom)}")
+    print(f"Filter size: {len(bloom.data):,} bytes, {bloom.hashes} hashes")
+    print(f"Providers: {', '.join(bloom.providers)} - expires "
+          f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(bloom.expires_at))}")
+    print(f"Saved to: {KNOWN_MISSES_PATH}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,572 @@
+"""
+Concurrent UPC lookup engine shared by all verify_* scripts
+Runs lookups on an asyncio loop with a bounded number of in-flight requests
+per provider, paced by the shared per-provider rate limiter instead of a fixed
+sleep after every UPC. Responses are read through the on-disk response cache,
+so UPCs seen on an earlier run cost no network calls. Providers that accept
+several codes per request get their lookups grouped into batch requests.
+ProviderClient / fetch_record expose the same policy per provider, returning
+ProductRecords for the comparison scripts.
+
+With strategy='race' a lookup starts the next provider after a hedge delay
+(the primary's observed p90 latency unless given, counted from when its
+request goes out) instead of waiting out the primary's timeout, takes the
+first provider that finds the product and cancels the rest, within optional
+per-provider call and hedge budgets. A cancelled request that was already
+sent still finishes in the background and its answer is cached. An optional
+ProviderRouter reorders (or skips) providers per UPC from learned hit rates.
+Misses are kept in the cache's shorter-lived negative table, and a shipped
+known-misses bloom filter lets whole UPCs be answered without any call.
+"""
+
+import time
+import atexit
+import asyncio
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from gtin import is_valid
+from known_misses import load_known_misses
+from master_list import load_master_list
+from provider_router import ProviderRouter
+from rate_limiter import get_rate_limiter
+from response_cache import get_response_cache
+from telemetry import get_telemetry
+from upc_providers import FREE_PROVIDERS, get_providers
+
+# Throttled requests are retried after the limiter's wait before giving up
+MAX_RETRIES = 5
+
+# How long a partly filled batch waits for more codes before it is sent anyway
+BATCH_LINGER = 0.05
+
+STRATEGIES = ('sequential', 'race')
+
+# Hedge delay used until a provider has enough latency samples for a p90
+DEFAULT_HEDGE_DELAY = 1.0
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+# Hedged calls spend quota (100 a day on UPCitemdb's free plan) on lookups the
+# primary may still answer; iter_lookups caps them per provider and run
+DEFAULT_HEDGE_BUDGET = 25
+
+_DONE = object()
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+class LookupEngine:
+    """
+    Async lookup engine with one semaphore per provider
+
+    With the default 'sequential' strategy providers are tried in order for each
+    UPC; the first provider that finds the product (or reports a rate limit)
+    wins. 'race' hedges across providers.
+
+    Args:
+        hedge_delay: seconds before the next provider is started in 'race' mode,
+            or None to use the primary provider's running p90 latency
+        budgets: optional dict of provider name -> maximum network lookups
+        hedge_budgets: optional dict of provider name -> maximum lookups started
+            as a hedge while another provider's request is still in flight
+        router: optional ProviderRouter choosing the provider order per UPC
+        known_misses: optional BloomFilter of GTINs no provider has; ignored
+            unless it covers every configured provider and has not expired
+    """
+
+    def __init__(self, provider_names=FREE_PROVIDERS, concurrency=None, rate_limiter=None,
+                 cache=None, use_cache=True, keys=None, strategy='sequential',
+                 hedge_delay=None, budgets=None, router=None, known_misses=None,
+                 hedge_budgets=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.strategy = strategy
+        self.hedge_delay = hedge_delay
+        self.budgets = budgets or {}
+        self.hedge_budgets = hedge_budgets or {}
+        self.router = router
+        self.known_misses = None
+        self.telemetry = get_telemetry()
+        self.providers = get_providers(provider_names, keys)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.cache = (cache or get_response_cache()) if use_cache else None
+        if not self.providers:
+            raise ValueError("No enabled providers - check API keys")
+        if known_misses is not None and known_misses.covers(p.name for p in self.providers):
+            self.known_misses = known_misses
+        concurrency = concurrency or {}
+        self.limits = {p.name: concurrency.get(p.name, p.concurrency) for p in self.providers}
+        self._executor = ThreadPoolExecutor(max_workers=sum(self.limits.values()))
+        self.calls = {p.name: 0 for p in self.providers}
+        self.hedges = {p.name: 0 for p in self.providers}
+        self._latencies = {p.name: deque(maxlen=LATENCY_WINDOW) for p in self.providers}
+        self._loop = None
+        self._semaphores = None
+        self._batchers = None
+
+    def _ensure_semaphores(self):
+        # Semaphores must be created on the loop that uses them
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphores = {name: asyncio.Semaphore(n) for name, n in self.limits.items()}
+            self._batchers = {p.name: _Batcher(self, p) for p in self.providers
+                              if p.supports_batch}
+
+    def _workers(self):
+        # Batch providers need batch_size UPCs in flight per slot to fill their requests
+        return sum(self.limits[p.name] * p.batch_size for p in self.providers)
+
+    def provider(self, name):
+        for provider in self.providers:
+            if provider.name == name:
+                return provider
+        raise ValueError(f"Provider not enabled: {name}")
+
+    async def lookup(self, upc_code):
+        """
+        Lookup one UPC across the configured providers
+        Returns: (found: bool or None when rate limited, product_name: str, source: str)
+        """
+        # A code with a bad check digit cannot be in any database - don't pay to ask
+        if not is_valid(upc_code):
+            return False, '', 'Invalid GTIN'
+        if (self.known_misses is not None and upc_code in self.known_misses
+                and not self.known_misses.expired):
+            return False, '', 'Not found'
+
+        providers = self.router.order(upc_code, self.providers) if self.router else self.providers
+        if self.strategy == 'race':
+            return await self._race(upc_code, providers)
+
+        for provider in providers:
+            if not self._within_budget(provider):
+                continue
+            result = await self._lookup_provider(provider, upc_code)
+            if result[0] is None or result[0]:
+                return result
+
+        return False, '', 'Not found'
+
+    async def _race(self, upc_code, providers):
+        if not providers:
+            return False, '', 'Not found'
+        providers = [p for p in providers if self._within_budget(p)]
+        if not providers:
+            return None, 'Quota budget reached', 'Budget'
+        loop = asyncio.get_running_loop()
+        hedge_delay = self.current_hedge_delay(providers[0])
+        running = {}
+        waiting = list(providers)
+        rate_limited = None
+        # Set once the latest provider's request is out; the hedge clock starts
+        # then, so time spent waiting for a rate-limit token is not latency
+        sent = asyncio.Event()
+        hedge_at = None
+        hedging = True
+
+        def start_next(hedge=False):
+            nonlocal sent, hedge_at
+            while waiting:
+                provider = waiting[0]
+                if hedge and not self._within_hedge_budget(provider):
+                    # Out of hedges - keep the provider for the fallback
+                    return False
+                waiting.pop(0)
+                if not self._within_budget(provider):
+                    continue
+                if hedge:
+                    self.hedges[provider.name] += 1
+                sent, hedge_at = asyncio.Event(), None
+                task = asyncio.ensure_future(self._lookup_provider(provider, upc_code, sent))
+                running[task] = provider
+                return True
+            return False
+
+        start_next()
+        try:
+            while running:
+                waiters = set(running)
+                timeout = sending = None
+                if hedging and waiting and sent.is_set():
+                    if hedge_at is None:
+                        hedge_at = loop.time() + hedge_delay
+                    timeout = max(hedge_at - loop.time(), 0)
+                elif hedging and waiting:
+                    sending = asyncio.ensure_future(sent.wait())
+                    waiters.add(sending)
+                done, _ = await asyncio.wait(waiters, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if sending is not None:
+                    sending.cancel()
+                    done.discard(sending)
+                if not done:
+                    if timeout is not None:
+                        # Primary is slower than usual - hedge with the next provider
+                        hedging = start_next(hedge=True)
+                    continue
+                for task in done:
+                    del running[task]
+                    result = task.result()
+                    if result[0]:
+                        return result
+                    if result[0] is None:
+                        rate_limited = rate_limited or result
+                if not running:
+                    # Everything in flight missed - fall back without waiting
+                    start_next()
+        finally:
+            for task in running:
+                task.cancel()
+
+        return rate_limited or (False, '', 'Not found')
+
+    def current_hedge_delay(self, provider):
+        """Seconds to wait on provider before starting the next one"""
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        samples = self._latencies[provider.name]
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        ordered = sorted(samples)
+        return ordered[int(len(ordered) * 0.9)] / 1000
+
+    def _within_budget(self, provider):
+        budget = self.budgets.get(provider.name)
+        return budget is None or self.calls[provider.name] < budget
+
+    def _within_hedge_budget(self, provider):
+        budget = self.hedge_budgets.get(provider.name)
+        return budget is None or self.hedges[provider.name] < budget
+
+    async def lookup_record(self, upc_code, provider_name=None):
+        """
+        Lookup one UPC with one provider (the first configured one by default)
+        Returns: ProductRecord
+        """
+        provider = self.provider(provider_name) if provider_name else self.providers[0]
+        if not is_valid(upc_code):
+            return provider.record(upc_code, None, None, error='Invalid GTIN')
+        response = await self._fetch(provider, upc_code)
+        return provider.record(upc_code, *response)
+
+    async def _lookup_provider(self, provider, upc_code, sent=None):
+        status, data, _, elapsed_ms, cached = await self._fetch(provider, upc_code, sent)
+        result = provider.interpret(status, data)
+        # Only answers the provider just gave count - cache replays would inflate
+        # the hit rates of whatever was looked up on earlier runs
+        if self.router is not None and result[0] is not None and not cached and status is not None:
+            self.router.record(provider.name, upc_code, result[0], elapsed_ms)
+        return result
+
+    async def _fetch(self, provider, upc_code, sent=None):
+        """
+        Cached or live response for one UPC from one provider
+
+        sent: optional asyncio.Event set when the request goes out
+        Returns: (status, data, error, elapsed_ms, cached)
+        """
+        if self.cache is not None:
+            data = self.cache.get(provider.name, upc_code)
+            if data is not None:
+                return 200, data, '', 0.0, True
+            if self.cache.is_miss(provider.name, upc_code):
+                return 404, None, '', 0.0, True
+
+        self._ensure_semaphores()
+        if provider.name in self._batchers:
+            response = await self._batchers[provider.name].submit(upc_code, sent)
+        else:
+            response = await self._fetch_single(provider, upc_code, sent)
+        if response[0] is not None and response[0] != 429:
+            self._latencies[provider.name].append(response[3])
+        return response
+
+    async def _fetch_single(self, provider, upc_code, sent=None):
+        for _ in range(MAX_RETRIES + 1):
+            await self.rate_limiter.acquire(provider.name)
+            async with self._semaphores[provider.name]:
+                if sent is not None:
+                    sent.set()
+                # Budgets count requests that went out, not lookups queued or cancelled
+                self.calls[provider.name] += 1
+                started = time.perf_counter()
+                request = self._executor.submit(provider.fetch, upc_code)
+                try:
+                    status, data, headers = await asyncio.wrap_future(request)
+                except asyncio.CancelledError:
+                    # A race moved on, but the request is already out - keep its answer
+                    request.add_done_callback(
+                        lambda request: self._store_late(provider, upc_code, request))
+                    raise
+                except Exception as e:
+                    return None, None, str(e), _elapsed_ms(started), False
+                elapsed_ms = _elapsed_ms(started)
+            throttled = self.rate_limiter.update(provider.name, status, headers)
+            if not throttled:
+                self._store(provider, upc_code, status, data)
+                return status, data, '', elapsed_ms, False
+            self.telemetry.observe_retry(provider.name)
+
+        return 429, None, '', 0.0, False
+
+    def _store_late(self, provider, upc_code, request):
+        """Cache the response of a request whose lookup was cancelled in flight"""
+        if request.cancelled() or request.exception() is not None:
+            return
+        status, data, headers = request.result()
+        if not self.rate_limiter.update(provider.name, status, headers):
+            self._store(provider, upc_code, status, data)
+
+    async def _fetch_batch(self, provider, upc_codes, sent=()):
+        """
+        One request for several UPCs; one rate-limit token per request, or one
+        per UPC for providers whose plan counts every code looked up
+
+        sent: asyncio.Events to set when the request goes out
+        Returns: dict of upc -> (status, data, error, elapsed_ms, cached)
+        """
+        loop = asyncio.get_running_loop()
+        tokens = len(upc_codes) if provider.billed_per_code else 1
+
+        for _ in range(MAX_RETRIES + 1):
+            await self.rate_limiter.acquire(provider.name, tokens)
+            async with self._semaphores[provider.name]:
+                for event in sent:
+                    event.set()
+                self.calls[provider.name] += len(upc_codes)
+                started = time.perf_counter()
+                try:
+                    status, payloads, headers = await loop.run_in_executor(
+                        self._executor, provider.fetch_batch, upc_codes)
+                    error = ''
+                except Exception as e:
+                    status, payloads, headers, error = None, {}, {}, str(e)
+                elapsed_ms = _elapsed_ms(started)
+            if status is None or not self.rate_limiter.update(provider.name, status, headers):
+                break
+            self.telemetry.observe_retry(provider.name)
+        else:
+            return {upc_code: (429, None, '', 0.0, False) for upc_code in upc_codes}
+
+        if status != 200 and provider.url_template and len(upc_codes) > 1:
+            # The batch endpoint refused the request - ask for each code on its own
+            responses = await asyncio.gather(
+                *(self._fetch_single(provider, upc_code) for upc_code in upc_codes))
+            return dict(zip(upc_codes, responses))
+
+        responses = {}
+        for upc_code in upc_codes:
+            data = payloads.get(upc_code)
+            self._store(provider, upc_code, status, data)
+            responses[upc_code] = (status, data, error, elapsed_ms, False)
+        return responses
+
+    def _store(self, provider, upc_code, status, data):
+        # Hits go to the long-lived response cache, misses to the negative cache
+        if self.cache is None or status not in (200, 404):
+            return
+        if status == 200 and data and provider.interpret(status, data)[0]:
+            self.cache.put(provider.name, upc_code, data)
+        else:
+            self.cache.put_miss(provider.name, upc_code)
+
+    async def lookup_all(self, upc_codes, on_result=None):
+        """
+        Lookup many UPCs concurrently
+
+        Args:
+            upc_codes: iterable of UPC strings
+            on_result: optional callback(upc, result) called as each lookup finishes
+
+        Returns:
+            dict of upc -> (found, product_name, source)
+        """
+        self._ensure_semaphores()
+        work = asyncio.Queue()
+        for upc_code in upc_codes:
+            work.put_nowait(upc_code)
+
+        results = {}
+
+        async def worker():
+            while True:
+                try:
+                    upc_code = work.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self.lookup(upc_code)
+                results[upc_code] = result
+                if on_result:
+                    on_result(upc_code, result)
+
+        # Enough workers to keep every provider's slots busy
+        workers = [asyncio.create_task(worker()) for _ in range(self._workers())]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.router is not None:
+            self.router.save()
+        self.telemetry.flush()
+        self.rate_limiter.flush()
+
+
+class _Batcher:
+    """Groups concurrent lookups for one batch-capable provider into batch requests"""
+
+    def __init__(self, engine, provider):
+        self.engine = engine
+        self.provider = provider
+        self._pending = []
+        self._timer = None
+
+    def submit(self, upc_code, sent=None):
+        """
+        Queue one UPC; returns a future resolved with its (status, data, error, elapsed_ms, cached)
+
+        sent: optional asyncio.Event set when the batch request goes out
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((upc_code, future, sent))
+        if len(self._pending) >= self.provider.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(BATCH_LINGER, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        size = self.provider.batch_size
+        while self._pending:
+            batch, self._pending = self._pending[:size], self._pending[size:]
+            asyncio.ensure_future(self._send(batch))
+
+    async def _send(self, batch):
+        # The same UPC can be queued twice by callers; send it once
+        upc_codes = list(dict.fromkeys(upc_code for upc_code, _, _ in batch))
+        sent = [event for _, _, event in batch if event is not None]
+        try:
+            results = await self.engine._fetch_batch(self.provider, upc_codes, sent)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for upc_code, future, _ in batch:
+            if not future.done():
+                future.set_result(results[upc_code])
+
+
+def iter_lookups(upc_codes, provider_names=FREE_PROVIDERS, concurrency=None, rate_limiter=None,
+                 use_cache=True, strategy='race', hedge_delay=None, budgets=None, adaptive=True,
+                 keys=None, hedge_budgets=None, router=None):
+    """
+    Run the engine on a background loop and yield (upc, result) as lookups finish
+
+    Lets the synchronous verifiers keep their print/save loop while the engine
+    keeps every provider busy. Results arrive in completion order. With
+    adaptive=True providers are routed per UPC from the persisted routing stats
+    (or by the given router).
+    Racing providers hedge at most DEFAULT_HEDGE_BUDGET calls per provider
+    unless hedge_budgets says otherwise.
+    """
+    if hedge_budgets is None and strategy == 'race':
+        hedge_budgets = {name: DEFAULT_HEDGE_BUDGET for name in provider_names}
+    if router is None and adaptive:
+        router = ProviderRouter(master=load_master_list())
+    known_misses = load_known_misses(provider_names) if use_cache else None
+    engine = LookupEngine(provider_names, concurrency, rate_limiter, use_cache=use_cache,
+                          keys=keys, strategy=strategy, hedge_delay=hedge_delay, budgets=budgets,
+                          router=router, known_misses=known_misses, hedge_budgets=hedge_budgets)
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def on_result(upc_code, result):
+        if stop.is_set():
+            raise asyncio.CancelledError()
+        results.put((upc_code, result))
+
+    def run():
+        try:
+            asyncio.run(engine.lookup_all(upc_codes, on_result))
+        except BaseException as e:
+            results.put((_DONE, e))
+            return
+        results.put((_DONE, None))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            upc_code, result = results.get()
+            if upc_code is _DONE:
+                if result is not None and not isinstance(result, asyncio.CancelledError):
+                    raise result
+                return
+            yield upc_code, result
+    finally:
+        stop.set()
+        engine.close()
+
+
+class ProviderClient:
+    """
+    Async client for one provider, sharing the engine's timeout, retry,
+    rate-limit and cache policy - what the comparison scripts call instead of
+    hand-rolled urllib functions
+    """
+
+    def __init__(self, provider_name, key=None, rate_limiter=None, use_cache=True):
+        self.name = provider_name
+        self.engine = LookupEngine((provider_name,), rate_limiter=rate_limiter,
+                                   use_cache=use_cache, keys={provider_name: key})
+
+    async def lookup(self, gtin):
+        """Returns: ProductRecord"""
+        return await self.engine.lookup_record(gtin, self.name)
+
+    def close(self):
+        self.engine.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def close_clients():
+    """Close the clients fetch_record has cached, saving their stats; runs at exit"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_clients)
+
+
+def fetch_record(provider_name, gtin, key=None, use_cache=True):
+    """
+    Synchronous ProviderClient.lookup for scripts that test one UPC at a time
+    Returns: ProductRecord
+    """
+    client_key = (provider_name, key, use_cache)
+    with _clients_lock:
+        client = _clients.get(client_key)
+        if client is None:
+            client = _clients[client_key] = ProviderClient(provider_name, key, use_cache=use_cache)
+    return asyncio.run(client.lookup(gtin))
@@ -0,0 +1,314 @@
+"""
+Columnar, indexed store for palmers-barcodes-master-list-with-upc-check.csv
+The 25,400-row CSV is parsed once into a binary file under .cache/ holding one
+UTF-8 blob + offset array per column, an open-addressing GTIN hash table and
+department / validity indexes. Loading it is a single read plus zero-copy
+memoryview casts, so no per-row Python objects are created until a row is
+actually asked for. The store is rebuilt only when the source CSV's
+size/mtime change and its content hash no longer matches.
+"""
+
+import os
+import csv
+import json
+import hashlib
+from array import array
+
+from gtin import to_gtin14
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MASTER_LIST_CSV = os.path.join(REPO_ROOT, 'palmers-barcodes-master-list-with-upc-check.csv')
+STORE_DIR = os.path.join(REPO_ROOT, '.cache')
+
+STORE_MAGIC = b'PALMERS-MASTER-LIST'
+STORE_VERSION = 1
+
+# CSV column -> store column (the Valid UPC Format column is stored as a flag)
+COLUMNS = [
+    (1, 'upc'),
+    (2, 'department'),
+    (3, 'name'),
+    (4, 'size'),
+    (5, 'item_size'),
+    (6, 'price'),
+]
+
+_EMPTY_SLOT = -1
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+# Stores already loaded in this process, by source path
+_loaded = {}
+
+
+def _slot(key, bits):
+    return ((key * _GOLDEN) & _MASK64) >> (64 - bits)
+
+
+class MasterList:
+    """Read-only columnar view of the master list with O(1) GTIN lookups"""
+
+    def __init__(self, buffer, layout):
+        view = memoryview(buffer)
+        self._blobs = {}
+        self._offsets = {}
+        for name in layout['columns']:
+            start, length = layout['sections'][f'{name}.blob']
+            self._blobs[name] = view[start:start + length]
+            start, length = layout['sections'][f'{name}.offsets']
+            self._offsets[name] = view[start:start + length].cast('I')
+
+        start, length = layout['sections']['valid']
+        self._valid = view[start:start + length]
+        start, length = layout['sections']['valid_index']
+        self.valid_index = view[start:start + length].cast('I')
+
+        start, length = layout['sections']['gtin_keys']
+        self._gtin_keys = view[start:start + length].cast('q')
+        start, length = layout['sections']['gtin_rows']
+        self._gtin_rows = view[start:start + length].cast('i')
+        self._gtin_bits = layout['gtin_bits']
+
+        self.department_index = {}
+        for department, (start, length) in layout['departments'].items():
+            self.department_index[department] = view[start:start + length].cast('I')
+
+        self._rows = layout['rows']
+        # Content hash of the source CSV ('' when built without the on-disk store)
+        self.sha1 = layout.get('sha1', '')
+        self._decoded = {}
+
+    def __len__(self):
+        return self._rows
+
+    def value(self, column, i):
+        offsets = self._offsets[column]
+        return bytes(self._blobs[column][offsets[i]:offsets[i + 1] - 1]).decode('utf-8')
+
+    def column(self, name):
+        """Whole column as a list of str (decoded once, then cached)"""
+        if name not in self._decoded:
+            if name == 'valid':
+                self._decoded[name] = [bool(v) for v in self._valid]
+            else:
+                self._decoded[name] = bytes(self._blobs[name]).decode('utf-8').split('\x00')[:-1]
+        return self._decoded[name]
+
+    def row(self, i):
+        """Row i as a dict of column name -> value"""
+        row = {'valid': bool(self._valid[i])}
+        for _, name in COLUMNS:
+            row[name] = self.value(name, i)
+        return row
+
+    def find(self, gtin):
+        """Row index for a UPC/EAN/GTIN, or None"""
+        key = to_gtin14(gtin)
+        if not key or len(key) > 18:
+            return None
+        key = int(key)
+        mask = len(self._gtin_keys) - 1
+        slot = _slot(key, self._gtin_bits)
+        while True:
+            stored = self._gtin_keys[slot]
+            if stored == key:
+                return self._gtin_rows[slot]
+            if stored == _EMPTY_SLOT:
+                return None
+            slot = (slot + 1) & mask
+
+    def get(self, gtin):
+        """Row dict for a UPC/EAN/GTIN, or None"""
+        i = self.find(gtin)
+        return None if i is None else self.row(i)
+
+    def name(self, gtin, default=None):
+        i = self.find(gtin)
+        return default if i is None else self.value('name', i)
+
+    def departments(self):
+        return sorted(self.department_index)
+
+    def rows_in_department(self, department):
+        return [self.row(i) for i in self.department_index.get(department, ())]
+
+    def valid_rows(self):
+        """Rows flagged YES in the Valid UPC Format column"""
+        return [self.row(i) for i in self.valid_index]
+
+    def upc_to_name(self):
+        """Valid UPC -> Item Name mapping, the shape the older scripts built by hand"""
+        upcs = self.column('upc')
+        names = self.column('name')
+        return {upcs[i]: names[i] for i in self.valid_index if names[i]}
+
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_csv_columns(csv_path):
+    columns = {name: [] for _, name in COLUMNS}
+    valid = bytearray()
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            if not row or len(row) < 2:
+                continue
+            valid.append(1 if row[0].strip() == 'YES' else 0)
+            for col, name in COLUMNS:
+                columns[name].append(row[col].strip() if len(row) > col else '')
+    return columns, valid
+
+
+def _serialize(columns, valid, source_info):
+    """Lay the columns and indexes out as one binary blob; returns (header, body)"""
+    rows = len(valid)
+    sections = {}
+    body = bytearray()
+
+    def add(name, data):
+        # Keep every section 8-byte aligned so memoryview casts are valid
+        body.extend(b'\x00' * (-len(body) % 8))
+        sections[name] = (len(body), len(data))
+        body.extend(data)
+
+    for _, name in COLUMNS:
+        # NUL-terminated values; value i spans blob[offsets[i]:offsets[i + 1] - 1]
+        encoded = [value.encode('utf-8') + b'\x00' for value in columns[name]]
+        offsets = array('I', [0])
+        total = 0
+        for value in encoded:
+            total += len(value)
+            offsets.append(total)
+        add(f'{name}.blob', b''.join(encoded))
+        add(f'{name}.offsets', offsets.tobytes())
+
+    add('valid', bytes(valid))
+    add('valid_index', array('I', (i for i in range(rows) if valid[i])).tobytes())
+
+    # Open-addressing GTIN table at <= 50% load
+    bits = max(4, (max(rows, 1) * 2 - 1).bit_length())
+    keys = array('q', [_EMPTY_SLOT]) * (1 << bits)
+    slots = array('i', [-1]) * (1 << bits)
+    mask = (1 << bits) - 1
+    for i, upc in enumerate(columns['upc']):
+        key = to_gtin14(upc)
+        if not key or len(key) > 18:
+            continue
+        key = int(key)
+        slot = _slot(key, bits)
+        while keys[slot] != _EMPTY_SLOT and keys[slot] != key:
+            slot = (slot + 1) & mask
+        # Last occurrence wins, same as the old upc -> name dicts
+        keys[slot] = key
+        slots[slot] = i
+    add('gtin_keys', keys.tobytes())
+    add('gtin_rows', slots.tobytes())
+
+    department_rows = {}
+    for i, department in enumerate(columns['department']):
+        department_rows.setdefault(department, array('I')).append(i)
+    departments = {}
+    for department, row_ids in department_rows.items():
+        add(f'department:{department}', row_ids.tobytes())
+        departments[department] = sections.pop(f'department:{department}')
+
+    header = dict(source_info)
+    header.update({
+        'version': STORE_VERSION,
+        'rows': rows,
+        'columns': [name for _, name in COLUMNS],
+        'sections': sections,
+        'departments': departments,
+        'gtin_bits': bits,
+    })
+    return header, bytes(body)
+
+
+def _store_path(csv_path):
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(STORE_DIR, f"{base}.store")
+
+
+def _read_store(store_path):
+    """Returns (header, body) or (None, None) if the file is missing or not a store"""
+    try:
+        with open(store_path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None, None
+    if not data.startswith(STORE_MAGIC + b'\n'):
+        return None, None
+    header_end = data.index(b'\n', len(STORE_MAGIC) + 1)
+    header = json.loads(data[len(STORE_MAGIC) + 1:header_end])
+    body_start = header_end + 1
+    body_start += -body_start % 8
+    return header, memoryview(data)[body_start:]
+
+
+def _write_store(store_path, header, body):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    head = STORE_MAGIC + b'\n' + json.dumps(header).encode() + b'\n'
+    tmp_path = store_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(head)
+        f.write(b'\x00' * (-len(head) % 8))
+        f.write(body)
+    os.replace(tmp_path, store_path)
+
+
+def build_master_list(csv_path=MASTER_LIST_CSV):
+    """Parse the CSV into an in-memory MasterList without touching the on-disk store"""
+    columns, valid = _read_csv_columns(csv_path)
+    header, body = _serialize(columns, valid, {})
+    return MasterList(body, header)
+
+
+def load_master_list(csv_path=MASTER_LIST_CSV, rebuild=False):
+    """
+    Load the master list, building and persisting the store on first use
+
+    Args:
+        csv_path: source CSV (defaults to the repo's master list)
+        rebuild: force a rebuild from the CSV
+
+    Returns:
+        MasterList
+    """
+    csv_path = os.path.abspath(csv_path)
+    if not rebuild and csv_path in _loaded:
+        return _loaded[csv_path]
+
+    stat = os.stat(csv_path)
+    store_path = _store_path(csv_path)
+    header, body = (None, None) if rebuild else _read_store(store_path)
+
+    if header and header.get('version') == STORE_VERSION:
+        fresh = header['size'] == stat.st_size and header['mtime_ns'] == stat.st_mtime_ns
+        if not fresh and header['sha1'] == _file_hash(csv_path):
+            # Only the timestamp moved - keep the data, refresh the stamp
+            header.update({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+            _write_store(store_path, header, body)
+            fresh = True
+        if fresh:
+            master = MasterList(body, header)
+            _loaded[csv_path] = master
+            return master
+
+    columns, valid = _read_csv_columns(csv_path)
+    header, body = _serialize(columns, valid, {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha1': _file_hash(csv_path),
+    })
+    _write_store(store_path, header, body)
+
+    master = MasterList(body, header)
+    _loaded[csv_path] = master
+    return master
@@ -0,0 +1,447 @@
+"""
+Local stand-in for the UPC provider APIs
+Serves UPCitemdb, OpenFoodFacts, Barcode Lookup, Go-UPC and Apify endpoints on
+one port, replaying the payloads recorded in json-data/*.json in each API's
+real response shape. UPCs that were never recorded get a recorded payload
+re-keyed to them (at --hit-rate) or the provider's own "not found" answer, so
+benchmarks can run 10k+ UPCs offline. Latency, 429s and server errors are
+injected from configurable distributions.
+
+Point the lookup pipeline at it with UPC_MOCK_SERVER=http://127.0.0.1:8765
+(see http_transport), or start it in-process with start_mock_server(). Set
+e.g. UPCITEMDB_PLAN=unlimited to lift the client-side rate limit for a provider.
+
+Usage: python mock_provider_server.py [--port 8765] [--latency lognormal:120,0.6]
+           [--hit-rate 0.35] [--throttle-rate 0.02] [--error-rate 0.01] [--config mock.json]
+    --config is a JSON object of provider name -> any of the settings above,
+    overriding the defaults for that provider.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gtin import to_gtin14
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JSON_DATA_DIR = os.path.join(REPO_ROOT, 'json-data')
+
+PROVIDER_NAMES = ('upcitemdb', 'openfoodfacts', 'barcode_lookup', 'go_upc', 'apify')
+
+DEFAULT_SETTINGS = {
+    'latency': 'lognormal:120,0.6',
+    'hit_rate': 0.35,
+    'throttle_rate': 0.0,
+    'error_rate': 0.0,
+    'retry_after': 1,
+}
+
+# Recorded files whose flat records belong to one provider, by file name
+_FILE_PROVIDERS = (
+    ('upcitemdb', 'upcitemdb'),
+    ('go_upc', 'go_upc'),
+    ('apify', 'apify'),
+    ('ean_test_results', 'barcode_lookup'),
+)
+
+
+def parse_latency(spec):
+    """
+    Latency distribution from a spec string
+
+    'fixed:MS', 'uniform:LOW_MS,HIGH_MS' or 'lognormal:MEDIAN_MS,SIGMA'
+    Returns: callable(rng) -> seconds
+    """
+    kind, _, args = spec.partition(':')
+    values = [float(v) for v in args.split(',') if v]
+    if kind == 'fixed':
+        return lambda rng: values[0] / 1000
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == 'lognormal':
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(0, sigma) * median / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+# ---------------------------------------------------------------------------
+# Recorded payloads -> real API shapes
+# ---------------------------------------------------------------------------
+
+def _upcitemdb_payload(ean, record):
+    item = {'ean': ean, 'title': record.get('title', ''), 'brand': record.get('brand', ''),
+            'images': record.get('images') or []}
+    return {'code': 'OK', 'total': 1, 'offset': 0, 'items': [item]}
+
+
+def _barcode_lookup_payload(ean, record):
+    product = {k: v for k, v in record.items() if k not in ('found', 'number', 'name')}
+    product.setdefault('barcode_number', ean)
+    return {'products': [product]}
+
+
+def _go_upc_payload(ean, record):
+    image = record.get('imageUrl') or record.get('image_url') or ''
+    return {
+        'code': ean[1:] if ean.startswith('0') else ean,
+        'codeType': 'UPC',
+        'product': {
+            'name': record.get('api_name') or record.get('name') or record.get('title', ''),
+            'description': record.get('description', ''),
+            'brand': record.get('brand', ''),
+            'category': record.get('category', ''),
+            'imageUrl': '' if image == 'N/A' else image,
+        },
+    }
+
+
+def _apify_items(ean, record):
+    item = dict(record)
+    item.pop('found', None)
+    item['ean'] = ean
+    return [item]
+
+
+_SUMMARY_BUILDERS = {
+    'upcitemdb': _upcitemdb_payload,
+    'barcode_lookup': _barcode_lookup_payload,
+    'go_upc': _go_upc_payload,
+    'apify': _apify_items,
+}
+
+
+def load_fixtures(data_dir=JSON_DATA_DIR):
+    """
+    Recorded answers per provider
+
+    Returns: dict of provider -> {gtin14: payload}; Apify payloads are dataset item lists
+    """
+    fixtures = {name: {} for name in PROVIDER_NAMES}
+
+    def add(provider, code, record, raw=False):
+        gtin = to_gtin14(code)
+        if not gtin or not record or (not raw and record.get('found') is False):
+            return
+        if raw:
+            fixtures[provider][gtin] = record
+        else:
+            fixtures[provider][gtin] = _SUMMARY_BUILDERS[provider](gtin[1:], record)
+
+    for file_name in sorted(os.listdir(data_dir)):
+        if not file_name.endswith('.json'):
+            continue
+        with open(os.path.join(data_dir, file_name), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        file_provider = next((p for hint, p in _FILE_PROVIDERS if hint in file_name), None)
+
+        if isinstance(data, dict):
+            # {ean: record} maps, possibly under an "<provider>_results" key
+            records = data.get('apify_results', data)
+            provider = 'apify' if 'apify_results' in data else file_provider
+            if provider:
+                for code, record in records.items():
+                    if isinstance(record, dict):
+                        add(provider, code, record)
+            continue
+
+        for entry in data:
+            if not isinstance(entry, dict):
+                continue
+            code = entry.get('ean') or entry.get('upc') or entry.get('product', {}).get('upc', '')
+            if 'apis' in entry:
+                # api_request_response_analysis.json keeps the raw payloads
+                for provider, result in entry['apis'].items():
+                    payload = result.get('response', {}).get('payload')
+                    if provider in fixtures and payload:
+                        add(provider, entry['product']['upc'], payload, raw=True)
+            elif any(isinstance(entry.get(p), dict) for p in _SUMMARY_BUILDERS):
+                for provider in _SUMMARY_BUILDERS:
+                    if isinstance(entry.get(provider), dict):
+                        add(provider, code, entry[provider])
+            elif file_provider and (file_provider != 'go_upc' or entry.get('success')):
+                add(file_provider, code, entry)
+
+    # Apify payloads are the dataset items for one EAN
+    fixtures['apify'] = {gtin: payload if isinstance(payload, list) else [payload]
+                         for gtin, payload in fixtures['apify'].items()}
+
+    # Nothing recorded for OpenFoodFacts - derive its shape from the other providers' titles
+    for provider in ('go_upc', 'barcode_lookup', 'upcitemdb'):
+        for gtin, payload in fixtures[provider].items():
+            title = _title(provider, payload)
+            if title and gtin not in fixtures['openfoodfacts']:
+                fixtures['openfoodfacts'][gtin] = {
+                    'code': gtin[1:], 'status': 1, 'status_verbose': 'product found',
+                    'product': {'product_name': title, 'brands': ''},
+                }
+    return fixtures
+
+
+def _title(provider, payload):
+    if provider == 'go_upc':
+        return (payload.get('product') or {}).get('name', '')
+    if provider == 'barcode_lookup':
+        return payload['products'][0].get('title', '') if payload.get('products') else ''
+    if provider == 'upcitemdb':
+        return payload['items'][0].get('title', '') if payload.get('items') else ''
+    return ''
+
+
+def _rekey(provider, payload, gtin):
+    """A recorded payload rewritten to answer for another GTIN"""
+    payload = json.loads(json.dumps(payload))
+    if provider == 'upcitemdb':
+        for item in payload.get('items', []):
+            item['ean'] = gtin[1:]
+    elif provider == 'go_upc':
+        payload['code'] = gtin[2:]
+    elif provider == 'openfoodfacts':
+        payload['code'] = gtin[1:]
+    elif provider == 'barcode_lookup':
+        for product in payload.get('products', []):
+            product['barcode_number'] = gtin[1:]
+    elif provider == 'apify':
+        for item in payload:
+            item['ean'] = gtin[1:]
+    return payload
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class MockProviderServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding fixtures, per-provider settings and counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, settings=None, provider_settings=None, fixtures=None, seed=None):
+        super().__init__(address, MockProviderHandler)
+        self.fixtures = fixtures if fixtures is not None else load_fixtures()
+        self.settings = {}
+        for name in PROVIDER_NAMES:
+            merged = dict(DEFAULT_SETTINGS)
+            merged.update(settings or {})
+            merged.update((provider_settings or {}).get(name, {}))
+            merged['sample_latency'] = parse_latency(merged['latency'])
+            self.settings[name] = merged
+        self.rng = random.Random(seed)
+        self.counters = {name: {'requests': 0, 'hits': 0, 'throttled': 0, 'errors': 0}
+                         for name in PROVIDER_NAMES}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self, provider):
+        """Latency plus injected outcome for one request: (seconds, 'ok'|'throttle'|'error')"""
+        settings = self.settings[provider]
+        with self._lock:
+            latency = settings['sample_latency'](self.rng)
+            roll = self.rng.random()
+            self.counters[provider]['requests'] += 1
+            if roll < settings['throttle_rate']:
+                self.counters[provider]['throttled'] += 1
+                return latency, 'throttle'
+            if roll < settings['throttle_rate'] + settings['error_rate']:
+                self.counters[provider]['errors'] += 1
+                return latency, 'error'
+        return latency, 'ok'
+
+    def answer(self, provider, code):
+        """Recorded (or re-keyed) payload for a code, or None for a miss"""
+        gtin = to_gtin14(code)
+        recorded = self.fixtures[provider]
+        payload = recorded.get(gtin)
+        if payload is None and recorded and gtin:
+            # Deterministic per GTIN so repeated runs see the same catalogue
+            bucket = zlib.crc32(f"{provider}:{gtin}".encode())
+            if bucket / 0xFFFFFFFF < self.settings[provider]['hit_rate']:
+                keys = sorted(recorded)
+                payload = _rekey(provider, recorded[keys[bucket % len(keys)]], gtin)
+        if payload is not None:
+            with self._lock:
+                self.counters[provider]['hits'] += 1
+        return payload
+
+
+_ROUTES = (
+    ('GET', re.compile(r'^/prod/(?:trial|v1)/lookup$'), 'upcitemdb'),
+    ('POST', re.compile(r'^/prod/v1/lookup$'), 'upcitemdb'),
+    ('GET', re.compile(r'^/api/v[02]/product/(?P<code>\d+)(?:\.json)?$'), 'openfoodfacts'),
+    ('GET', re.compile(r'^/v3/products$'), 'barcode_lookup'),
+    ('GET', re.compile(r'^/api/v1/code/(?P<code>\d+)$'), 'go_upc'),
+    ('POST', re.compile(r'^/v2/acts/[^/]+/run-sync-get-dataset-items$'), 'apify'),
+)
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes - without this, Nagle plus the
+    # client's delayed ACK adds ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        parts = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(parts.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+        for route_method, pattern, provider in _ROUTES:
+            match = pattern.match(parts.path)
+            if route_method == method and match:
+                break
+        else:
+            self._send(404, {'error': 'Unknown endpoint'})
+            return
+
+        latency, outcome = self.server.draw(provider)
+        time.sleep(latency)
+        settings = self.server.settings[provider]
+        if outcome == 'throttle':
+            self._send(429, {'code': 'TOO_FAST', 'message': 'Rate limit exceeded'},
+                       {'Retry-After': str(settings['retry_after']), 'X-RateLimit-Remaining': '0'})
+            return
+        if outcome == 'error':
+            self._send(500, {'error': 'Internal server error'})
+            return
+
+        codes = self._codes(provider, match, query, body)
+        getattr(self, f'_answer_{provider}')(codes)
+
+    def _codes(self, provider, match, query, body):
+        if provider == 'upcitemdb':
+            raw = body.get('upc') or query.get('upc', [''])[0]
+            return [code for code in raw.split(',') if code]
+        if provider == 'barcode_lookup':
+            return [query.get('barcode', [''])[0]]
+        if provider == 'apify':
+            return list(body.get('eanCodes', []))
+        return [match.group('code')]
+
+    def _answer_upcitemdb(self, codes):
+        items = []
+        for code in codes:
+            payload = self.server.answer('upcitemdb', code)
+            if payload:
+                items.extend(payload.get('items', []))
+        self._send(200, {'code': 'OK', 'total': len(items), 'offset': 0, 'items': items})
+
+    def _answer_openfoodfacts(self, codes):
+        payload = self.server.answer('openfoodfacts', codes[0])
+        self._send(200, payload or {'code': codes[0], 'status': 0,
+                                    'status_verbose': 'product not found'})
+
+    def _answer_barcode_lookup(self, codes):
+        payload = self.server.answer('barcode_lookup', codes[0])
+        if payload:
+            self._send(200, payload)
+        else:
+            self._send(404, {'message': 'No product found'})
+
+    def _answer_go_upc(self, codes):
+        payload = self.server.answer('go_upc', codes[0])
+        if payload:
+            self._send(200, payload)
+        else:
+            self._send(404, {'code': codes[0], 'codeType': None, 'product': None})
+
+    def _answer_apify(self, codes):
+        items = []
+        for code in codes:
+            items.extend(self.server.answer('apify', code) or [])
+        self._send(200, items)
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_mock_server(port=0, settings=None, provider_settings=None, seed=None):
+    """
+    Start the mock server on a background thread
+
+    Returns: MockProviderServer (use .base_url, .counters, .shutdown())
+    """
+    server = MockProviderServer(('127.0.0.1', port), settings, provider_settings, seed=seed)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the UPC provider APIs")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', default=DEFAULT_SETTINGS['latency'])
+    parser.add_argument('--hit-rate', type=float, default=DEFAULT_SETTINGS['hit_rate'])
+    parser.add_argument('--throttle-rate', type=float, default=DEFAULT_SETTINGS['throttle_rate'])
+    parser.add_argument('--error-rate', type=float, default=DEFAULT_SETTINGS['error_rate'])
+    parser.add_argument('--retry-after', type=float, default=DEFAULT_SETTINGS['retry_after'])
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--config', help="JSON file of provider -> settings overrides")
+    args = parser.parse_args()
+
+    provider_settings = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            provider_settings = json.load(f)
+    settings = {
+        'latency': args.latency,
+        'hit_rate': args.hit_rate,
+        'throttle_rate': args.throttle_rate,
+        'error_rate': args.error_rate,
+        'retry_after': args.retry_after,
+    }
+    server = MockProviderServer(('127.0.0.1', args.port), settings, provider_settings,
+                                seed=args.seed)
+
+    print("=" * 80)
+    print("MOCK UPC PROVIDER SERVER")
+    print("=" * 80)
+    for name in PROVIDER_NAMES:
+        print(f"  {name}: {len(server.fixtures[name])} recorded products")
+    print()
+    print(f"Listening on {server.base_url}")
+    print(f"Run the pipeline with: UPC_MOCK_SERVER={server.base_url}")
+    print("Press Ctrl+C to stop")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print()
+    for name, counts in server.counters.items():
+        if counts['requests']:
+            print(f"  {name}: {counts}")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+"""
+Fast fuzzy product-name matching against the master list
+Names are reduced to normalized word tokens plus character trigrams of each
+token (so "Dnnr" still meets "Dinner" and typos cost little), weighted by
+TF-IDF over the master list and compared by cosine similarity. An inverted
+index from the rarer features to master rows shortlists candidates for an API
+title, so top-k matching never scans all 25,400 names.
+
+Raw cosines are calibrated into the probability that two names are the same
+product, fitted (isotonic regression) on sample pairs drawn from the master
+list when the index is built: a name abbreviated the way the master list does
+it against the same name as an API might title it (words dropped, reordered
+or added), and names against other products of the same brand or random ones.
+
+The built index is written to .cache/ next to the master-list store and
+reloaded in milliseconds until the master list changes.
+"""
+
+import os
+import re
+import json
+import math
+import heapq
+import random
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+from master_list import STORE_DIR
+
+Match = namedtuple('Match', 'index upc name score')
+
+MATCHER_MAGIC = b'PALMERS-NAME-MATCHER'
+MATCHER_VERSION = 1
+
+# Word tokens carry more evidence than any one of their trigrams
+WORD_WEIGHT = 2.0
+# Features on more names than this are too common to shortlist candidates by
+# (they still count in the final cosine)
+MAX_CANDIDATE_DF = 400
+# Shortlisted candidates rescored exactly per query
+CANDIDATES = 32
+CALIBRATION_PAIRS = 4000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_VOWELS_RE = re.compile(r"(?<=.)[aeiou](?=.)")
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens, apostrophes dropped (Justin's -> justins)"""
+    return _TOKEN_RE.findall(text.lower().replace("'", ''))
+
+
+def features(text):
+    """Feature -> count: 'w:token' per word, 't:abc' per trigram of ' token '"""
+    counts = {}
+    for token in tokenize(text):
+        key = 'w:' + token
+        counts[key] = counts.get(key, 0) + 1
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            key = 't:' + padded[i:i + 3]
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+class NameMatcher:
+    """
+    TF-IDF cosine matcher with an inverted index over a fixed list of names
+
+    Document vectors and postings are flat arrays with offset tables, so the
+    whole index serializes as a handful of byte blobs.
+    """
+
+    def __init__(self, names, upcs=None, index=None, seed=0):
+        self.names = names
+        self.upcs = upcs if upcs is not None else [''] * len(names)
+        if index is None:
+            index = self._build(names)
+        self._feature_ids = index['feature_ids']
+        self._idf = index['idf']
+        self._is_word = index['is_word']
+        self._doc_offsets = index['doc_offsets']
+        self._doc_features = index['doc_features']
+        self._doc_weights = index['doc_weights']
+        self._posting_offsets = index['posting_offsets']
+        self._postings = index['postings']
+        self._unseen_idf = index['unseen_idf']
+        self._calibration = index.get('calibration') or self._calibrate(random.Random(seed))
+
+    @staticmethod
+    def _build(names):
+        feature_ids = {}
+        document_features = []
+        df = []
+        for name in names:
+            counts = {}
+            for key, n in features(name).items():
+                fid = feature_ids.get(key)
+                if fid is None:
+                    fid = feature_ids[key] = len(df)
+                    df.append(0)
+                df[fid] += 1
+                counts[fid] = n
+            document_features.append(counts)
+
+        documents = sum(1 for counts in document_features if counts)
+        is_word = bytearray(key.startswith('w:') for key in feature_ids)
+        # Word weight is folded into the IDF so a weight is always count * idf
+        idf = array('d', ((math.log((documents + 1) / (n + 1)) + 1) * (WORD_WEIGHT if word else 1.0)
+                          for n, word in zip(df, is_word)))
+
+        doc_offsets = array('i', [0])
+        doc_features = array('i')
+        doc_weights = array('d')
+        postings = [[] for _ in df]
+        for doc, counts in enumerate(document_features):
+            weights = [n * idf[fid] for fid, n in counts.items()]
+            norm = math.sqrt(sum(w * w for w in weights)) or 1.0
+            doc_features.extend(counts)
+            doc_weights.extend(w / norm for w in weights)
+            doc_offsets.append(len(doc_features))
+            for fid in counts:
+                if df[fid] <= MAX_CANDIDATE_DF:
+                    postings[fid].append(doc)
+
+        posting_offsets = array('i', [0])
+        flat_postings = array('i')
+        for docs in postings:
+            flat_postings.extend(docs)
+            posting_offsets.append(len(flat_postings))
+
+        return {
+            'feature_ids': feature_ids,
+            'idf': idf,
+            'is_word': is_word,
+            'doc_offsets': doc_offsets,
+            'doc_features': doc_features,
+            'doc_weights': doc_weights,
+            'posting_offsets': posting_offsets,
+            'postings': flat_postings,
+            'unseen_idf': math.log(documents + 1) + 1,
+        }
+
+    def vector(self, text):
+        """Normalized query vector over known features: {feature id: weight}"""
+        weights = {}
+        norm = 0.0
+        for key, n in features(text).items():
+            fid = self._feature_ids.get(key)
+            if fid is None:
+                # Unknown words still make the query less like every name
+                w = n * self._unseen_idf * (WORD_WEIGHT if key.startswith('w:') else 1.0)
+            else:
+                w = weights[fid] = n * self._idf[fid]
+            norm += w * w
+        norm = math.sqrt(norm) or 1.0
+        return {fid: w / norm for fid, w in weights.items()}
+
+    def cosine_to(self, query, index):
+        """Raw cosine of a query vector and indexed name number index"""
+        start, end = self._doc_offsets[index], self._doc_offsets[index + 1]
+        get = query.get
+        return sum(get(fid, 0.0) * w for fid, w in
+                   zip(self._doc_features[start:end], self._doc_weights[start:end]))
+
+    def raw_similarity(self, a, b):
+        """Uncalibrated cosine of two arbitrary names (IDF from the indexed names)"""
+        va, vb = self.vector(a), self.vector(b)
+        if len(vb) < len(va):
+            va, vb = vb, va
+        return sum(w * vb.get(fid, 0.0) for fid, w in va.items())
+
+    def similarity(self, a, b):
+        """Calibrated probability (0-1) that two names are the same product"""
+        return self.calibrate(self.raw_similarity(a, b))
+
+    def top_k(self, text, k=5):
+        """
+        Best matching indexed names for text
+
+        Returns: list of Match, highest score first
+        """
+        query = self.vector(text)
+        candidates = Counter()
+        offsets, postings = self._posting_offsets, self._postings
+        for fid in query:
+            start, end = offsets[fid], offsets[fid + 1]
+            if start != end:
+                candidates.update(postings[start:end])
+        if not candidates:
+            return []
+        shortlist = [doc for doc, _ in candidates.most_common(max(CANDIDATES, k))]
+        scored = heapq.nlargest(k, ((self.cosine_to(query, doc), doc) for doc in shortlist))
+        return [Match(doc, self.upcs[doc], self.names[doc], self.calibrate(score))
+                for score, doc in scored if score > 0]
+
+    def calibrate(self, score):
+        """Raw cosine -> probability, interpolating the fitted isotonic curve"""
+        xs, ys = self._calibration
+        if score <= xs[0]:
+            return ys[0]
+        if score >= xs[-1]:
+            return ys[-1]
+        i = bisect_left(xs, score)
+        x0, x1, y0, y1 = xs[i - 1], xs[i], ys[i - 1], ys[i]
+        return y0 if x1 == x0 else y0 + (y1 - y0) * (score - x0) / (x1 - x0)
+
+    @staticmethod
+    def _api_style(name, rng):
+        """A name as a provider might title the product: words dropped, reordered or added"""
+        words = [word for word in name.split() if rng.random() > 0.15] or name.split()[:1]
+        if rng.random() < 0.3:
+            rng.shuffle(words)
+        extras = ['Organic', '12 oz', '2 Pack', 'Family Size', 'Original', 'Natural', '16 fl oz']
+        return ' '.join(words + rng.sample(extras, rng.randint(0, 3)))
+
+    @staticmethod
+    def _abbreviate(name, rng):
+        """A name shortened the way the master list does it (Dinner -> Dnnr)"""
+        return ' '.join(_VOWELS_RE.sub('', word) if len(word) > 5 and rng.random() < 0.3 else word
+                        for word in name.split())
+
+    def _calibrate(self, rng):
+        """Isotonic fit of P(same product | cosine) over labelled sample pairs"""
+        indexed = [i for i, name in enumerate(self.names) if tokenize(name)]
+        if len(indexed) < 2:
+            return [0.0, 1.0], [0.0, 1.0]
+        by_brand = {}
+        for i in indexed:
+            by_brand.setdefault(tokenize(self.names[i])[0], []).append(i)
+
+        pairs = []
+        for _ in range(CALIBRATION_PAIRS):
+            name = self.names[rng.choice(indexed)]
+            roll = rng.random()
+            if roll < 0.5:
+                score = self.raw_similarity(self._abbreviate(name, rng), self._api_style(name, rng))
+                pairs.append((score, 1.0))
+                continue
+            # Other products of the same brand are the hard negatives
+            other = self.names[rng.choice(by_brand[tokenize(name)[0]] if roll < 0.75 else indexed)]
+            if other.lower() != name.lower():
+                pairs.append((self.raw_similarity(name, self._api_style(other, rng)), 0.0))
+
+        # Pool adjacent violators: blocks of [score sum, label sum, count]
+        blocks = []
+        for score, label in sorted(pairs):
+            blocks.append([score, label, 1])
+            while len(blocks) > 1 and blocks[-2][1] / blocks[-2][2] >= blocks[-1][1] / blocks[-1][2]:
+                s, l, n = blocks.pop()
+                blocks[-1][0] += s
+                blocks[-1][1] += l
+                blocks[-1][2] += n
+        xs = [0.0] + [s / n for s, _, n in blocks] + [1.0]
+        ys = [0.0] + [l / n for _, l, n in blocks] + [1.0]
+        return xs, ys
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, path, source_sha1):
+        sections = {}
+        body = bytearray()
+
+        def add(name, data):
+            body.extend(b'\x00' * (-len(body) % 8))
+            sections[name] = (len(body), len(data))
+            body.extend(data)
+
+        add('features', '\n'.join(self._feature_ids).encode('utf-8'))
+        for name in ('idf', 'doc_offsets', 'doc_features', 'doc_weights',
+                     'posting_offsets', 'postings'):
+            add(name, getattr(self, '_' + name).tobytes())
+        add('is_word', bytes(self._is_word))
+        header = {
+            'version': MATCHER_VERSION,
+            'sha1': source_sha1,
+            'sections': sections,
+            'unseen_idf': self._unseen_idf,
+            'calibration': self._calibration,
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        head = MATCHER_MAGIC + b'\n' + json.dumps(header).encode() + b'\n'
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(head)
+            f.write(b'\x00' * (-len(head) % 8))
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, names, upcs, source_sha1):
+        """Matcher from a saved index, or None if missing or built from other data"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if not data.startswith(MATCHER_MAGIC + b'\n'):
+            return None
+        header_end = data.index(b'\n', len(MATCHER_MAGIC) + 1)
+        header = json.loads(data[len(MATCHER_MAGIC) + 1:header_end])
+        if header.get('version') != MATCHER_VERSION or header.get('sha1') != source_sha1:
+            return None
+        body_start = header_end + 1
+        body = memoryview(data)[body_start + -body_start % 8:]
+
+        def section(name):
+            start, length = header['sections'][name]
+            return body[start:start + length]
+
+        keys = bytes(section('features')).decode('utf-8').split('\n')
+        index = {
+            'feature_ids': {key: i for i, key in enumerate(keys)},
+            'is_word': bytes(section('is_word')),
+            'unseen_idf': header['unseen_idf'],
+            'calibration': header['calibration'],
+        }
+        for name, typecode in (('idf', 'd'), ('doc_offsets', 'i'), ('doc_features', 'i'),
+                               ('doc_weights', 'd'), ('posting_offsets', 'i'), ('postings', 'i')):
+            index[name] = section(name).cast(typecode)
+        return cls(names, upcs, index)
+
+
+def _matcher_path():
+    return os.path.join(STORE_DIR, 'master-list-names.matcher')
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_name_matcher():
+    """Matcher over the master list's item names, built once and cached in .cache/"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            from master_list import load_master_list
+            master = load_master_list()
+            names, upcs = master.column('name'), master.column('upc')
+            matcher = NameMatcher.load(_matcher_path(), names, upcs, master.sha1)
+            if matcher is None:
+                matcher = NameMatcher(names, upcs)
+                if master.sha1:
+                    matcher.save(_matcher_path(), master.sha1)
+            _shared = matcher
+        return _shared
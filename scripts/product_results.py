@@ -0,0 +1,292 @@
+"""
+Canonical product-results store
+Every provider result the project has collected - one row per GTIN x
+provider x run - in one SQLite database (json-data/product_results.sqlite3).
+Report generators query it instead of each reloading and hand-merging the
+per-run JSON files, and a new run is one bulk upsert:
+
+    with ProductResults() as store:
+        store.upsert('upcitemdb-retest-2', 'upcitemdb', records)
+        details = store.products(eans, ('barcode_lookup', 'apify', 'upcitemdb'))
+
+Results are keyed by GTIN-14, so UPC-A and EAN-13 forms of a code are the
+same product. Each result keeps the provider record as the run saved it
+(the JSON payload; UPCitemdb retest records are stored in the shape of the
+other UPCitemdb runs). Where several runs have a result for the same product
+and provider, queries return the one from the latest run that found it.
+
+The run files the fetch scripts write are registered in SOURCES with an
+adapter that turns them into records; ingest_file() imports one (the fetch
+scripts call it after saving), and --rebuild re-imports them all in order.
+
+Usage:
+    python product_results.py                      # summary of the store
+    python product_results.py --rebuild            # rebuild the store from the run files in json-data/
+    python product_results.py --ingest FILE [RUN]  # upsert one run file (as a new run unless RUN is given)
+"""
+
+import os
+import sys
+import json
+import sqlite3
+from datetime import datetime
+
+from gtin import to_gtin14
+from master_list import REPO_ROOT
+
+JSON_DATA = os.path.join(REPO_ROOT, 'json-data')
+PRODUCT_RESULTS_DB = os.path.join(JSON_DATA, 'product_results.sqlite3')
+SCHEMA_VERSION = 1
+
+# Provider keys, as used in the combined result files
+PROVIDERS = ('barcode_lookup', 'apify', 'upcitemdb', 'go_upc')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    gtin TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    run INTEGER NOT NULL REFERENCES runs(id),
+    found INTEGER NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    payload TEXT NOT NULL,
+    PRIMARY KEY (gtin, provider, run)
+) WITHOUT ROWID;
+'''
+
+# SQLite's default limit on bound parameters is 999
+_QUERY_CHUNK = 900
+
+
+class ProductResults:
+    """The results database; also a context manager that closes it"""
+
+    def __init__(self, path=PRODUCT_RESULTS_DB):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        version = self._db.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"{path}: unsupported product results schema {version}")
+        # Only a new database is written to - opening the committed one to read leaves it untouched
+        if version == 0:
+            with self._db:
+                self._db.executescript(_SCHEMA)
+                self._db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # -- writing ---------------------------------------------------------------
+
+    def _run_id(self, name, source=''):
+        self._db.execute('INSERT OR IGNORE INTO runs (name, source, created_at) VALUES (?, ?, ?)',
+                         (name, source, datetime.now().isoformat(timespec='seconds')))
+        return self._db.execute('SELECT id FROM runs WHERE name = ?', (name,)).fetchone()[0]
+
+    def upsert(self, run, provider, records, source=''):
+        """
+        Insert or replace one run's results for a provider, in one transaction
+
+        records: iterable of (code, found, payload dict); code is any UPC/EAN/GTIN form
+        Returns: number of results written
+        """
+        rows = []
+        with self._db:
+            run_id = self._run_id(run, source)
+            for code, found, payload in records:
+                gtin = to_gtin14(code)
+                if not gtin:
+                    continue
+                payload = payload or {}
+                title = payload.get('title') or payload.get('api_name') or ''
+                rows.append((gtin, provider, run_id, int(bool(found)), title,
+                             json.dumps(payload, ensure_ascii=False)))
+            self._db.executemany('''
+                INSERT INTO results (gtin, provider, run, found, title, payload)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (gtin, provider, run) DO UPDATE SET
+                    found = excluded.found, title = excluded.title, payload = excluded.payload
+            ''', rows)
+        return len(rows)
+
+    # -- queries ---------------------------------------------------------------
+
+    def products(self, codes, providers=PROVIDERS):
+        """
+        Latest found result per provider for many products in one query per chunk
+
+        A later run that did not find the product does not hide an earlier hit.
+        Returns: {code: {provider: payload}} keyed by the codes as given;
+        providers that never found the product are left out
+        """
+        codes = list(codes)
+        by_gtin = {}
+        for code in codes:
+            by_gtin.setdefault(to_gtin14(code), []).append(code)
+        gtins = [g for g in by_gtin if g]
+        providers = list(providers)
+        found = {}
+        for start in range(0, len(gtins), _QUERY_CHUNK):
+            chunk = gtins[start:start + _QUERY_CHUNK]
+            rows = self._db.execute(f'''
+                SELECT gtin, provider, payload FROM results
+                WHERE gtin IN ({','.join('?' * len(chunk))})
+                  AND provider IN ({','.join('?' * len(providers))})
+                  AND found
+                ORDER BY run
+            ''', chunk + providers)
+            # Later runs overwrite earlier ones
+            for gtin, provider, payload in rows:
+                found.setdefault(gtin, {})[provider] = payload
+        return {code: {provider: json.loads(payload)
+                       for provider, payload in found.get(to_gtin14(code), {}).items()}
+                for code in codes}
+
+    def product(self, code, providers=PROVIDERS):
+        """{provider: payload} of the latest found results for one product"""
+        return self.products([code], providers)[code]
+
+    def latest(self, code, provider):
+        """The latest found result payload for one product and provider, or None"""
+        return self.product(code, (provider,)).get(provider)
+
+    def vacuum(self):
+        self._db.execute('VACUUM')
+
+    def summary(self):
+        """[(run, source, provider, results, found)] in run order"""
+        return self._db.execute('''
+            SELECT runs.name, runs.source, results.provider, COUNT(*), SUM(results.found)
+            FROM results JOIN runs ON runs.id = results.run
+            GROUP BY results.run, results.provider
+            ORDER BY results.run, results.provider
+        ''').fetchall()
+
+
+# -- run files -----------------------------------------------------------------
+
+def _found_records(items):
+    """Records that carry their own found flag and ean"""
+    return [(item['ean'], item.get('found', True), item) for item in items]
+
+
+def _apify_records(items):
+    # The Apify dataset only lists EANs it found an image for
+    return [(item['ean'], True, item) for item in items]
+
+
+def _upcitemdb_image_records(images_by_ean):
+    return [(ean, True, item) for ean, item in images_by_ean.items()]
+
+
+def _upcitemdb_retest_records(items):
+    # Stored in the same shape as upcitemdb_all_images.json entries
+    return [('0' + item['upc'], item['found'], {
+        'title': item['title'],
+        'brand': item.get('brand', 'N/A'),
+        'images': item['images'],
+        'image_count': item['image_count'],
+    }) for item in items]
+
+
+def _go_upc_records(items):
+    return [(item['ean'], item.get('success', False), item) for item in items]
+
+
+def _combined_records(items, provider):
+    """One provider's records from a file of {ean, barcode_lookup, apify, upcitemdb} items"""
+    return [(item['ean'], item[provider].get('found', False), item[provider])
+            for item in items if item.get(provider)]
+
+
+# File name -> (run name, [(provider, adapter)]), in the order the runs happened
+SOURCES = {
+    'ean_test_results.json': ('barcode-lookup-5', [('barcode_lookup', _found_records)]),
+    'ean_test_results_additional.json': ('barcode-lookup-additional-5', [('barcode_lookup', _found_records)]),
+    'apify_dataset_results.json': ('apify-dataset', [('apify', _apify_records)]),
+    'apify_retest_results.json': ('apify-retest', [('apify', _apify_records)]),
+    'upcitemdb_all_images.json': ('upcitemdb-images', [('upcitemdb', _upcitemdb_image_records)]),
+    'upcitemdb_retest_results.json': ('upcitemdb-retest', [('upcitemdb', _upcitemdb_retest_records)]),
+    'go_upc_test_results.json': ('go-upc-10', [('go_upc', _go_upc_records)]),
+    'go_upc_15_products_test.json': ('go-upc-15', [('go_upc', _go_upc_records)]),
+    'additional_5_items_results.json': ('additional-5-items', [
+        (provider, lambda items, p=provider: _combined_records(items, p))
+        for provider in ('barcode_lookup', 'apify', 'upcitemdb')]),
+    'new_5_products_results.json': ('new-5-products', [
+        (provider, lambda items, p=provider: _combined_records(items, p))
+        for provider in ('barcode_lookup', 'apify', 'upcitemdb')]),
+}
+
+
+def ingest_file(path, run=None, store=None):
+    """
+    Upsert a run file registered in SOURCES
+
+    run: run name; defaults to a new, timestamped run, so the file's results
+    become the latest
+    Returns: number of results written
+    """
+    name = os.path.basename(path)
+    if name not in SOURCES:
+        raise ValueError(f"{name}: no adapter registered in product_results.SOURCES")
+    default_run, adapters = SOURCES[name]
+    run = run or f"{default_run}@{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    with open(path, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+
+    own_store = store is None
+    store = store or ProductResults()
+    try:
+        return sum(store.upsert(run, provider, adapter(items), source=name)
+                   for provider, adapter in adapters)
+    finally:
+        if own_store:
+            store.close()
+
+
+def rebuild(path=PRODUCT_RESULTS_DB, data_dir=JSON_DATA):
+    """Recreate the store from the run files in data_dir; returns results written"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    total = 0
+    with ProductResults(tmp_path) as store:
+        for name, (run, _) in SOURCES.items():
+            source = os.path.join(data_dir, name)
+            if os.path.exists(source):
+                total += ingest_file(source, run, store)
+        store.vacuum()
+    os.replace(tmp_path, path)
+    return total
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ['--rebuild']:
+        total = rebuild()
+        print(f"Rebuilt {PRODUCT_RESULTS_DB} ({total} results)")
+    elif args[:1] == ['--ingest'] and len(args) in (2, 3):
+        count = ingest_file(args[1], args[2] if len(args) == 3 else None)
+        print(f"Upserted {count} results from {args[1]}")
+    elif args:
+        print(__doc__)
+        return
+
+    with ProductResults() as store:
+        print(f"{'Run':<38} {'Provider':<16} {'Results':>8} {'Found':>6}")
+        for run, source, provider, results, found in store.summary():
+            print(f"{run:<38} {provider:<16} {results:>8} {found:>6}")
+
+
+if __name__ == '__main__':
+    main()
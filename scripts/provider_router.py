@@ -0,0 +1,185 @@
+"""
+Adaptive provider routing
+Keeps running hit/latency statistics per (provider, 6-digit manufacturer
+prefix) and per (provider, department), persisted between runs, and orders
+the providers for each UPC by how likely they are to answer. Providers with
+a solid record of never finding a prefix are skipped, apart from a small
+exploration share that keeps the statistics current.
+"""
+
+import os
+import copy
+import json
+import random
+import threading
+
+from gtin import to_gtin14
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATS_PATH = os.environ.get(
+    'UPC_ROUTING_PATH', os.path.join(REPO_ROOT, '.cache', 'provider_routing.json'))
+
+# Lookups needed on a prefix before a zero hit rate is trusted enough to skip
+SKIP_MIN_LOOKUPS = 10
+SKIP_MAX_HIT_RATE = 0.02
+# Share of skipped lookups routed anyway so a prefix can recover
+EXPLORE_RATE = 0.05
+# Weight (in pseudo-lookups) of the department / provider-wide rate when smoothing
+PRIOR_WEIGHT = 5
+SAVE_EVERY = 500
+
+
+def manufacturer_prefix(upc_code):
+    """First 6 digits of the code without GTIN-14 padding - the UPC-A company prefix"""
+    gtin = to_gtin14(upc_code)
+    if gtin.startswith('00'):
+        return gtin[2:8]
+    if gtin.startswith('0'):
+        return gtin[1:7]
+    return gtin[:6]
+
+
+class ProviderRouter:
+    """Per-UPC provider ordering learned from past lookups"""
+
+    def __init__(self, path=DEFAULT_STATS_PATH, master=None, rng=None):
+        self.path = path
+        self.master = master
+        self.rng = rng or random.Random()
+        # stats[provider][scope] -> [lookups, hits, total_ms, timed]
+        self.stats = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if self.path and os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        return self
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            text = json.dumps(self.stats, separators=(',', ':'))
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Sharded runs save from several processes - keep their temp files apart
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+    def _department(self, upc_code):
+        if self.master is None:
+            return ''
+        i = self.master.find(upc_code)
+        return '' if i is None else self.master.value('department', i)
+
+    def _scopes(self, upc_code):
+        scopes = ['*', 'prefix:' + manufacturer_prefix(upc_code)]
+        department = self._department(upc_code)
+        if department:
+            scopes.append('dept:' + department)
+        return scopes
+
+    def record(self, provider_name, upc_code, found, elapsed_ms=None):
+        """Count one lookup the provider answered over the network (found True/False) and its latency"""
+        with self._lock:
+            provider_stats = self.stats.setdefault(provider_name, {})
+            for scope in self._scopes(upc_code):
+                entry = provider_stats.setdefault(scope, [0, 0, 0.0, 0])
+                entry[0] += 1
+                entry[1] += 1 if found else 0
+                if elapsed_ms is not None:
+                    entry[2] += elapsed_ms
+                    entry[3] += 1
+            self._unsaved += 1
+            due = self._unsaved >= SAVE_EVERY
+        if due:
+            self.save()
+
+    def _entry(self, provider_name, scope):
+        return self.stats.get(provider_name, {}).get(scope, (0, 0, 0.0, 0))
+
+    def hit_rate(self, provider_name, upc_code):
+        """Smoothed hit probability: prefix rate, shrunk toward department then provider-wide"""
+        scopes = self._scopes(upc_code)
+        lookups, hits = self._entry(provider_name, '*')[:2]
+        rate = (hits + 1) / (lookups + 2)
+        for scope in scopes[2:] + scopes[1:2]:
+            lookups, hits = self._entry(provider_name, scope)[:2]
+            rate = (hits + PRIOR_WEIGHT * rate) / (lookups + PRIOR_WEIGHT)
+        return rate
+
+    def mean_latency(self, provider_name, upc_code):
+        total_ms, timed = self._entry(provider_name, '*')[2:]
+        return total_ms / timed if timed else 0.0
+
+    def should_skip(self, provider_name, upc_code):
+        lookups, hits = self._entry(provider_name, 'prefix:' + manufacturer_prefix(upc_code))[:2]
+        return lookups >= SKIP_MIN_LOOKUPS and hits / lookups <= SKIP_MAX_HIT_RATE
+
+    def order(self, upc_code, providers):
+        """
+        Providers to try for this UPC, most likely to answer first
+
+        Returns: list of Provider (may be empty when every provider is a known miss)
+        """
+        with self._lock:
+            ranked = sorted(
+                providers,
+                key=lambda p: (-self.hit_rate(p.name, upc_code), self.mean_latency(p.name, upc_code)))
+            kept = [p for p in ranked if not self.should_skip(p.name, upc_code)]
+        if len(kept) < len(ranked) and self.rng.random() < EXPLORE_RATE:
+            return ranked
+        return kept
+
+    def summary(self, scope_kind='prefix', limit=10):
+        """Top scopes by lookups per provider: {provider: [(scope, lookups, hit_rate)]}"""
+        result = {}
+        with self._lock:
+            for provider_name, provider_stats in self.stats.items():
+                rows = [(scope.split(':', 1)[1], entry[0], entry[1] / entry[0])
+                        for scope, entry in provider_stats.items()
+                        if scope.startswith(scope_kind + ':') and entry[0]]
+                rows.sort(key=lambda row: -row[1])
+                result[provider_name] = rows[:limit]
+        return result
+
+
+def merge_shard_stats(shard_paths, path=DEFAULT_STATS_PATH, base=None):
+    """
+    Fold the statistics saved by shard processes into path and remove their files
+
+    Every shard router starts from the same base statistics (path as it was
+    when the shards started, unless base is given) and saves to its own file;
+    what each shard added on top of the base is added to path as it is now.
+    Returns: number of shard files merged
+    """
+    current = ProviderRouter(path).stats
+    if base is None:
+        base = current
+    merged = ProviderRouter(None)
+    merged.path = path
+    merged.stats = copy.deepcopy(current)
+    count = 0
+    for shard_path in shard_paths:
+        if not os.path.exists(shard_path):
+            continue
+        with open(shard_path, 'r', encoding='utf-8') as f:
+            shard_stats = json.load(f)
+        for provider_name, provider_stats in shard_stats.items():
+            merged_stats = merged.stats.setdefault(provider_name, {})
+            base_stats = base.get(provider_name, {})
+            for scope, entry in provider_stats.items():
+                base_entry = base_stats.get(scope, (0, 0, 0.0, 0))
+                total = merged_stats.setdefault(scope, [0, 0, 0.0, 0])
+                for k in range(4):
+                    total[k] += entry[k] - base_entry[k]
+        os.remove(shard_path)
+        count += 1
+    if count:
+        merged.save()
+    return count
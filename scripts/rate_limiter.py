@@ -0,0 +1,310 @@
+"""
+Per-provider token-bucket rate limiter shared by the lookup engine
+Buckets start from the plan limits in docs/UPC_API_PRICING_COMPARISON.md and
+adapt to Retry-After / X-RateLimit-* response headers, with jittered
+exponential backoff when a provider throttles without telling us for how long.
+
+The shared limiter records the tokens spent in each plan window (day, month)
+in the response cache database, and a new run starts its buckets from what
+is left of the window instead of from a full quota.
+"""
+
+import os
+import time
+import random
+import atexit
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+from response_cache import get_response_cache
+
+MINUTE = 60
+DAY = 24 * 60 * 60
+MONTH = 30 * DAY
+
+# (calls, period in seconds) per plan - see docs/UPC_API_PRICING_COMPARISON.md
+PLAN_LIMITS = {
+    'upcitemdb': {
+        'free': (100, DAY),
+        'developer': (20000, DAY),
+        'pro': (150000, DAY),
+    },
+    'upcitemdb_paid': {
+        'developer': (20000, DAY),
+        'pro': (150000, DAY),
+    },
+    'barcode_lookup': {
+        'starter': (5000, MONTH),
+        'advanced': (25000, MONTH),
+        'professional': (100000, MONTH),
+        'enterprise': (500000, MONTH),
+    },
+    'go_upc': {
+        'developer': (5000, MONTH),
+        'startup': (45000, MONTH),
+        'enterprise': (450000, MONTH),
+    },
+    # Not in the pricing doc - free API, ~10 requests/minute is what we have observed
+    'openfoodfacts': {
+        'free': (10, MINUTE),
+    },
+    # Pay-per-use, billed per result rather than per call; keep actor starts modest
+    'apify': {
+        'pay_per_use': (60, MINUTE),
+    },
+}
+
+# Plan name that lifts the bucket entirely - for the local mock server and benchmarks
+UNLIMITED_PLAN = 'unlimited'
+UNLIMITED_CALLS_PER_SECOND = 1_000_000
+
+# Plans we are on unless overridden with e.g. UPCITEMDB_PLAN=developer
+DEFAULT_PLANS = {
+    'upcitemdb': 'free',
+    'upcitemdb_paid': 'developer',
+    'barcode_lookup': 'advanced',
+    'go_upc': 'startup',
+    'openfoodfacts': 'free',
+    'apify': 'pay_per_use',
+}
+
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 300.0
+
+# Spent tokens are written to the quota store at least this often
+QUOTA_SAVE_EVERY = 50
+
+
+class TokenBucket:
+    """Classic token bucket - capacity tokens, refilled continuously at rate/sec"""
+
+    def __init__(self, capacity, rate, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def try_take(self, n=1):
+        """
+        Take n tokens if available
+
+        A request for more tokens than the bucket holds goes through once it is
+        full and leaves it in debt, so the calls after it wait the debt off.
+        Returns: 0 when the tokens were taken, otherwise seconds until they will be
+        """
+        now = self.clock()
+        self._refill(now)
+        needed = min(float(n), self.capacity)
+        if self.tokens >= needed:
+            self.tokens -= n
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def set_remaining(self, remaining):
+        """Clamp the bucket to what the provider says we have left"""
+        self._refill(self.clock())
+        self.tokens = min(self.tokens, float(remaining))
+
+
+class ProviderLimiter:
+    """Token bucket plus header-driven blocking and backoff state for one provider"""
+
+    def __init__(self, name, calls, period, clock=time.monotonic):
+        self.name = name
+        self.period = period
+        self.bucket = TokenBucket(calls, calls / period, clock)
+        self.clock = clock
+        self.blocked_until = 0.0
+        self.failures = 0
+        # Tokens taken and not yet saved, by plan window
+        self.unsaved = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, n=1):
+        """Returns 0 if the caller may send a request costing n tokens now, else seconds to wait"""
+        with self._lock:
+            wait = self.blocked_until - self.clock()
+            if wait > 0:
+                return wait
+            wait = self.bucket.try_take(n)
+            if wait <= 0:
+                window = plan_window(self.period)
+                self.unsaved[window] = self.unsaved.get(window, 0) + n
+            return wait
+
+    def take_unsaved(self):
+        """{window: tokens} taken since the last call"""
+        with self._lock:
+            unsaved, self.unsaved = self.unsaved, {}
+        return unsaved
+
+    def update(self, status, headers):
+        """
+        Feed a response back into the limiter
+
+        Args:
+            status: HTTP status code
+            headers: response headers (any mapping with .get)
+
+        Returns:
+            True if the request was throttled and should be retried
+        """
+        headers = headers or {}
+        now = self.clock()
+        with self._lock:
+            remaining = _header_number(headers, 'X-RateLimit-Remaining')
+            if remaining is not None:
+                self.bucket.set_remaining(remaining)
+                if remaining <= 0:
+                    reset = _reset_delay(headers.get('X-RateLimit-Reset'))
+                    if reset is not None:
+                        self.blocked_until = max(self.blocked_until, now + reset)
+
+            if status != 429:
+                self.failures = 0
+                return False
+
+            self.failures += 1
+            retry_after = _retry_after(headers.get('Retry-After'))
+            if retry_after is None:
+                retry_after = backoff_delay(self.failures)
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            return True
+
+
+class RateLimiter:
+    """
+    One ProviderLimiter per provider, created lazily from the configured plan
+
+    shares maps provider name -> fraction of the plan this process may use,
+    for runs split across processes that share one key or IP. With a quota
+    store (the response cache) the buckets start from what earlier runs left
+    of the current plan window, and flush() records what this one spent.
+    """
+
+    def __init__(self, plans=None, clock=time.monotonic, shares=None, store=None):
+        self.plans = dict(DEFAULT_PLANS)
+        for name in PLAN_LIMITS:
+            env_plan = os.environ.get(f"{name.upper()}_PLAN")
+            if env_plan:
+                self.plans[name] = env_plan.lower()
+        self.plans.update(plans or {})
+        self.clock = clock
+        self.shares = shares or {}
+        self.store = store
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider_name):
+        with self._lock:
+            if provider_name not in self._limiters:
+                plan = self.plans.get(provider_name)
+                try:
+                    if plan == UNLIMITED_PLAN:
+                        calls, period = UNLIMITED_CALLS_PER_SECOND, 1
+                    else:
+                        calls, period = PLAN_LIMITS[provider_name][plan]
+                except KeyError:
+                    raise ValueError(f"No rate limit plan '{plan}' for provider {provider_name}")
+                share = self.shares.get(provider_name, 1.0)
+                limiter = ProviderLimiter(provider_name, max(1, calls * share), period, self.clock)
+                if self.store is not None and plan != UNLIMITED_PLAN:
+                    used = self.store.quota_used(provider_name, plan_window(period))
+                    limiter.bucket.tokens = min(limiter.bucket.capacity,
+                                                max(0.0, calls - used) * share)
+                self._limiters[provider_name] = limiter
+            return self._limiters[provider_name]
+
+    async def acquire(self, provider_name, n=1):
+        """Wait until the provider's bucket allows one more request, costing n tokens"""
+        limiter = self.get(provider_name)
+        while True:
+            wait = limiter.reserve(n)
+            if wait <= 0:
+                if sum(limiter.unsaved.values()) >= QUOTA_SAVE_EVERY:
+                    self.flush()
+                return
+            await asyncio.sleep(wait)
+
+    def flush(self):
+        """Add the tokens spent since the last flush to the quota store"""
+        if self.store is None:
+            return
+        with self._lock:
+            limiters = list(self._limiters.values())
+        for limiter in limiters:
+            if self.plans.get(limiter.name) != UNLIMITED_PLAN:
+                self.store.add_quota_used(limiter.name, limiter.take_unsaved())
+
+    def update(self, provider_name, status, headers):
+        return self.get(provider_name).update(status, headers)
+
+
+def plan_window(period):
+    """Index of the current plan window - wall-clock days, months etc. since the epoch"""
+    return int(time.time() // period)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Exponential backoff with jitter: somewhere in [half, full] of base * 2^(attempt-1)"""
+    delay = min(cap, base * (2 ** max(attempt - 1, 0)))
+    return random.uniform(delay / 2, delay)
+
+
+def _header_number(headers, name):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after(value):
+    """Retry-After is either delay-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _reset_delay(value):
+    """X-RateLimit-Reset is an epoch timestamp on most APIs, a delay on a few"""
+    try:
+        reset = float(value)
+    except (TypeError, ValueError):
+        return None
+    if reset > 1e9:
+        reset -= time.time()
+    return max(reset, 0.0)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Process-wide limiter so every engine in a run shares the same buckets
+    Spent quota is kept in the response cache and flushed at exit
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateLimiter(store=get_response_cache())
+            atexit.register(_shared.flush)
+        return _shared
@@ -0,0 +1,101 @@
+"""
+Streaming HTML report writer
+Report scripts yield their header, per-product sections and footer as text
+and the writer pushes each piece straight into a large buffered file, so
+memory stays flat however big the report gets and nothing waits on one
+giant string being built.
+
+During a long run the report can be published while it is still growing:
+checkpoint() (throttled) or publish() writes the footer after the sections
+so far - the file on disk is then a complete, viewable document - and
+rewinds over it, so the next section overwrites the footer. Publishing
+costs one footer write, never a rewrite of the report.
+
+Usage (from a report script):
+    with ReportWriter(output_file, footer=FOOTER) as report:
+        report.write(header)
+        for section in product_sections(products):
+            report.write(section)
+            report.checkpoint()
+"""
+
+import time
+
+from verification_output import PARTIAL_OUTPUT_INTERVAL, WRITE_BUFFER_BYTES
+
+
+class ReportWriter:
+    """
+    Writes a report piece by piece, keeping it viewable while it grows
+
+    footer: closing text, or a callable returning it - called at every
+    publish, so it can summarize what has been written so far
+    """
+
+    def __init__(self, output_file, footer='', partial_interval=PARTIAL_OUTPUT_INTERVAL):
+        self.output_file = output_file
+        self.footer = footer
+        self.partial_interval = partial_interval
+        self._file = open(output_file, 'wb', buffering=WRITE_BUFFER_BYTES)
+        self._last_publish = time.monotonic()
+
+    def write(self, text):
+        self._file.write(text.encode('utf-8'))
+
+    def write_all(self, parts):
+        """Write every piece from an iterable (usually a generator) of text"""
+        write = self._file.write
+        for text in parts:
+            write(text.encode('utf-8'))
+
+    def _footer_bytes(self):
+        footer = self.footer() if callable(self.footer) else self.footer
+        return footer.encode('utf-8')
+
+    def publish(self):
+        """Make the file on disk a complete report of everything written so far"""
+        position = self._file.tell()
+        self._file.write(self._footer_bytes())
+        self._file.truncate()
+        self._file.flush()
+        self._file.seek(position)
+        self._last_publish = time.monotonic()
+
+    def checkpoint(self):
+        """publish() if the partial interval has passed; True if it did"""
+        if time.monotonic() - self._last_publish < self.partial_interval:
+            return False
+        self.publish()
+        return True
+
+    def close(self):
+        """Write the footer and finish the file"""
+        if self._file.closed:
+            return
+        self._file.write(self._footer_bytes())
+        self._file.truncate()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A failed run still leaves a well-formed (partial) report behind
+        self.close()
+        return False
+
+
+def write_report(output_file, parts, footer='', partial_interval=PARTIAL_OUTPUT_INTERVAL):
+    """
+    Stream an iterable of report pieces to output_file, publishing partial
+    reports every partial_interval seconds on the way
+
+    Returns: number of pieces written
+    """
+    count = 0
+    with ReportWriter(output_file, footer, partial_interval) as report:
+        for text in parts:
+            report.write(text)
+            report.checkpoint()
+            count += 1
+    return count
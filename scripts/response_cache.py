@@ -0,0 +1,227 @@
+"""
+Persistent on-disk cache of raw provider responses
+Entries are keyed by a hash of provider + normalized GTIN, expire after a
+per-provider TTL and are evicted least-recently-used once the cache grows past
+its size cap, so re-running a comparison does not spend paid API quota again.
+"Not found" answers go to a separate negative cache with a shorter TTL, since
+a product missing today may be added to a database later.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from gtin import to_gtin14
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.environ.get(
+    'UPC_CACHE_PATH', os.path.join(REPO_ROOT, '.cache', 'responses.sqlite'))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+DAY = 24 * 60 * 60
+
+# Paid providers rarely change a product record - keep those the longest
+PROVIDER_TTLS = {
+    'upcitemdb': 30 * DAY,
+    'openfoodfacts': 7 * DAY,
+    'barcode_lookup': 90 * DAY,
+    'go_upc': 90 * DAY,
+    'apify': 90 * DAY,
+}
+DEFAULT_TTL = 30 * DAY
+
+# Misses expire sooner - databases keep growing
+NEGATIVE_TTLS = {
+    'upcitemdb': 7 * DAY,
+    'openfoodfacts': 3 * DAY,
+    'barcode_lookup': 30 * DAY,
+    'go_upc': 30 * DAY,
+    'apify': 30 * DAY,
+}
+DEFAULT_NEGATIVE_TTL = 7 * DAY
+
+
+def cache_key(provider, gtin):
+    return hashlib.sha256(f"{provider}:{to_gtin14(gtin)}".encode()).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed cache of raw JSON payloads, with a negative cache of misses"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttls=None,
+                 negative_ttls=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(PROVIDER_TTLS)
+        self.ttls.update(ttls or {})
+        self.negative_ttls = dict(NEGATIVE_TTLS)
+        self.negative_ttls.update(negative_ttls or {})
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                gtin TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS misses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                gtin TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            )''')
+        # Rate-limit tokens spent per provider and plan window (see rate_limiter.py)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS quota (
+                provider TEXT NOT NULL,
+                window INTEGER NOT NULL,
+                used REAL NOT NULL,
+                PRIMARY KEY (provider, window)
+            )''')
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, provider, gtin):
+        """Return the cached payload, or None if missing or older than the provider TTL"""
+        key = cache_key(provider, gtin)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload, stored_at, size FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            payload, stored_at, size = row
+            if now - stored_at > self.ttls.get(provider, DEFAULT_TTL):
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._conn.commit()
+                self._total_bytes -= size
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+        return json.loads(payload)
+
+    def put(self, provider, gtin, payload):
+        """Store a raw JSON payload for provider + GTIN (write-through)"""
+        text = json.dumps(payload, separators=(',', ':'))
+        size = len(text.encode())
+        key = cache_key(provider, gtin)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, provider, to_gtin14(gtin), text, now, now, size))
+            self._total_bytes += size - (old[0] if old else 0)
+            self._conn.execute('DELETE FROM misses WHERE key = ?', (key,))
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def put_miss(self, provider, gtin):
+        """Record that provider has no product for this GTIN"""
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO misses VALUES (?, ?, ?, ?)',
+                               (cache_key(provider, gtin), provider, to_gtin14(gtin), time.time()))
+            self._conn.commit()
+
+    def is_miss(self, provider, gtin):
+        """True if provider reported this GTIN missing within the negative TTL"""
+        key = cache_key(provider, gtin)
+        with self._lock:
+            row = self._conn.execute('SELECT stored_at FROM misses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return False
+        return time.time() - row[0] <= self.negative_ttls.get(provider, DEFAULT_NEGATIVE_TTL)
+
+    def missing_gtins(self, providers):
+        """GTIN-14s that every one of providers currently reports missing"""
+        now = time.time()
+        counts = {}
+        with self._lock:
+            for provider in providers:
+                ttl = self.negative_ttls.get(provider, DEFAULT_NEGATIVE_TTL)
+                rows = self._conn.execute(
+                    'SELECT gtin FROM misses WHERE provider = ? AND stored_at >= ?',
+                    (provider, now - ttl))
+                for (gtin,) in rows:
+                    counts[gtin] = counts.get(gtin, 0) + 1
+        return [gtin for gtin, count in counts.items() if count == len(providers)]
+
+    def quota_used(self, provider, window):
+        """Rate-limit tokens spent on provider in a plan window, by every run so far"""
+        with self._lock:
+            row = self._conn.execute('SELECT used FROM quota WHERE provider = ? AND window = ?',
+                                     (provider, window)).fetchone()
+        return row[0] if row else 0.0
+
+    def add_quota_used(self, provider, spent):
+        """
+        Add {window: tokens} to what provider has spent; earlier windows are dropped
+
+        Adds rather than overwrites, so processes sharing a key can all record into it
+        """
+        if not spent:
+            return
+        with self._lock:
+            self._conn.executemany('''
+                INSERT INTO quota (provider, window, used) VALUES (?, ?, ?)
+                ON CONFLICT (provider, window) DO UPDATE SET used = used + excluded.used
+            ''', [(provider, window, used) for window, used in spent.items()])
+            self._conn.execute('DELETE FROM quota WHERE provider = ? AND window < ?',
+                               (provider, max(spent)))
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop least-recently-used entries until we are 10% under the cap
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute('SELECT key, size FROM responses ORDER BY accessed_at')
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT provider, COUNT(*), SUM(size) FROM responses GROUP BY provider').fetchall()
+            misses = self._conn.execute(
+                'SELECT provider, COUNT(*) FROM misses GROUP BY provider').fetchall()
+        stats = {provider: {'entries': count, 'bytes': size, 'misses': 0}
+                 for provider, count, size in rows}
+        for provider, count in misses:
+            stats.setdefault(provider, {'entries': 0, 'bytes': 0})['misses'] = count
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache instance shared by the provider clients"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResponseCache()
+        return _shared
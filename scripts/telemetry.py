@@ -0,0 +1,339 @@
+"""
+Per-request telemetry for the provider layer
+Every provider call records its DNS / TCP connect / TLS / time-to-first-byte /
+total time, payload bytes, HTTP status and retries into fixed-bucket
+histograms per provider. At the end of a run the histograms are merged into
+.cache/telemetry.json, so distributions build up over thousands of calls
+across runs; generate_api_technical_report.py renders them. Set
+UPC_METRICS_PORT to also serve them in Prometheus text format on /metrics.
+
+Usage: python telemetry.py [--reset]
+    Prints the accumulated per-provider latency percentiles
+"""
+
+import os
+import sys
+import json
+import atexit
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TELEMETRY_PATH = os.environ.get(
+    'UPC_TELEMETRY_PATH', os.path.join(REPO_ROOT, '.cache', 'telemetry.json'))
+
+# Request phases in the order they happen; dns/connect/tls are 0 on a reused connection
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'total')
+
+# The 0 bucket holds the phases a reused connection skips
+LATENCY_BUCKETS_MS = (0, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+SIZE_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Cumulative-friendly bucket counts plus sum, Prometheus style"""
+
+    def __init__(self, buckets, counts=None, total=0.0):
+        self.buckets = tuple(buckets)
+        # One extra slot for values above the last bucket (+Inf)
+        self.counts = list(counts) if counts else [0] * (len(self.buckets) + 1)
+        self.total = total
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.total += other.total
+
+    def quantile(self, q):
+        """Estimate from the buckets, interpolating linearly inside the bucket"""
+        count = self.count
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def to_dict(self):
+        return {'buckets': list(self.buckets), 'counts': self.counts, 'sum': self.total}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['buckets'], data['counts'], data['sum'])
+
+
+def _new_provider_stats():
+    stats = {phase: Histogram(LATENCY_BUCKETS_MS) for phase in PHASES}
+    stats['bytes'] = Histogram(SIZE_BUCKETS_BYTES)
+    stats['status'] = {}
+    stats['retries'] = 0
+    stats['reused'] = 0
+    return stats
+
+
+class Telemetry:
+    """Histograms and counters per provider, shared by every thread of a run"""
+
+    def __init__(self, path=TELEMETRY_PATH):
+        self.path = path
+        # Everything seen by this process (served on /metrics) and the part not yet flushed
+        self.providers = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _stats(self, provider_name, store=None):
+        store = self.providers if store is None else store
+        if provider_name not in store:
+            store[provider_name] = _new_provider_stats()
+        return store[provider_name]
+
+    def observe_request(self, provider_name, status, timings):
+        """
+        Record one HTTP exchange
+
+        Args:
+            status: HTTP status, or None when the request failed without one
+            timings: dict from http_transport (dns_ms ... total_ms, bytes, reused, retries)
+        """
+        key = str(status) if status is not None else 'error'
+        with self._lock:
+            for store in (self.providers, self._pending):
+                stats = self._stats(provider_name, store)
+                for phase in PHASES:
+                    stats[phase].observe(timings.get(phase + '_ms', 0.0))
+                stats['bytes'].observe(timings.get('bytes', 0))
+                stats['status'][key] = stats['status'].get(key, 0) + 1
+                stats['retries'] += timings.get('retries', 0)
+                stats['reused'] += 1 if timings.get('reused') else 0
+
+    def observe_retry(self, provider_name):
+        """Count a request the engine had to send again (throttled)"""
+        with self._lock:
+            for store in (self.providers, self._pending):
+                self._stats(provider_name, store)['retries'] += 1
+
+    def merge(self, other):
+        with self._lock:
+            for provider_name, theirs in other.providers.items():
+                ours = self._stats(provider_name)
+                for name in PHASES + ('bytes',):
+                    ours[name].merge(theirs[name])
+                for key, n in theirs['status'].items():
+                    ours['status'][key] = ours['status'].get(key, 0) + n
+                ours['retries'] += theirs['retries']
+                ours['reused'] += theirs['reused']
+
+    def summary(self):
+        """{provider: {requests, status, retries, reused, <phase>: (p50, p95, p99), bytes_p50}}"""
+        result = {}
+        with self._lock:
+            for provider_name, stats in sorted(self.providers.items()):
+                row = {
+                    'requests': stats['total'].count,
+                    'status': dict(stats['status']),
+                    'retries': stats['retries'],
+                    'reused': stats['reused'],
+                    'bytes_p50': stats['bytes'].quantile(0.5),
+                }
+                for phase in PHASES:
+                    row[phase] = tuple(stats[phase].quantile(q) for q in (0.5, 0.95, 0.99))
+                result[provider_name] = row
+        return result
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                provider_name: {
+                    name: (value.to_dict() if isinstance(value, Histogram) else value)
+                    for name, value in stats.items()
+                }
+                for provider_name, stats in self.providers.items()
+            }
+
+    @classmethod
+    def from_dict(cls, data, path=TELEMETRY_PATH):
+        telemetry = cls(path)
+        for provider_name, stats in data.items():
+            telemetry.providers[provider_name] = {
+                name: (Histogram.from_dict(value) if isinstance(value, dict) and 'buckets' in value
+                       else value)
+                for name, value in stats.items()
+            }
+        return telemetry
+
+    @classmethod
+    def load(cls, path=TELEMETRY_PATH):
+        """Telemetry accumulated in path (empty if there is none yet)"""
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f), path)
+
+    def flush(self, path=None):
+        """Merge what this process recorded since the last flush into the file"""
+        path = path or self.path
+        if not path:
+            return
+        recorded = Telemetry(path)
+        with self._lock:
+            recorded.providers, self._pending = self._pending, {}
+        if not recorded.providers:
+            return
+        combined = Telemetry.load(path)
+        combined.merge(recorded)
+        combined.save(path)
+
+    def save(self, path=None):
+        """Write everything this object holds to path, replacing the file"""
+        path = path or self.path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            providers = sorted(self.providers.items())
+            for phase in PHASES:
+                metric = f"upc_provider_{phase}_milliseconds"
+                lines.append(f"# HELP {metric} Provider request {phase} time")
+                lines.append(f"# TYPE {metric} histogram")
+                for provider_name, stats in providers:
+                    lines.extend(_histogram_lines(metric, provider_name, stats[phase]))
+            metric = 'upc_provider_response_bytes'
+            lines.append(f"# HELP {metric} Provider response payload size")
+            lines.append(f"# TYPE {metric} histogram")
+            for provider_name, stats in providers:
+                lines.extend(_histogram_lines(metric, provider_name, stats['bytes']))
+            lines.append("# HELP upc_provider_responses_total Provider responses by HTTP status")
+            lines.append("# TYPE upc_provider_responses_total counter")
+            for provider_name, stats in providers:
+                for status, n in sorted(stats['status'].items()):
+                    lines.append(f'upc_provider_responses_total{{provider="{provider_name}",'
+                                 f'status="{status}"}} {n}')
+            lines.append("# HELP upc_provider_retries_total Provider requests sent again")
+            lines.append("# TYPE upc_provider_retries_total counter")
+            for provider_name, stats in providers:
+                lines.append(f'upc_provider_retries_total{{provider="{provider_name}"}} {stats["retries"]}')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port):
+        """Serve /metrics on a background thread; returns the server"""
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = telemetry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+def _histogram_lines(metric, provider_name, histogram):
+    labels = f'provider="{provider_name}"'
+    cumulative = 0
+    for bound, n in zip(histogram.buckets, histogram.counts):
+        cumulative += n
+        yield f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}'
+    yield f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}'
+    yield f'{metric}_sum{{{labels}}} {histogram.total:.3f}'
+    yield f'{metric}_count{{{labels}}} {histogram.count}'
+
+
+def merge_files(paths, path=TELEMETRY_PATH):
+    """
+    Fold telemetry files written by worker processes into path and remove them
+
+    Workers of a sharded run each flush to their own file, so no two processes
+    read-modify-write the same one.
+    Returns: number of files merged
+    """
+    combined = Telemetry.load(path)
+    merged = [p for p in paths if os.path.exists(p)]
+    for worker_path in merged:
+        combined.merge(Telemetry.load(worker_path))
+    if merged:
+        combined.save(path)
+        for worker_path in merged:
+            os.remove(worker_path)
+    return len(merged)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_telemetry():
+    """
+    Process-wide telemetry, flushed to TELEMETRY_PATH at exit
+    Starts the /metrics endpoint if UPC_METRICS_PORT is set
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Telemetry()
+            atexit.register(_shared.flush)
+            port = os.environ.get('UPC_METRICS_PORT')
+            if port:
+                _shared.serve(int(port))
+        return _shared
+
+
+def main():
+    if '--reset' in sys.argv[1:]:
+        if os.path.exists(TELEMETRY_PATH):
+            os.remove(TELEMETRY_PATH)
+        print(f"Removed {TELEMETRY_PATH}")
+        return
+
+    summary = Telemetry.load(TELEMETRY_PATH).summary()
+    if not summary:
+        print(f"No telemetry recorded yet ({TELEMETRY_PATH})")
+        return
+    print("=" * 80)
+    print("PROVIDER REQUEST TELEMETRY (p50 / p95 / p99 ms)")
+    print("=" * 80)
+    for provider_name, row in summary.items():
+        print()
+        print(f"{provider_name}: {row['requests']:,} requests, {row['retries']:,} retries, "
+              f"{row['reused']:,} on reused connections")
+        print(f"  Status: {', '.join(f'{k}: {v:,}' for k, v in sorted(row['status'].items()))}")
+        for phase in PHASES:
+            p50, p95, p99 = row[phase]
+            print(f"  {phase:<8} {p50:9.1f} {p95:9.1f} {p99:9.1f}")
+        print(f"  Payload  ~{row['bytes_p50']:,.0f} bytes median")
+
+
+if __name__ == '__main__':
+    main()
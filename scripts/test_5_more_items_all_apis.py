@@ -1,8 +1,8 @@
-import urllib.request
-import urllib.error
 import json
 import time
 
+from lookup_engine import fetch_record
+
 # API keys and settings
 BARCODE_LOOKUP_API_KEY = "YOUR_BARCODE_LOOKUP_API_KEY_HERE"  # Replace with your actual key
 APIFY_API_TOKEN = "YOUR_APIFY_API_TOKEN_HERE"  # Replace with your actual token
@@ -21,109 +21,52 @@ test_eans = ["0" + upc for upc in test_upcs]
 
 def test_barcode_lookup(upc):
     """Test Barcode Lookup API"""
-    try:
-        url = f"https://api.barcodelookup.com/v3/products?barcode={upc}&key={BARCODE_LOOKUP_API_KEY}"
-        headers = {'Accept': 'application/json', 'User-Agent': 'PalmersTest/1.0'}
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
-            if data.get('products') and len(data['products']) > 0:
-                product = data['products'][0]
-                return {
-                    'found': True,
-                    'title': product.get('title', 'N/A'),
-                    'brand': product.get('brand', 'N/A'),
-                    'category': product.get('category', 'N/A'),
-                    'manufacturer': product.get('manufacturer', 'N/A'),
-                    'description': product.get('description', 'N/A'),
-                    'images': product.get('images', []),
-                    'barcode_formats': product.get('barcode_formats', 'N/A'),
-                    'size': product.get('size', 'N/A'),
-                    'weight': product.get('weight', 'N/A')
-                }
-            return {'found': False}
-    except Exception as e:
-        return {'found': False, 'error': str(e)}
+    record = fetch_record('barcode_lookup', upc, key=BARCODE_LOOKUP_API_KEY)
+    if not record.found:
+        return {'found': False, 'error': record.error}
+    product = record.raw['products'][0]
+    return {
+        'found': True,
+        'title': record.title or 'N/A',
+        'brand': record.brand or 'N/A',
+        'category': record.category or 'N/A',
+        'manufacturer': product.get('manufacturer', 'N/A'),
+        'description': record.description or 'N/A',
+        'images': list(record.images),
+        'barcode_formats': product.get('barcode_formats', 'N/A'),
+        'size': product.get('size', 'N/A'),
+        'weight': product.get('weight', 'N/A')
+    }
 
 def test_upcitemdb(upc):
     """Test UPCitemdb API"""
-    try:
-        url = f"https://api.upcitemdb.com/prod/trial/lookup?upc={upc}"
-        req = urllib.request.Request(url, headers={'Accept': 'application/json'})
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
-            if data.get('items') and len(data['items']) > 0:
-                item = data['items'][0]
-                return {
-                    'found': True,
-                    'title': item.get('title', 'N/A'),
-                    'brand': item.get('brand', 'N/A'),
-                    'images': item.get('images', []),
-                    'image_count': len(item.get('images', []))
-                }
-            return {'found': False}
-    except Exception as e:
-        return {'found': False, 'error': str(e)}
+    record = fetch_record('upcitemdb', upc)
+    if not record.found:
+        return {'found': False, 'error': record.error}
+    return {
+        'found': True,
+        'title': record.title or 'N/A',
+        'brand': record.brand or 'N/A',
+        'images': list(record.images),
+        'image_count': len(record.images)
+    }
 
 def test_apify(ean):
     """Test Apify EAN/GTIN Image Extractor"""
-    try:
-        # Start an Apify actor run
-        actor_id = "s-r~ean-product-image-search---extract-images-from-any-ean-gtin"
-        url = f"https://api.apify.com/v2/acts/{actor_id}/runs?token={APIFY_API_TOKEN}"
-        
-        payload = {
-            "eans": [ean],
-            "maxImages": 1
-        }
-        
-        req = urllib.request.Request(
-            url,
-            data=json.dumps(payload).encode('utf-8'),
-            headers={
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            },
-            method='POST'
-        )
-        
-        with urllib.request.urlopen(req, timeout=30) as response:
-            run_data = json.loads(response.read().decode())
-            run_id = run_data.get('data', {}).get('id')
-            
-            if not run_id:
-                return {'found': False, 'error': 'No run ID returned'}
-            
-            # Wait for completion (simplified - in production, poll status)
-            print(f"  Apify run started: {run_id}")
-            print(f"  Waiting 10 seconds for Apify to process...")
-            time.sleep(10)
-            
-            # Get dataset items
-            dataset_url = f"https://api.apify.com/v2/datasets/{run_data.get('data', {}).get('defaultDatasetId')}/items?token={APIFY_API_TOKEN}"
-            dataset_req = urllib.request.Request(dataset_url, headers={'Accept': 'application/json'})
-            
-            try:
-                with urllib.request.urlopen(dataset_req, timeout=15) as dataset_response:
-                    dataset_data = json.loads(dataset_response.read().decode())
-                    if dataset_data and len(dataset_data) > 0:
-                        item = dataset_data[0]
-                        return {
-                            'found': True,
-                            'title': item.get('title', 'N/A'),
-                            'country_found': item.get('country_found', 'N/A'),
-                            'image_url': item.get('image_url', 'N/A'),
-                            'width': item.get('width', 'N/A'),
-                            'height': item.get('height', 'N/A'),
-                            'size_bytes': item.get('size_bytes', 'N/A'),
-                            'scraped_at': item.get('scraped_at', 'N/A')
-                        }
-            except Exception as e:
-                return {'found': False, 'error': f'Dataset fetch failed: {str(e)}'}
-            
-            return {'found': False, 'error': 'No data returned'}
-    except Exception as e:
-        return {'found': False, 'error': str(e)}
+    record = fetch_record('apify', ean, key=APIFY_API_TOKEN)
+    if not record.found:
+        return {'found': False, 'error': record.error}
+    item = record.raw['items'][0]
+    return {
+        'found': True,
+        'title': record.title or 'N/A',
+        'country_found': item.get('country_found', 'N/A'),
+        'image_url': item.get('image_url', 'N/A'),
+        'width': item.get('width', 'N/A'),
+        'height': item.get('height', 'N/A'),
+        'size_bytes': item.get('size_bytes', 'N/A'),
+        'scraped_at': item.get('scraped_at', 'N/A')
+    }
 
 # Test all APIs
 results = []
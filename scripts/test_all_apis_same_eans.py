@@ -1,8 +1,8 @@
-import urllib.request
-import urllib.error
 import json
 import time
 
+from lookup_engine import fetch_record
+
 # API Keys
 BARCODE_LOOKUP_KEY = "YOUR_BARCODE_LOOKUP_API_KEY_HERE"  # Replace with your actual key
 # Note: Go-UPC trial key not yet received
@@ -21,48 +21,31 @@ test_codes = [
     {"upc": "824150401162", "ean": "0824150401162", "name": "POM Wonderful Juice"},
 ]
 
+def summarize(record):
+    if record.found:
+        return {
+            'found': True,
+            'title': record.title or 'N/A',
+            'images': len(record.images),
+            'has_image': len(record.images) > 0
+        }
+    if record.found is None:
+        title = 'Rate Limited'
+    elif record.error.startswith('HTTP'):
+        title = f"HTTP Error {record.status}"
+    elif record.error == 'Not found':
+        title = 'Not Found'
+    else:
+        title = f"Error: {record.error}"
+    return {'found': False, 'title': title, 'images': 0, 'has_image': False}
+
 def test_barcode_lookup(upc):
     """Test Barcode Lookup API (we already tested this)"""
-    try:
-        url = f"https://api.barcodelookup.com/v3/products?barcode={upc}&key={BARCODE_LOOKUP_KEY}"
-        req = urllib.request.Request(url, headers={'Accept': 'application/json'})
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
-            if data.get('products'):
-                product = data['products'][0]
-                return {
-                    'found': True,
-                    'title': product.get('title', 'N/A'),
-                    'images': len(product.get('images', [])),
-                    'has_image': len(product.get('images', [])) > 0
-                }
-            return {'found': False, 'title': 'Not Found', 'images': 0, 'has_image': False}
-    except Exception as e:
-        return {'found': False, 'title': f'Error: {str(e)}', 'images': 0, 'has_image': False}
+    return summarize(fetch_record('barcode_lookup', upc, key=BARCODE_LOOKUP_KEY))
 
 def test_upcitemdb(upc):
     """Test UPCitemdb API (Free trial - very limited)"""
-    try:
-        # Using the free trial endpoint
-        url = f"https://api.upcitemdb.com/prod/trial/lookup?upc={upc}"
-        req = urllib.request.Request(url, headers={'Accept': 'application/json'})
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
-            if data.get('items') and len(data['items']) > 0:
-                item = data['items'][0]
-                return {
-                    'found': True,
-                    'title': item.get('title', 'N/A'),
-                    'images': len(item.get('images', [])),
-                    'has_image': len(item.get('images', [])) > 0
-                }
-            return {'found': False, 'title': 'Not Found', 'images': 0, 'has_image': False}
-    except urllib.error.HTTPError as e:
-        if e.code == 429:
-            return {'found': False, 'title': 'Rate Limited', 'images': 0, 'has_image': False}
-        return {'found': False, 'title': f'HTTP Error {e.code}', 'images': 0, 'has_image': False}
-    except Exception as e:
-        return {'found': False, 'title': f'Error: {str(e)}', 'images': 0, 'has_image': False}
+    return summarize(fetch_record('upcitemdb', upc))
 
 def test_go_upc(upc):
     """Test Go-UPC API (Trial key pending)"""
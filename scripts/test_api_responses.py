@@ -1,8 +1,7 @@
-import urllib.request
-import urllib.error
-import json
 import time
 
+from lookup_engine import fetch_record
+
 # Sample 10 UPCs from Palmer's list
 test_upcs = [
     "673316036539",  # Soft Pretzel Mini Buns
@@ -17,36 +16,16 @@ test_upcs = [
     "705105677736",  # Tom Cat Baguette
 ]
 
+def raw_response(record):
+    return record.raw if record.status == 200 else {"error": record.error}
+
 def test_upcitemdb(upc):
     """Test UPCitemdb free trial API"""
-    try:
-        url = f"https://api.upcitemdb.com/prod/trial/lookup?upc={upc}"
-        headers = {
-            'Accept': 'application/json',
-            'User-Agent': 'Mozilla/5.0'
-        }
-        
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            return data
-    except Exception as e:
-        return {"error": str(e)}
+    return raw_response(fetch_record('upcitemdb', upc))
 
 def test_openfoodfacts(upc):
     """Test OpenFoodFacts API (free)"""
-    try:
-        url = f"https://world.openfoodfacts.org/api/v0/product/{upc}.json"
-        headers = {
-            'User-Agent': 'PalmersTestScript/1.0'
-        }
-        
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            return data
-    except Exception as e:
-        return {"error": str(e)}
+    return raw_response(fetch_record('openfoodfacts', upc))
 
 print("=" * 80)
 print("API RESPONSE TESTING - 10 Random Palmer's UPCs")
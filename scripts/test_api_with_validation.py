@@ -3,11 +3,9 @@ API Testing with Built-in Validation
 Tests APIs and automatically validates results against Palmer's master list
 """
 
-import urllib.request
-import urllib.error
-import json
-import csv
 import random
+from lookup_engine import fetch_record
+from master_list import load_master_list
 from validate_api_results import validate_single_product, generate_validation_report
 
 # API Configuration
@@ -16,99 +14,59 @@ APIFY_API_TOKEN = "YOUR_APIFY_API_TOKEN_HERE"
 
 def get_random_upcs(count=10):
     """Get random UPCs from master list with product names"""
-    products = []
+    master = load_master_list()
+    all_rows = [row for row in master.valid_rows() if row['name']]
     
-    with open('../palmers-barcodes-master-list-with-upc-check.csv', 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        
-        all_rows = []
-        for row in reader:
-            if len(row) > 3:
-                upc = row[1].strip()
-                product_name = row[3].strip()
-                
-                if upc and product_name and upc.isdigit() and len(upc) == 12:
-                    all_rows.append({
-                        'upc': upc,
-                        'expected_name': product_name
-                    })
-        
-        products = random.sample(all_rows, min(count, len(all_rows)))
+    products = []
+    for row in random.sample(all_rows, min(count, len(all_rows))):
+        products.append({
+            'upc': row['upc'],
+            'expected_name': row['name']
+        })
     
     return products
 
 def test_barcode_lookup_with_validation(upc, expected_name):
     """Test Barcode Lookup API and validate result"""
-    url = f"https://api.barcodelookup.com/v3/products?barcode={upc}&key={BARCODE_LOOKUP_API_KEY}"
-    
-    try:
-        req = urllib.request.Request(url)
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
-            
-            if data.get('products'):
-                product = data['products'][0]
-                api_name = product.get('title', '')
-                
-                # Validate the result
-                validation = validate_single_product(upc, api_name, "Barcode Lookup API")
-                
-                return {
-                    'success': True,
-                    'api_product': api_name,
-                    'expected_product': expected_name,
-                    'validation': validation,
-                    'brand': product.get('brand', ''),
-                    'category': product.get('category', '')
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'No products found'
-                }
-    
-    except Exception as e:
+    record = fetch_record('barcode_lookup', upc, key=BARCODE_LOOKUP_API_KEY)
+    if not record.found:
         return {
             'success': False,
-            'error': str(e)
+            'error': 'No products found' if record.error == 'Not found' else record.error
         }
+    
+    # Validate the result
+    validation = validate_single_product(upc, record.title, "Barcode Lookup API")
+    
+    return {
+        'success': True,
+        'api_product': record.title,
+        'expected_product': expected_name,
+        'validation': validation,
+        'brand': record.brand,
+        'category': record.category
+    }
 
 def test_upcitemdb_with_validation(upc, expected_name):
     """Test UPCitemdb API and validate result"""
-    url = f"https://api.upcitemdb.com/prod/trial/lookup?upc={upc}"
-    
-    try:
-        req = urllib.request.Request(url)
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
-            
-            if data.get('items'):
-                item = data['items'][0]
-                api_name = item.get('title', '')
-                
-                # Validate the result
-                validation = validate_single_product(upc, api_name, "UPCitemdb")
-                
-                return {
-                    'success': True,
-                    'api_product': api_name,
-                    'expected_product': expected_name,
-                    'validation': validation,
-                    'brand': item.get('brand', ''),
-                    'images': len(item.get('images', []))
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'No items found'
-                }
-    
-    except Exception as e:
+    record = fetch_record('upcitemdb', upc)
+    if not record.found:
         return {
             'success': False,
-            'error': str(e)
+            'error': 'No items found' if record.error == 'Not found' else record.error
         }
+    
+    # Validate the result
+    validation = validate_single_product(upc, record.title, "UPCitemdb")
+    
+    return {
+        'success': True,
+        'api_product': record.title,
+        'expected_product': expected_name,
+        'validation': validation,
+        'brand': record.brand,
+        'images': len(record.images)
+    }
 
 def main():
     """Run API tests with validation"""
@@ -2,6 +2,8 @@ import urllib.request
 import json
 import time
 
+import http_transport
+
 # Your Apify API token - KEEP THIS PRIVATE!
 # You'll need to provide your actual token
 APIFY_TOKEN = "YOUR_APIFY_API_TOKEN_HERE"  # Replace with your actual token
@@ -55,7 +57,7 @@ def run_apify_ean_extractor():
             method='POST'
         )
         
-        with urllib.request.urlopen(req, timeout=30) as response:
+        with http_transport.urlopen(req, timeout=30) as response:
             run_data = json.loads(response.read().decode())
             run_id = run_data['data']['id']
             
@@ -73,7 +75,7 @@ def run_apify_ean_extractor():
                 time.sleep(5)  # Check every 5 seconds
                 
                 status_req = urllib.request.Request(status_url)
-                with urllib.request.urlopen(status_req, timeout=15) as status_response:
+                with http_transport.urlopen(status_req, timeout=15) as status_response:
                     status_data = json.loads(status_response.read().decode())
                     status = status_data['data']['status']
                     
@@ -87,7 +89,7 @@ def run_apify_ean_extractor():
                         dataset_url = f"https://api.apify.com/v2/actor-runs/{run_id}/dataset/items?token={APIFY_TOKEN}"
                         
                         dataset_req = urllib.request.Request(dataset_url)
-                        with urllib.request.urlopen(dataset_req, timeout=15) as dataset_response:
+                        with http_transport.urlopen(dataset_req, timeout=15) as dataset_response:
                             results = json.loads(dataset_response.read().decode())
                             
                             # Save results
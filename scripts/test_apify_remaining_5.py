@@ -1,6 +1,8 @@
 import urllib.request
 import json
 
+import http_transport
+
 APIFY_TOKEN = "YOUR_APIFY_API_TOKEN_HERE"  # Replace with your actual token
 
 # The 5 EAN codes that weren't found in the first Apify test (items 6-10)
@@ -70,7 +72,7 @@ try:
     
     print("Submitting request to Apify...")
     
-    with urllib.request.urlopen(req, timeout=30) as response:
+    with http_transport.urlopen(req, timeout=30) as response:
         result = json.loads(response.read().decode())
         
         print("[OK] Actor run started!")
@@ -119,7 +121,7 @@ except urllib.error.HTTPError as e:
         actor_url = f"https://api.apify.com/v2/acts/{actor_username}~{actor_name}?token={APIFY_TOKEN}"
         req = urllib.request.Request(actor_url)
         
-        with urllib.request.urlopen(req, timeout=15) as response:
+        with http_transport.urlopen(req, timeout=15) as response:
             actor_data = json.loads(response.read().decode())
             print("[OK] Actor found!")
             print(f"Name: {actor_data['data']['name']}")
@@ -1,8 +1,7 @@
-import urllib.request
-import urllib.error
-import json
 import time
 
+from lookup_engine import fetch_record
+
 # Barcode Lookup API Key
 API_KEY = "YOUR_BARCODE_LOOKUP_API_KEY_HERE"  # Replace with your actual key
 
@@ -22,19 +21,8 @@ test_upcs = [
 
 def test_barcode_lookup(upc):
     """Test Barcode Lookup API"""
-    try:
-        url = f"https://api.barcodelookup.com/v3/products?barcode={upc}&key={API_KEY}"
-        headers = {
-            'Accept': 'application/json',
-            'User-Agent': 'PalmersTestScript/1.0'
-        }
-        
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
-            return data
-    except Exception as e:
-        return {"error": str(e)}
+    record = fetch_record('barcode_lookup', upc, key=API_KEY)
+    return record.raw if record.status == 200 else {"error": record.error}
 
 print("=" * 80)
 print("BARCODE LOOKUP API TESTING - 10 Random Palmer's UPCs")
@@ -2,69 +2,44 @@
 Test Go-UPC API with sample products
 """
 
-import urllib.request
-import urllib.error
 import json
-import csv
 import random
 import time
 
+from lookup_engine import fetch_record
+from master_list import load_master_list
+
 # Go-UPC API Key
 GO_UPC_API_KEY = "c74e46d117cd569c11ae68c88bae8f00c11f66b9ca5f662dd397550a4ea5d7ce"
 
 def get_random_upcs(count=10):
     """Get random UPCs from master list"""
-    products = []
+    master = load_master_list()
+    all_rows = [row for row in master.valid_rows() if row['name']]
     
-    with open('../palmers-barcodes-master-list-with-upc-check.csv', 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        
-        all_rows = []
-        for row in reader:
-            if len(row) > 3:
-                upc = row[1].strip()
-                product_name = row[3].strip()
-                size = row[4].strip() if len(row) > 4 else ""
-                
-                if upc and product_name and upc.isdigit() and len(upc) == 12:
-                    all_rows.append({
-                        'upc': upc,
-                        'ean': '0' + upc,  # Convert to EAN-13
-                        'expected_name': product_name,
-                        'size': size
-                    })
-        
-        products = random.sample(all_rows, min(count, len(all_rows)))
+    products = []
+    for row in random.sample(all_rows, min(count, len(all_rows))):
+        products.append({
+            'upc': row['upc'],
+            'ean': '0' + row['upc'],  # Convert to EAN-13
+            'expected_name': row['name'],
+            'size': row['size']
+        })
     
     return products
 
 def test_go_upc_api(upc):
     """Test Go-UPC API with a single UPC"""
-    url = f"https://go-upc.com/api/v1/code/{upc}"
-    
-    try:
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {GO_UPC_API_KEY}')
-        
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
-            
-            return {
-                'success': True,
-                'data': data
-            }
-    
-    except urllib.error.HTTPError as e:
-        return {
-            'success': False,
-            'error': f'HTTP {e.code}: {e.reason}'
-        }
-    except Exception as e:
+    record = fetch_record('go_upc', upc, key=GO_UPC_API_KEY)
+    if record.status == 200:
         return {
-            'success': False,
-            'error': str(e)
+            'success': True,
+            'data': record.raw
         }
+    return {
+        'success': False,
+        'error': record.error
+    }
 
 def main():
     """Run Go-UPC API tests"""
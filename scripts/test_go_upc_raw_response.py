@@ -5,6 +5,8 @@ Check the raw Go-UPC API response to see if images are included
 import urllib.request
 import json
 
+import http_transport
+
 GO_UPC_API_KEY = "c74e46d117cd569c11ae68c88bae8f00c11f66b9ca5f662dd397550a4ea5d7ce"
 
 # Test with one UPC
@@ -18,7 +20,7 @@ url = f"https://go-upc.com/api/v1/code/{upc}"
 req = urllib.request.Request(url)
 req.add_header('Authorization', f'Bearer {GO_UPC_API_KEY}')
 
-with urllib.request.urlopen(req) as response:
+with http_transport.urlopen(req) as response:
     data = json.loads(response.read().decode())
     
     # Print the entire response prettily
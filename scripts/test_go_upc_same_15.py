@@ -2,11 +2,11 @@
 Test Go-UPC API with the same 15 EAN codes used in the main comparison
 """
 
-import urllib.request
-import urllib.error
 import json
 import time
 
+from lookup_engine import fetch_record
+
 # Go-UPC API Key
 GO_UPC_API_KEY = "c74e46d117cd569c11ae68c88bae8f00c11f66b9ca5f662dd397550a4ea5d7ce"
 
@@ -30,33 +30,18 @@ test_products = [
 ]
 
 def test_go_upc_api(upc):
-    """Test Go-UPC API with a single UPC"""
-    url = f"https://go-upc.com/api/v1/code/{upc}"
-    
-    try:
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {GO_UPC_API_KEY}')
-        
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
-            
-            return {
-                'success': True,
-                'data': data
-            }
-    
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode() if e.fp else ""
-        return {
-            'success': False,
-            'error': f'HTTP {e.code}: {e.reason}',
-            'details': error_body
-        }
-    except Exception as e:
+    """Test Go-UPC API with a single UPC (served from the response cache when seen before)"""
+    record = fetch_record('go_upc', upc, key=GO_UPC_API_KEY)
+    if record.status == 200:
         return {
-            'success': False,
-            'error': str(e)
+            'success': True,
+            'data': record.raw,
+            'cached': record.cached
         }
+    return {
+        'success': False,
+        'error': record.error
+    }
 
 def main():
     """Run Go-UPC API tests on the same 15 products"""
@@ -129,8 +114,8 @@ def main():
                 'success': False
             })
         
-        # Small delay to avoid rate limiting
-        if i < len(test_products):
+        # Small delay to avoid rate limiting (cached results cost nothing)
+        if i < len(test_products) and not result.get('cached'):
             time.sleep(0.5)
     
     # Save results
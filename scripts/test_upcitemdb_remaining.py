@@ -1,7 +1,7 @@
-import urllib.request
-import urllib.error
 import json
-import time
+
+from lookup_engine import fetch_record
+from product_results import ingest_file
 
 # The 4 UPC codes that hit rate limit on UPCitemdb (items 7-10)
 remaining_upcs = [
@@ -41,91 +41,75 @@ for i, (upc, name) in enumerate(zip(remaining_upcs, product_names), 7):
     print(f"\nTesting {i}/10: {name}")
     print(f"UPC: {upc}")
     
-    try:
-        # Using the free trial endpoint
-        url = f"https://api.upcitemdb.com/prod/trial/lookup?upc={upc}"
-        req = urllib.request.Request(url, headers={'Accept': 'application/json'})
-        
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
-            
-            if data.get('items') and len(data['items']) > 0:
-                item = data['items'][0]
-                result = {
-                    'found': True,
-                    'upc': upc,
-                    'name': name,
-                    'title': item.get('title', 'N/A'),
-                    'brand': item.get('brand', 'N/A'),
-                    'images': item.get('images', []),
-                    'image_count': len(item.get('images', []))
-                }
-                print(f"  [OK] Found: {result['title'][:60]}...")
-                print(f"  Brand: {result['brand']}")
-                print(f"  Images: {result['image_count']}")
-            else:
-                result = {
-                    'found': False,
-                    'upc': upc,
-                    'name': name,
-                    'title': 'Not Found',
-                    'brand': 'N/A',
-                    'images': [],
-                    'image_count': 0
-                }
-                print(f"  [X] Not found in database")
-            
-            results.append(result)
-            
-    except urllib.error.HTTPError as e:
-        if e.code == 429:
-            result = {
-                'found': False,
-                'upc': upc,
-                'name': name,
-                'title': 'Rate Limited',
-                'brand': 'N/A',
-                'images': [],
-                'image_count': 0,
-                'error': 'Rate Limited'
-            }
-            print(f"  [X] Rate Limited (HTTP 429)")
-        else:
-            result = {
-                'found': False,
-                'upc': upc,
-                'name': name,
-                'title': f'HTTP Error {e.code}',
-                'brand': 'N/A',
-                'images': [],
-                'image_count': 0,
-                'error': f'HTTP {e.code}'
-            }
-            print(f"  [X] HTTP Error {e.code}")
-        results.append(result)
-        
-    except Exception as e:
+    # Free trial endpoint (very limited) - the shared rate limiter paces the calls
+    record = fetch_record('upcitemdb', upc)
+    if record.found:
+        result = {
+            'found': True,
+            'upc': upc,
+            'name': name,
+            'title': record.title or 'N/A',
+            'brand': record.brand or 'N/A',
+            'images': list(record.images),
+            'image_count': len(record.images)
+        }
+        print(f"  [OK] Found: {result['title'][:60]}...")
+        print(f"  Brand: {result['brand']}")
+        print(f"  Images: {result['image_count']}")
+    elif record.found is None:
         result = {
             'found': False,
             'upc': upc,
             'name': name,
-            'title': f'Error: {str(e)}',
+            'title': 'Rate Limited',
             'brand': 'N/A',
             'images': [],
             'image_count': 0,
-            'error': str(e)
+            'error': 'Rate Limited'
         }
-        results.append(result)
-        print(f"  [X] Error: {e}")
-    
-    # Be conservative with rate limiting - wait 3 seconds between requests
-    if i < 10:
-        print("  [...] Waiting 3 seconds before next request...")
-        time.sleep(3)
+        print(f"  [X] Rate Limited (HTTP 429)")
+    elif record.error == 'Not found':
+        result = {
+            'found': False,
+            'upc': upc,
+            'name': name,
+            'title': 'Not Found',
+            'brand': 'N/A',
+            'images': [],
+            'image_count': 0
+        }
+        print(f"  [X] Not found in database")
+    elif record.status:
+        result = {
+            'found': False,
+            'upc': upc,
+            'name': name,
+            'title': f'HTTP Error {record.status}',
+            'brand': 'N/A',
+            'images': [],
+            'image_count': 0,
+            'error': f'HTTP {record.status}'
+        }
+        print(f"  [X] HTTP Error {record.status}")
+    else:
+        result = {
+            'found': False,
+            'upc': upc,
+            'name': name,
+            'title': f'Error: {record.error}',
+            'brand': 'N/A',
+            'images': [],
+            'image_count': 0,
+            'error': record.error
+        }
+        print(f"  [X] Error: {record.error}")
+    results.append(result)
 
 # Save results
 with open('upcitemdb_retest_results.json', 'w', encoding='utf-8') as f:
     json.dump(results, f, indent=2)
+# Record the run in the product-results store
+ingest_file('upcitemdb_retest_results.json')
 
 print()
 print("=" * 80)
@@ -0,0 +1,397 @@
+"""
+Shared UPC provider definitions - UPCitemdb, OpenFoodFacts, Barcode Lookup, Go-UPC and Apify
+Each provider knows how to build its lookup request and how to turn the JSON
+payload into the (found, product_name, source) tuple used by the verifiers.
+Providers that accept several codes per request (UPCitemdb paid plan, Apify)
+also know how to build a batch request and split the answer back per code.
+Comparison scripts get a ProductRecord per provider instead of hand-mapping
+each API's JSON.
+"""
+
+import os
+import copy
+import json
+import time
+import urllib.request
+from collections import namedtuple
+import urllib.error
+
+import http_transport
+from gtin import to_gtin14
+from telemetry import get_telemetry
+
+# API Keys - read from the environment so they stay out of the repo
+BARCODE_LOOKUP_KEY = os.environ.get('BARCODE_LOOKUP_API_KEY', '')
+GO_UPC_KEY = os.environ.get('GO_UPC_API_KEY', '')
+UPCITEMDB_KEY = os.environ.get('UPCITEMDB_API_KEY', '')
+APIFY_TOKEN = os.environ.get('APIFY_API_TOKEN', '')
+
+APIFY_ACTOR = 's-r~ean-product-image-search---extract-images-from-any-ean-gtin'
+
+DEFAULT_TIMEOUT = 10
+
+# One provider's answer for one GTIN, normalized across APIs
+ProductRecord = namedtuple('ProductRecord', [
+    'gtin', 'provider', 'source', 'found', 'title', 'brand', 'category', 'description',
+    'images', 'status', 'error', 'elapsed_ms', 'cached', 'raw',
+], defaults=('', '', '', '', (), None, '', 0.0, False, None))
+
+
+class Provider:
+    """A single UPC lookup API: request builder plus payload parser"""
+
+    def __init__(self, name, source, url_template, headers=None, parse=None,
+                 key=None, concurrency=2, timeout=DEFAULT_TIMEOUT,
+                 batch_size=1, build_batch=None, split_batch=None, describe=None,
+                 billed_per_code=False):
+        self.name = name
+        self.source = source
+        self.url_template = url_template
+        self.headers = headers or {}
+        self.parse = parse
+        self.key = key
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.build_batch = build_batch
+        self.split_batch = split_batch
+        self.describe = describe
+        # Plan quota counts every code looked up, not every request - a batch of
+        # ten spends ten rate-limit tokens
+        self.billed_per_code = billed_per_code
+
+    def with_key(self, key):
+        """Copy of this provider using a different API key"""
+        provider = copy.copy(self)
+        provider.key = key
+        return provider
+
+    @property
+    def supports_batch(self):
+        return self.batch_size > 1 and self.build_batch is not None
+
+    @property
+    def enabled(self):
+        """Providers with a key slot are only usable once the key is set"""
+        return self.key is None or bool(self.key)
+
+    def request_headers(self):
+        return {name: value.format(key=self.key or '') for name, value in self.headers.items()}
+
+    def build_request(self, upc_code):
+        if self.supports_batch and not self.url_template:
+            return self.build_batch(self, [upc_code])
+        url = self.url_template.format(upc=upc_code, key=self.key or '')
+        return urllib.request.Request(url, headers=self.request_headers())
+
+    def _send(self, req, timeout):
+        # Every provider call lands in the per-provider telemetry histograms
+        started = time.perf_counter()
+        try:
+            response = http_transport.urlopen(req, timeout=timeout or self.timeout)
+        except urllib.error.HTTPError as e:
+            get_telemetry().observe_request(self.name, e.code, getattr(e, 'timings', {}))
+            return e.code, None, e.headers
+        except Exception:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            get_telemetry().observe_request(self.name, None, {'total_ms': elapsed_ms})
+            raise
+        # Recorded once the response is in - a body that isn't JSON still raises, but
+        # the exchange itself was a success and is counted under its status only
+        get_telemetry().observe_request(self.name, response.status, response.timings)
+        return response.status, json.loads(response.read().decode()), response.headers
+
+    def fetch(self, upc_code, timeout=None):
+        """
+        Perform the HTTP lookup for one UPC
+
+        Returns: (status_code, payload, headers) - payload is the decoded JSON or None
+        """
+        if self.supports_batch and not self.url_template:
+            status, payloads, headers = self.fetch_batch([upc_code], timeout)
+            return status, payloads.get(upc_code), headers
+        return self._send(self.build_request(upc_code), timeout)
+
+    def fetch_batch(self, upc_codes, timeout=None):
+        """
+        Look up several UPCs in one request
+
+        Returns: (status_code, {upc: payload}, headers) - each payload has the same
+        shape a single lookup would return, so parse() and the cache treat them alike
+        """
+        status, data, headers = self._send(self.build_batch(self, upc_codes), timeout)
+        if status != 200 or data is None:
+            return status, {}, headers
+        return status, self.split_batch(data, upc_codes), headers
+
+    def interpret(self, status, data):
+        """
+        Turn a fetched response into the verifier result tuple
+        Returns: (found: bool or None when rate limited, product_name: str, source: str)
+        """
+        if status == 429:
+            return None, 'Rate limit reached', self.source
+        if status != 200 or not data:
+            return False, '', 'Not found'
+        return self.parse(data)
+
+    def record(self, gtin, status, data, error='', elapsed_ms=0.0, cached=False):
+        """
+        Turn a fetched response into a ProductRecord
+        found is None when rate limited; error says why nothing was found
+        """
+        found, name, source = self.interpret(status, data)
+        fields = self.describe(data) if found and self.describe else {}
+        if found:
+            error = ''
+        elif found is None:
+            error = name
+        elif not error:
+            error = f"HTTP {status}" if status and status != 200 else 'Not found'
+        return ProductRecord(
+            gtin, self.name, self.source, found,
+            title=fields.get('title') or (name if found else ''),
+            brand=fields.get('brand') or '',
+            category=fields.get('category') or '',
+            description=fields.get('description') or '',
+            images=tuple(fields.get('images') or ()),
+            status=status, error=error, elapsed_ms=elapsed_ms, cached=cached, raw=data,
+        )
+
+
+def _full_name(brand, name):
+    full_name = f"{brand} {name}" if brand else name
+    return full_name.strip()
+
+
+def parse_upcitemdb(data):
+    if data.get('code') == 'OK' and data.get('items'):
+        item = data['items'][0]
+        title = item.get('title', 'Product found')
+        return True, _full_name(item.get('brand', ''), title), 'UPCitemdb'
+    return False, '', 'Not found'
+
+
+def parse_openfoodfacts(data):
+    if data.get('status') == 1 and data.get('product'):
+        product = data['product']
+        name = product.get('product_name', '')
+        if name:
+            return True, _full_name(product.get('brands', ''), name), 'OpenFoodFacts'
+    return False, '', 'Not found'
+
+
+def parse_barcode_lookup(data):
+    if data.get('products'):
+        product = data['products'][0]
+        title = product.get('title', '')
+        if title:
+            return True, _full_name(product.get('brand', ''), title), 'Barcode Lookup'
+    return False, '', 'Not found'
+
+
+def parse_go_upc(data):
+    product = data.get('product') or {}
+    name = product.get('name', '')
+    if name:
+        return True, _full_name(product.get('brand', ''), name), 'Go-UPC'
+    return False, '', 'Not found'
+
+
+def parse_apify(data):
+    for item in data.get('items', []):
+        if item.get('title'):
+            return True, item['title'].strip(), 'Apify'
+    return False, '', 'Not found'
+
+
+def describe_upcitemdb(data):
+    item = data['items'][0]
+    return {
+        'title': item.get('title'),
+        'brand': item.get('brand'),
+        'category': item.get('category'),
+        'description': item.get('description'),
+        'images': item.get('images'),
+    }
+
+
+def describe_openfoodfacts(data):
+    product = data['product']
+    return {
+        'title': product.get('product_name'),
+        'brand': product.get('brands'),
+        'category': product.get('categories'),
+        'description': product.get('generic_name'),
+        'images': [product['image_url']] if product.get('image_url') else [],
+    }
+
+
+def describe_barcode_lookup(data):
+    product = data['products'][0]
+    return {
+        'title': product.get('title'),
+        'brand': product.get('brand'),
+        'category': product.get('category'),
+        'description': product.get('description'),
+        'images': product.get('images'),
+    }
+
+
+def describe_go_upc(data):
+    product = data['product']
+    return {
+        'title': product.get('name'),
+        'brand': product.get('brand'),
+        'category': product.get('category'),
+        'description': product.get('description'),
+        'images': [product['imageUrl']] if product.get('imageUrl') else [],
+    }
+
+
+def describe_apify(data):
+    items = [item for item in data['items'] if item.get('title')]
+    return {
+        'title': items[0]['title'].strip(),
+        'images': [item['image_url'] for item in data['items'] if item.get('image_url')],
+    }
+
+
+def _json_request(url, body, headers):
+    headers = dict(headers)
+    headers['Content-Type'] = 'application/json'
+    return urllib.request.Request(url, data=json.dumps(body).encode('utf-8'),
+                                  headers=headers, method='POST')
+
+
+def build_upcitemdb_batch(provider, upc_codes):
+    # Paid plan: comma-separated UPCs in one POST
+    return _json_request('https://api.upcitemdb.com/prod/v1/lookup',
+                         {'upc': ','.join(upc_codes)}, provider.request_headers())
+
+
+def split_upcitemdb_batch(data, upc_codes):
+    wanted = {to_gtin14(code): code for code in upc_codes}
+    payloads = {code: {'code': data.get('code'), 'total': 0, 'items': []} for code in upc_codes}
+    for item in data.get('items', []):
+        for field in ('upc', 'ean', 'gtin'):
+            code = wanted.get(to_gtin14(item.get(field, '')))
+            if code:
+                payloads[code]['items'].append(item)
+                payloads[code]['total'] += 1
+                break
+    return payloads
+
+
+def build_apify_batch(provider, upc_codes):
+    # run-sync-get-dataset-items starts the actor and returns its dataset in one call
+    url = (f"https://api.apify.com/v2/acts/{APIFY_ACTOR}/run-sync-get-dataset-items"
+           f"?token={provider.key}")
+    return _json_request(url, {'eanCodes': [to_gtin14(code)[1:] for code in upc_codes]},
+                         provider.request_headers())
+
+
+def split_apify_batch(data, upc_codes):
+    wanted = {to_gtin14(code): code for code in upc_codes}
+    payloads = {code: {'items': []} for code in upc_codes}
+    for item in data:
+        code = wanted.get(to_gtin14(item.get('ean', '')))
+        if code:
+            payloads[code]['items'].append(item)
+    return payloads
+
+
+PROVIDERS = {
+    'upcitemdb': Provider(
+        'upcitemdb', 'UPCitemdb',
+        'https://api.upcitemdb.com/prod/trial/lookup?upc={upc}',
+        headers={
+            'Accept': 'application/json',
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        },
+        parse=parse_upcitemdb,
+        describe=describe_upcitemdb,
+        concurrency=2,
+    ),
+    'openfoodfacts': Provider(
+        'openfoodfacts', 'OpenFoodFacts',
+        'https://world.openfoodfacts.org/api/v0/product/{upc}.json',
+        headers={'User-Agent': 'PalmersUPCScanner/1.0 (Non-commercial research)'},
+        parse=parse_openfoodfacts,
+        describe=describe_openfoodfacts,
+        concurrency=4,
+    ),
+    'barcode_lookup': Provider(
+        'barcode_lookup', 'Barcode Lookup',
+        'https://api.barcodelookup.com/v3/products?barcode={upc}&key={key}',
+        headers={'Accept': 'application/json'},
+        parse=parse_barcode_lookup,
+        describe=describe_barcode_lookup,
+        key=BARCODE_LOOKUP_KEY,
+        concurrency=8,
+    ),
+    'go_upc': Provider(
+        'go_upc', 'Go-UPC',
+        'https://go-upc.com/api/v1/code/{upc}',
+        headers={'Authorization': 'Bearer {key}'},
+        parse=parse_go_upc,
+        describe=describe_go_upc,
+        key=GO_UPC_KEY,
+        concurrency=8,
+    ),
+    # Paid UPCitemdb plan - same payloads as the trial endpoint, but batched
+    'upcitemdb_paid': Provider(
+        'upcitemdb_paid', 'UPCitemdb',
+        'https://api.upcitemdb.com/prod/v1/lookup?upc={upc}',
+        headers={
+            'Accept': 'application/json',
+            'user_key': '{key}',
+            'key_type': '3scale'
+        },
+        parse=parse_upcitemdb,
+        describe=describe_upcitemdb,
+        key=UPCITEMDB_KEY,
+        concurrency=4,
+        batch_size=10,
+        build_batch=build_upcitemdb_batch,
+        split_batch=split_upcitemdb_batch,
+        billed_per_code=True,
+    ),
+    # Batch-only: one actor run per group of EANs (see test_apify_ean_extractor.py)
+    'apify': Provider(
+        'apify', 'Apify',
+        None,
+        parse=parse_apify,
+        describe=describe_apify,
+        key=APIFY_TOKEN,
+        concurrency=2,
+        timeout=300,
+        batch_size=100,
+        build_batch=build_apify_batch,
+        split_batch=split_apify_batch,
+    ),
+}
+
+# Free providers - the engine's default order; a verifier that prefers another passes its own
+FREE_PROVIDERS = ('upcitemdb', 'openfoodfacts')
+
+
+def get_providers(names, keys=None):
+    """
+    Resolve provider names to Provider objects, skipping ones without keys
+
+    Args:
+        names: provider names, in lookup order
+        keys: optional dict of provider name -> API key overriding the environment
+    """
+    keys = keys or {}
+    providers = []
+    for name in names:
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown provider: {name}")
+        provider = PROVIDERS[name]
+        if keys.get(name):
+            provider = provider.with_key(keys[name])
+        if provider.enabled:
+            providers.append(provider)
+    return providers
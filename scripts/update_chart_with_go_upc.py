@@ -1,78 +1,42 @@
-import json
-import re
+from chart_renderer import find_column, load_chart_data, render_chart, save_chart_data
+from product_results import ProductResults
 
-# Load Go-UPC test results
-with open('../json-data/go_upc_15_products_test.json', 'r', encoding='utf-8') as f:
-    go_upc_data = json.load(f)
 
-# Create a mapping of EAN to product data
-ean_to_data = {}
-for item in go_upc_data:
-    ean = item['ean']
-    ean_to_data[ean] = item
-
-# Read the HTML file
-with open('../API_Compare_Chart.html', 'r', encoding='utf-8') as f:
-    html_content = f.read()
-
-# Function to create Go-UPC column HTML
 def create_go_upc_column(data):
-    # Escape any special characters in description
-    description = data['description'].replace('"', '&quot;').replace("'", "&#39;")
-    
-    return f'''                <div class="api-column go-upc">
-                    <div class="api-name" style="background: linear-gradient(135deg, #757575 0%, #9e9e9e 100%); color: white; padding: 8px; border-radius: 5px; font-weight: bold; margin-bottom: 10px;">Go-UPC API</div>
-                    <div class="api-title">{data['api_name']}</div>
-                    <div class="not-found" style="background: #fff3cd; border: 2px solid #ffc107; color: #856404;">
-                        ⚠️ No Images<br>
-                        <small>Go-UPC provides data but no product images</small>
-                    </div>
-                    <div class="product-details">
-                        <h4>Product Details</h4>
-                        <div class="detail-row"><span class="detail-label">Brand:</span> <span class="detail-value">{data['brand']}</span></div>
-                        <div class="detail-row"><span class="detail-label">Category:</span> <span class="detail-value">{data['category']}</span></div>
-                        <div class="description-text">{description}</div>
-                    </div>
-                </div>'''
-
-# List of EANs in order (from the chart)
-eans = [
-    "0711381332580",  # 1. Stonewall Kitchen
-    "0849455000032",  # 2. Tumaro's Wraps
-    "0858183005059",  # 3. Lillie's Q
-    "0820581153908",  # 4. Bella Maria
-    "0819046000420",  # 5. Inka Giant Corn
-    "0818617022571",  # 6. Suja Immunity
-    "0186011000182",  # 7. Stella & Chewy's
-    "0312547171670",  # 8. Benadryl
-    "0852466006016",  # 9. Simply Gum
-    "0824150401162",  # 10. POM Wonderful
-    "0753656710990",  # 11. Think Thin
-    "0742676400592",  # 12. Trot Dancing Leaves
-    "0810089955197",  # 13. Collagen Creamer
-    "0818290019592",  # 14. Chobani Coffee
-    "0850017604032",  # 15. Drumroll Chocolate
-]
-
-# For each EAN, find the corresponding section and add the Go-UPC column
-for i, ean in enumerate(eans, 1):
-    data = ean_to_data[ean]
-    go_upc_column = create_go_upc_column(data)
+    """Chart data for a Go-UPC column"""
+    image_url = data.get('imageUrl', '')
+    return {
+        'provider': 'go-upc',
+        'winner': False,
+        'title': data['api_name'],
+        'images': [image_url] if image_url else [],
+        'image_info': ['Resolution: Unknown', '✓ 1 image available'] if image_url else [],
+        'details': [['Brand', data['brand']], ['Category', data['category']]],
+        'description': data['description'],
+    }
+
+chart = load_chart_data()
+
+# Latest Go-UPC result for every product in the chart
+with ProductResults() as store:
+    results = store.products([product['ean13'] for product in chart['products']], ('go_upc',))
+
+# Add (or replace) the Go-UPC column of every product Go-UPC was tested on
+for product in chart['products']:
+    data = results[product['ean13']].get('go_upc')
+    if data is None:
+        continue
     
-    # Find the section with this EAN
-    # Pattern: Find the section ending with UPCitemdb's closing </div>, before the closing </div> of image-comparison
-    pattern = rf'(<span class="ean-code">EAN: {re.escape(ean)}</span>.*?</div>\s*</div>\s*)(</div>\s*</div>\s*</div>)'
-    
-    # Find this pattern and insert Go-UPC column before the last closing divs
-    def replace_func(match):
-        return match.group(1) + go_upc_column + '\n            ' + match.group(2)
-    
-    html_content = re.sub(pattern, replace_func, html_content, count=1, flags=re.DOTALL)
-    print(f"Added Go-UPC column for product {i} (EAN: {ean})")
-
-# Write the updated HTML
-with open('../API_Compare_Chart.html', 'w', encoding='utf-8') as f:
-    f.write(html_content)
-
-print("\nSuccessfully updated API_Compare_Chart.html with Go-UPC columns for all 15 products!")
-
+    column = create_go_upc_column(data)
+    existing = find_column(product, 'go-upc')
+    if existing is None:
+        product['columns'].append(column)
+    else:
+        existing.clear()
+        existing.update(column)
+    print(f"Added Go-UPC column for product {product['row']} (EAN: {product['ean13']})")
+
+save_chart_data(chart)
+rendered, reused = render_chart(chart)
+
+print(f"\nSuccessfully updated API_Compare_Chart.html with Go-UPC columns ({rendered} cards re-rendered)")
@@ -1,22 +1,6 @@
 import json
 
-# Load the Apify results
-with open('apify_dataset_results.json', 'r', encoding='utf-8') as f:
-    apify_results = json.load(f)
-
-# Create a lookup of EAN to Apify result
-apify_lookup = {}
-for result in apify_results:
-    ean = result['ean']
-    apify_lookup[ean] = {
-        'found': True,
-        'title': result['title'],
-        'image_url': result['image_url'],
-        'image_count': 1,  # This dataset shows 1 image per item
-        'width': result['width'],
-        'height': result['height'],
-        'size_bytes': result['size_bytes']
-    }
+from product_results import ProductResults
 
 # Our 10 test EANs
 test_eans = [
@@ -32,6 +16,26 @@ test_eans = [
     "0824150401162"
 ]
 
+# Latest Apify result for each EAN from the product-results store
+with ProductResults() as store:
+    results = store.products(test_eans, ('apify',))
+
+# Create a lookup of EAN to Apify result
+apify_lookup = {}
+for ean in test_eans:
+    result = results[ean].get('apify')
+    if result is None:
+        continue
+    apify_lookup[ean] = {
+        'found': True,
+        'title': result['title'],
+        'image_url': result['image_url'],
+        'image_count': 1,  # This dataset shows 1 image per item
+        'width': result['width'],
+        'height': result['height'],
+        'size_bytes': result['size_bytes']
+    }
+
 print("Apify Results for 10 Test EAN Codes:")
 print("=" * 80)
 
@@ -1,9 +1,6 @@
-import json
 import re
 
-# Load UPCitemdb images
-with open('upcitemdb_all_images.json', 'r') as f:
-    upcitemdb_data = json.load(f)
+from product_results import ProductResults
 
 def get_resolution_from_url(url):
     """Extract resolution from URL if available"""
@@ -42,11 +39,15 @@ products = {
     "0824150401162": 10,  # POM
 }
 
+# Latest UPCitemdb result for each product from the product-results store
+with ProductResults() as store:
+    results = store.products(products, ('upcitemdb',))
+
 print("UPCitemdb Image URLs for HTML:")
 print("=" * 80)
 for ean, product_num in products.items():
-    if ean in upcitemdb_data:
-        data = upcitemdb_data[ean]
+    data = results[ean].get('upcitemdb')
+    if data is not None:
         if data['images']:
             first_image = data['images'][0]
             resolution = get_resolution_from_url(first_image)
@@ -1,6 +1,7 @@
-import csv
 import re
 
+from master_list import load_master_list
+
 # Read the HTML file
 html_file = 'API_Image_Comparison.html'
 with open(html_file, 'r', encoding='utf-8') as f:
@@ -21,26 +22,8 @@ for match in ean_matches:
 
 print(f"Converted to {len(ean_to_upc)} UPC codes")
 
-# Read the master list and build UPC -> Item Name mapping
-master_list_file = 'palmers-barcodes-master-list-with-upc-check.csv'
-upc_to_name = {}
-
-with open(master_list_file, 'r', encoding='utf-8') as f:
-    reader = csv.reader(f)
-    header = next(reader)
-    
-    # Column 1 is Item ID (which contains UPC), Column 3 is Item Name
-    upc_col = 1
-    name_col = 3
-    
-    for row in reader:
-        if len(row) > max(upc_col, name_col):
-            upc = row[upc_col].strip()
-            item_name = row[name_col].strip() if len(row) > name_col else ""
-            
-            # Only store if we have a valid UPC and name
-            if upc and item_name and upc.isdigit() and len(upc) == 12:
-                upc_to_name[upc] = item_name
+# Load the indexed master list (UPC -> Item Name for valid UPCs)
+upc_to_name = load_master_list().upc_to_name()
 
 print(f"Loaded {len(upc_to_name)} products from master list")
 
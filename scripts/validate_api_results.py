@@ -4,30 +4,74 @@ This script validates that API-returned product names match our expected product
 """
 
 import csv
+import sys
 import json
-from difflib import SequenceMatcher
+import time
+from array import array
 
-def load_master_list(csv_file='../palmers-barcodes-master-list-with-upc-check.csv'):
+import master_list
+from name_matcher import get_name_matcher
+from department_classifier import get_department_classifier, normalize_department
+
+def load_master_list(csv_file=master_list.MASTER_LIST_CSV):
     """Load the master product list and create UPC -> Product Name mapping"""
-    upc_to_product = {}
-    
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        
-        for row in reader:
-            if len(row) > 3:
-                upc = row[1].strip()  # Column 1: Item ID (UPC)
-                product_name = row[3].strip()  # Column 3: Item Name
-                
-                if upc and product_name and upc.isdigit() and len(upc) == 12:
-                    upc_to_product[upc] = product_name
-    
-    return upc_to_product
+    return master_list.load_master_list(csv_file).upc_to_name()
 
 def calculate_similarity(str1, str2):
-    """Calculate similarity ratio between two strings (0-1, where 1 is identical)"""
-    return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
+    """
+    Calculate similarity between two product names (0-1, where 1 is identical)
+
+    Token/trigram TF-IDF cosine over the master list's vocabulary, calibrated to
+    the probability that both names are the same product (see name_matcher)
+    """
+    return get_name_matcher().similarity(str1, str2)
+
+def find_master_matches(api_product_name, k=5):
+    """
+    Master-list items whose names best match an API product name
+
+    Returns: list of name_matcher.Match (index, upc, name, score), best first
+    """
+    return get_name_matcher().top_k(api_product_name, k)
+
+STATUSES = ('MATCH', 'PARTIAL_MATCH', 'NO_MATCH', 'CRITICAL_MISMATCH', 'UPC_NOT_FOUND')
+MATCH_THRESHOLD = 0.7
+
+def master_department(upc, master_product_name):
+    """Master-list department of a UPC, or the classifier's guess from its name"""
+    master = master_list.load_master_list()
+    i = master.find(upc)
+    # Blank and junk labels ('Department Name', 'New item Insert') normalize to ''
+    department = normalize_department(master.value('department', i)) if i is not None else ''
+    return department or get_department_classifier().predict(master_product_name)[0]
+
+def is_category_mismatch(api_product_name, department):
+    """
+    True when the API title confidently belongs to a different kind of product
+    than the master department (a cable for a yogurt) - see department_classifier
+    """
+    return get_department_classifier().is_mismatch(api_product_name, department)
+
+def classify_result(similarity, category_mismatch, threshold=0.3):
+    """Validation status for a similarity score and category check"""
+    if category_mismatch:
+        return 'CRITICAL_MISMATCH'
+    if similarity >= MATCH_THRESHOLD:
+        return 'MATCH'
+    if similarity >= threshold:
+        return 'PARTIAL_MATCH'
+    return 'NO_MATCH'
+
+def status_message(status, similarity):
+    if status == 'CRITICAL_MISMATCH':
+        return "Category mismatch! API product belongs to a different department than expected"
+    if status == 'MATCH':
+        return f"Good match (similarity: {similarity:.2%})"
+    if status == 'PARTIAL_MATCH':
+        return f"Partial match (similarity: {similarity:.2%}) - Review recommended"
+    if status == 'NO_MATCH':
+        return f"Poor match (similarity: {similarity:.2%}) - Likely wrong product"
+    return 'UPC not found in master list'
 
 def validate_api_response(upc, api_product_name, master_product_name, api_name, threshold=0.3):
     """
@@ -45,48 +89,191 @@ def validate_api_response(upc, api_product_name, master_product_name, api_name,
     """
     similarity = calculate_similarity(api_product_name, master_product_name)
     
-    # Check for major category mismatches (e.g., food vs electronics)
-    food_keywords = ['food', 'snack', 'drink', 'juice', 'yogurt', 'protein', 'organic', 
-                     'chocolate', 'cookie', 'wrap', 'sauce', 'gum', 'tea', 'coffee']
-    electronics_keywords = ['cable', 'connector', 'ethernet', 'rj45', 'usb', 'adapter', 
-                           'network', 'computer', 'electronic']
-    
-    master_lower = master_product_name.lower()
-    api_lower = api_product_name.lower()
-    
-    master_is_food = any(keyword in master_lower for keyword in food_keywords)
-    api_is_food = any(keyword in api_lower for keyword in food_keywords)
-    
-    master_is_electronics = any(keyword in master_lower for keyword in electronics_keywords)
-    api_is_electronics = any(keyword in api_lower for keyword in electronics_keywords)
+    # Check for major category mismatches (e.g., a dairy item answered with a cable)
+    department = master_department(upc, master_product_name)
+    category_mismatch = is_category_mismatch(api_product_name, department)
+    status = classify_result(similarity, category_mismatch, threshold)
     
-    category_mismatch = False
-    if (master_is_food and api_is_electronics) or (master_is_electronics and api_is_food):
-        category_mismatch = True
-    
-    # Determine validation status
-    if category_mismatch:
-        status = 'CRITICAL_MISMATCH'
-        message = f"Category mismatch! Expected food/beverage, got electronics (or vice versa)"
-    elif similarity >= 0.7:
-        status = 'MATCH'
-        message = f"Good match (similarity: {similarity:.2%})"
-    elif similarity >= threshold:
-        status = 'PARTIAL_MATCH'
-        message = f"Partial match (similarity: {similarity:.2%}) - Review recommended"
-    else:
-        status = 'NO_MATCH'
-        message = f"Poor match (similarity: {similarity:.2%}) - Likely wrong product"
-    
-    return {
+    result = {
         'upc': upc,
         'api_name': api_name,
         'expected_product': master_product_name,
         'api_product': api_product_name,
+        'expected_department': department,
         'similarity_score': similarity,
         'status': status,
-        'message': message
+        'message': status_message(status, similarity)
     }
+    
+    # For wrong products, name the master item the API title actually looks like
+    if status == 'CRITICAL_MISMATCH':
+        result['api_department'] = get_department_classifier().predict(api_product_name)[0]
+    if status in ('CRITICAL_MISMATCH', 'NO_MATCH') and api_product_name:
+        matches = find_master_matches(api_product_name, k=1)
+        if matches and matches[0].score >= threshold:
+            result['closest_master_upc'] = matches[0].upc
+            result['closest_master_product'] = matches[0].name
+    
+    return result
+
+class ValidationTable:
+    """
+    Compact columnar result of validate_batch - parallel arrays, one entry per
+    input row; row(i) expands an entry into the validate_api_response dict
+    """
+    
+    def __init__(self, master, threshold):
+        self.master = master
+        self.threshold = threshold
+        self.upcs = []
+        self.providers = []
+        self.api_products = []
+        self.master_rows = array('i')
+        self.departments = []
+        self.scores = array('f')
+        self.status_codes = bytearray()
+    
+    def __len__(self):
+        return len(self.status_codes)
+    
+    def append(self, upc, provider, api_product, master_row, score, status, department=''):
+        self.upcs.append(upc)
+        self.providers.append(provider)
+        self.api_products.append(api_product)
+        self.master_rows.append(master_row)
+        self.departments.append(department)
+        self.scores.append(score)
+        self.status_codes.append(STATUSES.index(status))
+    
+    def status(self, i):
+        return STATUSES[self.status_codes[i]]
+    
+    def counts(self):
+        """{status: number of rows}"""
+        return {status: self.status_codes.count(code) for code, status in enumerate(STATUSES)}
+    
+    def where(self, *statuses):
+        """Indexes of the rows with any of the given statuses"""
+        codes = {STATUSES.index(status) for status in statuses}
+        return [i for i, code in enumerate(self.status_codes) if code in codes]
+    
+    def row(self, i, suggest=False):
+        """Entry i as a validate_api_response-style dict"""
+        status = self.status(i)
+        if status == 'UPC_NOT_FOUND':
+            return {
+                'upc': self.upcs[i],
+                'api_name': self.providers[i],
+                'expected_product': 'NOT IN MASTER LIST',
+                'api_product': self.api_products[i],
+                'expected_department': '',
+                'similarity_score': 0,
+                'status': status,
+                'message': status_message(status, 0)
+            }
+        score = self.scores[i]
+        result = {
+            'upc': self.upcs[i],
+            'api_name': self.providers[i],
+            'expected_product': self.master.value('name', self.master_rows[i]),
+            'api_product': self.api_products[i],
+            'expected_department': self.departments[i],
+            'similarity_score': score,
+            'status': status,
+            'message': status_message(status, score)
+        }
+        if status == 'CRITICAL_MISMATCH':
+            result['api_department'] = get_department_classifier().predict(self.api_products[i])[0]
+        if suggest and status in ('CRITICAL_MISMATCH', 'NO_MATCH') and self.api_products[i]:
+            matches = find_master_matches(self.api_products[i], k=1)
+            if matches and matches[0].score >= self.threshold:
+                result['closest_master_upc'] = matches[0].upc
+                result['closest_master_product'] = matches[0].name
+        return result
+    
+    def rows(self, suggest=False):
+        return [self.row(i, suggest) for i in range(len(self))]
+    
+    def write_csv(self, output_file):
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['UPC', 'Provider', 'Status', 'Similarity', 'Expected Product', 'API Product'])
+            for i in range(len(self)):
+                expected = (self.master.value('name', self.master_rows[i])
+                            if self.master_rows[i] >= 0 else '')
+                writer.writerow([self.upcs[i], self.providers[i], self.status(i),
+                                 f"{self.scores[i]:.3f}", expected, self.api_products[i]])
+
+def validate_batch(rows, threshold=0.3, master=None):
+    """
+    Validate many API results in one pass
+    
+    Each distinct API title is vectorized and department-classified once, and master
+    names are scored against their prebuilt index vectors, so repeated titles
+    and repeated UPCs cost a dictionary lookup.
+    
+    Args:
+        rows: iterable of (upc, api_product_name, provider) tuples
+        threshold: Minimum similarity score (0-1) to consider a partial match
+        master: MasterList to validate against (the repo's master list by default)
+    
+    Returns:
+        ValidationTable
+    """
+    master = master or master_list.load_master_list()
+    matcher = get_name_matcher()
+    classifier = get_department_classifier()
+    names = master.column('name')
+    departments = master.column('department')
+    table = ValidationTable(master, threshold)
+    
+    vectors = {}
+    posteriors = {}
+    master_departments = {}
+    for upc, api_product_name, provider in rows:
+        i = master.find(upc)
+        if i is None:
+            table.append(upc, provider, api_product_name, -1, 0.0, 'UPC_NOT_FOUND')
+            continue
+        
+        vector = vectors.get(api_product_name)
+        if vector is None:
+            vector = vectors[api_product_name] = matcher.vector(api_product_name)
+            posteriors[api_product_name] = classifier.posterior(api_product_name)
+        if i not in master_departments:
+            master_departments[i] = (normalize_department(departments[i])
+                                     or classifier.predict(names[i])[0])
+        
+        similarity = matcher.calibrate(matcher.cosine_to(vector, i))
+        mismatch = classifier.is_mismatch(api_product_name, master_departments[i],
+                                          posteriors[api_product_name])
+        table.append(upc, provider, api_product_name, i, similarity,
+                     classify_result(similarity, mismatch, threshold), master_departments[i])
+    return table
+
+def read_verification_csv(csv_file):
+    """
+    (upc, Database Product Name, Source) for every verified row of a verification CSV
+
+    Columns are found by header name - palmers-barcodes-verified-with-images.csv,
+    for one, has a Product Image URL column before the UPC, and
+    verify_upc_incremental.py calls the source column 'Data Source'
+    """
+    with open(csv_file, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        # The master list's BOM is carried into the middle of copied headers ('\ufeffItem ID')
+        header = [name.replace('\ufeff', '').strip() for name in next(reader)]
+        header = ['Source' if name == 'Data Source' and 'Source' not in header else name
+                  for name in header]
+        columns = ('Verified in DB', 'Database Product Name', 'Source', 'Item ID')
+        missing = [name for name in columns if name not in header]
+        if missing:
+            raise ValueError(f"{csv_file}: missing column(s) {', '.join(missing)}")
+        verified, name, source, upc = (header.index(name) for name in columns)
+        width = max(verified, name, source, upc)
+        for row in reader:
+            if len(row) > width and row[verified] == 'YES':
+                yield row[upc], row[name], row[source]
 
 def validate_api_results_from_json(json_file, api_name):
     """
@@ -99,41 +286,15 @@ def validate_api_results_from_json(json_file, api_name):
     Returns:
         List of validation results
     """
-    # Load master list
-    master_list = load_master_list()
-    
     # Load API results
     with open(json_file, 'r', encoding='utf-8') as f:
         api_results = json.load(f)
     
-    validation_results = []
-    
-    for result in api_results:
-        upc = result.get('upc', '').strip()
-        api_product_name = result.get('title', result.get('product_name', '')).strip()
-        
-        if upc in master_list:
-            master_product_name = master_list[upc]
-            
-            validation = validate_api_response(
-                upc, 
-                api_product_name, 
-                master_product_name, 
-                api_name
-            )
-            validation_results.append(validation)
-        else:
-            validation_results.append({
-                'upc': upc,
-                'api_name': api_name,
-                'expected_product': 'NOT IN MASTER LIST',
-                'api_product': api_product_name,
-                'similarity_score': 0,
-                'status': 'UPC_NOT_FOUND',
-                'message': 'UPC not found in master list'
-            })
-    
-    return validation_results
+    rows = [(result.get('upc', '').strip(),
+             result.get('title', result.get('product_name', '')).strip(),
+             api_name)
+            for result in api_results]
+    return validate_batch(rows).rows()
 
 def generate_validation_report(validation_results, output_file='validation_report.txt'):
     """Generate a human-readable validation report"""
@@ -178,6 +339,9 @@ def generate_validation_report(validation_results, output_file='validation_repor
             report.append(f"  Expected: {r['expected_product']}")
             report.append(f"  API ({r['api_name']}): {r['api_product']}")
             report.append(f"  Similarity: {r['similarity_score']:.2%}")
+            if r.get('closest_master_upc'):
+                report.append(f"  Closest master item: {r['closest_master_product']} "
+                              f"(UPC {r['closest_master_upc']})")
     
     if partial:
         report.append("\n" + "=" * 80)
@@ -225,8 +389,26 @@ def validate_single_product(upc, api_product_name, api_name):
     master_product_name = master_list[upc]
     return validate_api_response(upc, api_product_name, master_product_name, api_name)
 
+def validate_verification_files(csv_files):
+    """Batch-validate verification CSVs, writing <name>-validation.csv next to each"""
+    for csv_file in csv_files:
+        start_time = time.time()
+        table = validate_batch(read_verification_csv(csv_file))
+        output_file = csv_file.rsplit('.', 1)[0] + '-validation.csv'
+        table.write_csv(output_file)
+        
+        print(f"{csv_file}: {len(table)} verified rows in {time.time() - start_time:.2f}s")
+        for status, count in table.counts().items():
+            print(f"  {status}: {count}")
+        print(f"  Result table saved to: {output_file}")
+
 # Example usage
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # python validate_api_results.py palmers-barcodes-FULL-VERIFICATION.csv [...]
+        validate_verification_files(sys.argv[1:])
+        sys.exit(0)
+    
     print("API Result Validator")
     print("=" * 80)
     print()
@@ -255,4 +437,6 @@ if __name__ == "__main__":
     print("To validate API results from a JSON file, use:")
     print("  results = validate_api_results_from_json('your_api_results.json', 'API Name')")
     print("  generate_validation_report(results)")
+    print("To validate whole verification CSVs in one pass, run:")
+    print("  python validate_api_results.py palmers-barcodes-FULL-VERIFICATION.csv")
 
@@ -0,0 +1,124 @@
+"""
+Append-only verification journal
+Each completed lookup is appended (and fsync'd) as one CSV row, so a crash
+loses nothing and checkpoint cost stays constant per UPC. The file keeps the
+UPC,Found,Product Name,Source layout of the old verification_progress.csv, so
+existing progress files replay as-is. Duplicate rows are resolved last-wins
+and squeezed out by periodic compaction.
+"""
+
+import os
+import csv
+import io
+
+HEADER = ['UPC', 'Found', 'Product Name', 'Source']
+
+# Compact once the journal holds this many superseded rows
+COMPACT_THRESHOLD = 1000
+
+
+class VerificationJournal:
+    """Append-only UPC -> (found, product_name, source) log with replay and compaction"""
+
+    def __init__(self, path, compact_threshold=COMPACT_THRESHOLD):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self.results = {}
+        self._rows = 0
+        self._file = None
+
+    def load(self):
+        """
+        Replay the journal in one streaming pass
+
+        Returns: dict of upc -> (found, product_name, source)
+        """
+        self.results = {}
+        self._rows = 0
+        if os.path.exists(self.path):
+            self._drop_torn_tail()
+            with open(self.path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.reader(f)
+                for row in reader:
+                    if len(row) != len(HEADER) or row == HEADER:
+                        continue
+                    upc, found, product_name, source = row
+                    self.results[upc] = (found == 'True', product_name, source)
+                    self._rows += 1
+        return self.results
+
+    def open(self):
+        """Open the journal for appending, writing the header on a new file"""
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, 'a', encoding='utf-8', newline='')
+        if is_new:
+            self._write_line(HEADER)
+        return self
+
+    def append(self, upc, result):
+        """Durably record one completed lookup"""
+        if self._file is None:
+            self.open()
+        found, product_name, source = result
+        self._write_line([upc, bool(found), product_name, source])
+        self.results[upc] = (bool(found), product_name, source)
+        self._rows += 1
+        if self._rows - len(self.results) >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the journal with one row per UPC, atomically replacing the old file"""
+        was_open = self._file is not None
+        self.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            for upc, (found, product_name, source) in self.results.items():
+                writer.writerow([upc, found, product_name, source])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._rows = len(self.results)
+        if was_open:
+            self.open()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_line(self, row):
+        buf = io.StringIO()
+        csv.writer(buf).writerow(row)
+        self._file.write(buf.getvalue())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _drop_torn_tail(self):
+        # A crash mid-write can leave a partial last row - cut back to the last newline
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b'\n':
+                return
+            pos = size
+            while pos > 0:
+                step = min(4096, pos)
+                pos -= step
+                f.seek(pos)
+                chunk = f.read(step)
+                idx = chunk.rfind(b'\n')
+                if idx != -1:
+                    f.truncate(pos + idx + 1)
+                    return
+            f.truncate(0)
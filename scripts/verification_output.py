@@ -0,0 +1,115 @@
+"""
+Streaming verification CSV output
+Joins the master-list CSV, read one row at a time, with the verification
+results (usually a VerificationJournal's replayed results) and writes the
+joined rows in large buffered chunks. Only the results mapping is held in
+memory, so refreshing the output file mid-run costs one sequential read and
+write - the verifiers use PartialOutput to keep an up-to-date output file
+while they run, and the final write is the same I/O-bound pass.
+"""
+
+import os
+import csv
+import time
+from itertools import islice
+
+OUTPUT_COLUMNS = ('Verified in DB', 'Database Product Name', 'Source')
+
+# Rows handed to the csv writer at a time, and the file buffer they go through
+CHUNK_ROWS = 4096
+WRITE_BUFFER_BYTES = 1 << 20
+
+# Seconds between partial output refreshes during a run
+PARTIAL_OUTPUT_INTERVAL = 60
+
+
+def iter_verification_rows(input_file, results, unchecked_label='NOT CHECKED',
+                           columns=OUTPUT_COLUMNS):
+    """
+    Master-list rows joined with their verification results, header first
+
+    Args:
+        results: dict of upc -> (found, product_name, source)
+        unchecked_label: Verified column for valid UPCs without a result yet
+        columns: names of the three result columns, replacing Valid UPC Format
+
+    Rows come out in master-list order, so the same results always give the same file
+    """
+    with open(input_file, 'r', encoding='utf-8', newline='') as f_in:
+        reader = csv.reader(f_in)
+        header = next(reader)
+        yield list(columns) + header[1:]
+
+        for row in reader:
+            if not row or len(row) <= 1:
+                continue
+            result = results.get(row[1])
+            if result is not None:
+                found, product_name, source = result
+                yield ['YES' if found else 'NO', product_name, source] + row[1:]
+            elif row[0] == 'YES':
+                yield [unchecked_label, '', ''] + row[1:]
+            else:
+                yield ['NO', 'Invalid UPC format', ''] + row[1:]
+
+
+def write_rows(rows, output_file):
+    """
+    Write an iterable of CSV rows through a large buffer, atomically replacing output_file
+
+    Readers of output_file see the previous complete file until the new one is done.
+    Returns: number of rows written
+    """
+    tmp_path = f"{output_file}.{os.getpid()}.tmp"
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_BYTES) as f_out:
+        writer = csv.writer(f_out)
+        for chunk in iter(lambda: list(islice(rows, CHUNK_ROWS)), []):
+            writer.writerows(chunk)
+            count += len(chunk)
+    os.replace(tmp_path, output_file)
+    return count
+
+
+def write_verification_csv(input_file, output_file, verification_results,
+                           unchecked_label='NOT CHECKED', columns=OUTPUT_COLUMNS):
+    """
+    Write the master list with Verified in DB / Database Product Name / Source columns
+
+    Returns: number of data rows written
+    """
+    rows = iter_verification_rows(input_file, verification_results, unchecked_label, columns)
+    return write_rows(rows, output_file) - 1
+
+
+class PartialOutput:
+    """
+    Keeps a verification output file current while a run is still going
+
+    Call update() after each result; the file is rewritten at most once per
+    interval seconds. finish() writes the final file.
+    """
+
+    def __init__(self, input_file, output_file, results, interval=PARTIAL_OUTPUT_INTERVAL,
+                 unchecked_label='NOT CHECKED', columns=OUTPUT_COLUMNS):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.results = results
+        self.interval = interval
+        self.unchecked_label = unchecked_label
+        self.columns = columns
+        self._last_write = time.monotonic()
+
+    def update(self):
+        """Rewrite the output if the interval has passed; True if it was written"""
+        if time.monotonic() - self._last_write < self.interval:
+            return False
+        self.finish()
+        return True
+
+    def finish(self):
+        """Write the output now; returns the number of data rows"""
+        count = write_verification_csv(self.input_file, self.output_file, self.results,
+                                       self.unchecked_label, self.columns)
+        self._last_write = time.monotonic()
+        return count
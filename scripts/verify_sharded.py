@@ -0,0 +1,284 @@
+"""
+Sharded full-list verification
+Splits the valid UPCs of the master list into N shards by a stable hash and
+verifies each shard in its own worker process, with its own API keys and
+slice of the rate limits. Every shard appends to its own result journal
+(resumable), and a merge step writes palmers-barcodes-FULL-VERIFICATION.csv
+in master-list order, so the same results always give the same file.
+
+Usage:
+    python verify_sharded.py --shards 4 [--keys shard_keys.json] [--providers upcitemdb,openfoodfacts]
+    python verify_sharded.py --shards 4 --merge-only
+
+shard_keys.json is a list with one {provider: api_key} object per account;
+shard i uses entry i % len(list). A key's plan limit is split evenly between
+the shards that use it; providers without a key get 1/N of it (they share
+one IP). Shards record routing stats and telemetry in their own files under
+.cache/shards, and the parent folds them into the shared ones when they finish.
+
+.cache/shards/state.json records the shard count of the journals and the
+routing stats the running shards started from, so an interrupted run's stats
+are merged against their own base. Running with a different --shards re-keys
+the journals to the new count, so no finished UPC is verified again.
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+import multiprocessing
+from collections import Counter
+
+from gtin import to_gtin14
+import provider_router
+import telemetry
+from master_list import MASTER_LIST_CSV, REPO_ROOT, load_master_list
+from provider_router import ProviderRouter
+from rate_limiter import RateLimiter
+from response_cache import get_response_cache
+from telemetry import get_telemetry
+from upc_providers import FREE_PROVIDERS
+from verification_journal import VerificationJournal
+from verification_output import write_verification_csv
+
+OUTPUT_CSV = os.path.join(REPO_ROOT, 'palmers-barcodes-FULL-VERIFICATION.csv')
+SHARD_DIR = os.path.join(REPO_ROOT, '.cache', 'shards')
+STATE_PATH = os.path.join(SHARD_DIR, 'state.json')
+
+RATE_LIMITED = (False, 'Rate limited', 'Rate limited')
+
+
+def shard_of(upc_code, shards):
+    """Stable shard number for a UPC - same on every run, machine and process"""
+    return zlib.crc32(to_gtin14(upc_code).encode()) % shards
+
+
+def shard_path(shard, shards):
+    return os.path.join(SHARD_DIR, f"verification-shard-{shard + 1}-of-{shards}.csv")
+
+
+def shard_stats_paths(shard, shards):
+    """(routing stats, telemetry) files a shard writes instead of the shared ones"""
+    name = f"shard-{shard + 1}-of-{shards}.json"
+    return (os.path.join(SHARD_DIR, f"routing-{name}"),
+            os.path.join(SHARD_DIR, f"telemetry-{name}"))
+
+
+def rate_shares(shards, provider_names, keys):
+    """
+    Share of each provider's plan limit per shard
+
+    A key used by n shards gives each of them 1/n of its plan
+    Returns: list with one {provider: share} per shard
+    """
+    users = Counter(shard % len(keys) for shard in range(shards))
+    shares = []
+    for shard in range(shards):
+        entry = shard % len(keys)
+        shares.append({name: 1.0 / users[entry] if keys[entry].get(name) else 1.0 / shards
+                       for name in provider_names})
+    return shares
+
+
+def shard_upcs(shard, shards, csv_path=MASTER_LIST_CSV):
+    """Valid UPCs of the master list that belong to this shard, in list order"""
+    master = load_master_list(csv_path)
+    upcs = master.column('upc')
+    seen = set()
+    result = []
+    for i in master.valid_index:
+        upc_code = upcs[i]
+        if upc_code not in seen and shard_of(upc_code, shards) == shard:
+            seen.add(upc_code)
+            result.append(upc_code)
+    return result
+
+
+def run_shard(shard, shards, provider_names, keys, shares, csv_path=MASTER_LIST_CSV):
+    """Worker process: verify one shard, appending every result to its journal"""
+    # Imported here so each process builds its own engine, transport and limiter
+    from lookup_engine import iter_lookups
+
+    # Never read-modify-write the shared stats files from several processes
+    routing_path, telemetry_path = shard_stats_paths(shard, shards)
+    get_telemetry().path = telemetry_path
+    router = ProviderRouter(master=load_master_list(csv_path))
+    router.path = routing_path
+
+    journal = VerificationJournal(shard_path(shard, shards))
+    done = journal.load()
+    todo = [upc_code for upc_code in shard_upcs(shard, shards, csv_path)
+            if upc_code not in done or done[upc_code] == RATE_LIMITED]
+
+    rate_limiter = RateLimiter(shares=shares, store=get_response_cache())
+
+    label = f"[shard {shard + 1}/{shards}]"
+    print(f"{label} {len(done)} already done, {len(todo)} to verify")
+    found_count = 0
+    start_time = time.time()
+    try:
+        for i, (upc_code, (found, product_name, source)) in enumerate(
+                iter_lookups(todo, provider_names, rate_limiter=rate_limiter, keys=keys,
+                             router=router), 1):
+            if found is None:
+                journal.append(upc_code, RATE_LIMITED)
+            else:
+                found_count += 1 if found else 0
+                journal.append(upc_code, (found, product_name, source))
+            if i % 100 == 0:
+                rate = i / (time.time() - start_time)
+                print(f"{label} {i}/{len(todo)} - {found_count} found - {rate:.1f} UPC/s")
+    finally:
+        journal.compact()
+        journal.close()
+    print(f"{label} complete: {found_count} found in {time.time() - start_time:.0f}s")
+
+
+def merge_shards(shards, csv_path=MASTER_LIST_CSV, output_file=OUTPUT_CSV):
+    """
+    Combine every shard journal into the full verification CSV
+
+    Returns: number of UPCs with a result
+    """
+    results = {}
+    for shard in range(shards):
+        results.update(VerificationJournal(shard_path(shard, shards)).load())
+    write_verification_csv(csv_path, output_file, results)
+    return len(results)
+
+
+def merge_shard_stats(shards, base=None):
+    """
+    Fold the shards' routing stats and telemetry into the shared files
+
+    base: the routing stats the shards started from (default: the shared file as it is now)
+    """
+    paths = [shard_stats_paths(shard, shards) for shard in range(shards)]
+    provider_router.merge_shard_stats([routing for routing, _ in paths], base=base)
+    telemetry.merge_files([shard_telemetry for _, shard_telemetry in paths])
+
+
+def load_state():
+    """{'shards': count, 'routing_base': stats or None} of the last run, or None"""
+    if not os.path.exists(STATE_PATH):
+        return None
+    with open(STATE_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(shards, routing_base=None):
+    tmp_path = f"{STATE_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'shards': shards, 'routing_base': routing_base}, f, separators=(',', ':'))
+    os.replace(tmp_path, STATE_PATH)
+
+
+def reshard_journals(old_shards, shards):
+    """
+    Move the results of old_shards journals into journals for shards
+
+    Returns: number of UPCs moved
+    """
+    results = {}
+    old_paths = [shard_path(shard, old_shards) for shard in range(old_shards)]
+    for path in old_paths:
+        results.update(VerificationJournal(path).load())
+    journals = [VerificationJournal(shard_path(shard, shards)) for shard in range(shards)]
+    for journal in journals:
+        journal.load()
+    for upc_code, result in results.items():
+        journals[shard_of(upc_code, shards)].results[upc_code] = result
+    for journal in journals:
+        journal.compact()
+    for path in old_paths:
+        if os.path.exists(path):
+            os.remove(path)
+    return len(results)
+
+
+def resume_state(shards):
+    """
+    Settle what the last run left behind before running with shards
+
+    Merges leftover shard stats against the base they started from, and
+    re-keys the journals if the last run used a different shard count.
+    """
+    state = load_state()
+    if state is None:
+        # Shard files from before the state file existed - best guess at their base
+        merge_shard_stats(shards)
+        save_state(shards)
+        return
+    merge_shard_stats(state['shards'], state.get('routing_base'))
+    if state['shards'] != shards:
+        moved = reshard_journals(state['shards'], shards)
+        print(f"Re-keyed {moved} results from {state['shards']} to {shards} shard journals")
+    save_state(shards)
+
+
+def load_keys(path):
+    if not path:
+        return [{}]
+    with open(path, 'r', encoding='utf-8') as f:
+        keys = json.load(f)
+    return keys or [{}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded full-list UPC verification")
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--keys', help="JSON list of {provider: api_key}, one per account")
+    parser.add_argument('--providers', default=','.join(FREE_PROVIDERS))
+    parser.add_argument('--merge-only', action='store_true')
+    args = parser.parse_args()
+
+    provider_names = [name.strip() for name in args.providers.split(',') if name.strip()]
+    keys = load_keys(args.keys)
+    os.makedirs(SHARD_DIR, exist_ok=True)
+
+    print("=" * 80)
+    print(f"SHARDED UPC VERIFICATION - {args.shards} shards")
+    print("=" * 80)
+    print()
+
+    start_time = time.time()
+    resume_state(args.shards)
+    if not args.merge_only:
+        # Every shard router starts from the shared stats as they are now
+        base = ProviderRouter(provider_router.DEFAULT_STATS_PATH).stats
+        save_state(args.shards, base)
+        shares = rate_shares(args.shards, provider_names, keys)
+        workers = []
+        for shard in range(args.shards):
+            worker = multiprocessing.Process(
+                target=run_shard,
+                args=(shard, args.shards, provider_names, keys[shard % len(keys)], shares[shard]))
+            worker.start()
+            workers.append(worker)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            print("\nStopping workers - progress is saved in the shard journals")
+            for worker in workers:
+                worker.terminate()
+            merge_shard_stats(args.shards, base)
+            save_state(args.shards)
+            sys.exit(1)
+        merge_shard_stats(args.shards, base)
+        save_state(args.shards)
+        failed = [i + 1 for i, worker in enumerate(workers) if worker.exitcode != 0]
+        if failed:
+            print(f"Shards failed: {failed} - rerun to resume them")
+
+    count = merge_shards(args.shards)
+    print()
+    print(f"Merged {count} results from {args.shards} shards "
+          f"in {time.time() - start_time:.0f}s")
+    print(f"Output saved to: {OUTPUT_CSV}")
+
+
+if __name__ == '__main__':
+    main()